@@ -0,0 +1,301 @@
+"""
+Benchmark suite for the hot paths of a pipeline run: source parsers, the
+sector filter, event memory, report rendering and CSV export.
+
+    python -m benchmarks.run                      # 10^2 .. 10^6 events
+    python -m benchmarks.run --sizes 100,1000 --only nyrr,sectors
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Inputs come from benchmarks.synthetic (seeded, so sizes are comparable across
+runs); the saved pages in benchmarks/fixtures are parsed first as a sanity
+check that the parsers still find events. Results are written as JSON.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import SyntheticData
+from src.ingestion.nyrr import NYRRCollector
+from src.ingestion.prospect_park import ProspectParkCollector
+from src.models.batch import EventBatch
+from src.reporting.exporter import export_events
+from src.reporting.report_generator import ReportGenerator
+from src.scoring.impact import ImpactScorer
+from src.subscriptions.sectors import SectorIndex, compact_assignment, default_sector, load_sectors
+from src.utils.memory import EventMemory
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = [10 ** k for k in range(2, 7)]
+PP_BASE_URL = "https://www.prospectpark.org/events/list/"
+
+# Minimum number of events each saved fixture must still yield
+FIXTURE_EXPECTED = {
+    "nyrr_feed.json": 6,
+    "nyrr_upcoming.html": 5,
+    "prospect_park_events.html": 4,
+}
+
+
+class Benchmark:
+    """
+    One measured operation. `setup(n, data)` builds its input outside the timed
+    region; `run(ctx)` is timed. Sizes above `max_size` are skipped unless the
+    suite runs with --no-caps (BeautifulSoup parsing is the slow one).
+    """
+
+    def __init__(self, name: str, setup: Callable, run: Callable, max_size: Optional[int] = None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_size = max_size
+
+
+class SizeData:
+    """Per-size inputs shared by the benchmarks (events are built once per size)."""
+
+    def __init__(self, synthetic: SyntheticData, n: int, workdir: str):
+        self.synthetic = synthetic
+        self.n = n
+        self.workdir = workdir
+        self._events = None
+
+    @property
+    def events(self):
+        if self._events is None:
+            self._events = self.synthetic.events(self.n)
+        return self._events
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.workdir, f"{self.n}-{name}")
+
+
+def _memory_file(data: SizeData) -> str:
+    path = data.path("event_memory.json")
+    memory = EventMemory(path)
+    if not len(memory):
+        data.synthetic.memory_file(path, data.n)
+        # Migrated to the binary format here, outside the timed region
+        memory.load()
+    memory.close()
+    return path
+
+
+def _loaded_memory(data: SizeData) -> EventMemory:
+    memory = EventMemory(_memory_file(data))
+    # Drop what an earlier setup journaled
+    memory.compact()
+    # Half of the probed events are already known (journaled, as during a run)
+    for event in data.events[::2]:
+        memory.mark_processed(event)
+    return memory
+
+
+def _sector_filter(ctx):
+    index, batch = ctx
+    batch = batch.select(batch.date_window_mask(start=date(2026, 1, 1)))
+    rows, _ = compact_assignment(index.assign(batch))
+    return len(rows)
+
+
+def _render_report(events) -> int:
+    ReportGenerator.generate_html_report(events)
+    return len(events)
+
+
+def _example_sectors():
+    path = os.path.join(ROOT, "sectors.example.json")
+    return load_sectors(path) if os.path.exists(path) else [default_sector()]
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("nyrr.parse_json_feed",
+              lambda n, d: [d.synthetic.nyrr_feed(n)],
+              lambda payloads: len(NYRRCollector()._parse_json_feed(payloads))),
+    Benchmark("nyrr.find_event_list",
+              lambda n, d: d.synthetic.nyrr_feed(n, depth=6),
+              lambda payload: len(NYRRCollector()._find_event_list(payload) or [])),
+    Benchmark("nyrr.extract_event_list.learned",
+              lambda n, d: d.synthetic.nyrr_feed_body(n),
+              lambda body: len(NYRRCollector()._extract_event_list(body, ("events",))[1])),
+    Benchmark("nyrr.extract_event_list.full_decode",
+              lambda n, d: d.synthetic.nyrr_feed_body(n),
+              lambda body: len(NYRRCollector()._find_event_list(json.loads(body)))),
+    Benchmark("nyrr.parse_html",
+              lambda n, d: d.synthetic.nyrr_html(n),
+              lambda html: len(NYRRCollector()._parse_html(html)), max_size=10_000),
+    Benchmark("prospect_park.parse_html",
+              lambda n, d: d.synthetic.prospect_park_html(n),
+              lambda html: len(ProspectParkCollector()._parse_html(html, PP_BASE_URL)), max_size=10_000),
+    # What the collectors parse when the fields are extracted in the browser
+    Benchmark("nyrr.parse_records",
+              lambda n, d: NYRRCollector._container_records(NYRRCollector._select_containers(d.synthetic.nyrr_html(n))),
+              lambda records: len(NYRRCollector()._parse_records(records)), max_size=10_000),
+    Benchmark("prospect_park.parse_records",
+              lambda n, d: ProspectParkCollector._card_records(ProspectParkCollector._select_cards(d.synthetic.prospect_park_html(n))),
+              lambda records: len(ProspectParkCollector()._parse_records(records, PP_BASE_URL)), max_size=10_000),
+    Benchmark("sectors.filter.default",
+              lambda n, d: (SectorIndex([default_sector()]), EventBatch.from_events(d.events)),
+              _sector_filter),
+    Benchmark("sectors.filter.example",
+              lambda n, d: (SectorIndex(_example_sectors()), EventBatch.from_events(d.events)),
+              _sector_filter),
+    Benchmark("scoring.score_batch",
+              lambda n, d: EventBatch.from_events(d.events),
+              lambda batch: len(ImpactScorer().score_batch(batch, overwrite=True))),
+    Benchmark("memory.load",
+              lambda n, d: _memory_file(d),
+              lambda path: len(EventMemory(path))),
+    Benchmark("memory.is_new",
+              lambda n, d: (_loaded_memory(d), d.events),
+              lambda ctx: sum(ctx[0].is_new(e) for e in ctx[1])),
+    Benchmark("memory.save",
+              lambda n, d: _loaded_memory(d),
+              lambda memory: memory.save() or len(memory)),
+    Benchmark("report.generate_html",
+              lambda n, d: d.events,
+              _render_report),
+    Benchmark("export.csv",
+              lambda n, d: (d.events, d.path("export.csv")),
+              lambda ctx: export_events(ctx[0], ctx[1])),
+]
+
+
+def check_fixtures() -> Dict[str, int]:
+    """Parses the saved pages; a count below FIXTURE_EXPECTED means a parser regressed."""
+    with open(os.path.join(FIXTURES, "nyrr_feed.json")) as f:
+        feed = json.load(f)
+    with open(os.path.join(FIXTURES, "nyrr_upcoming.html")) as f:
+        nyrr_html = f.read()
+    with open(os.path.join(FIXTURES, "prospect_park_events.html")) as f:
+        pp_html = f.read()
+    with contextlib.redirect_stdout(io.StringIO()):
+        counts = {
+            "nyrr_feed.json": len(NYRRCollector()._parse_json_feed([feed])),
+            "nyrr_upcoming.html": len(NYRRCollector()._parse_html(nyrr_html)),
+            "prospect_park_events.html": len(ProspectParkCollector()._parse_html(pp_html, PP_BASE_URL)),
+        }
+    for name, count in counts.items():
+        status = "ok" if count >= FIXTURE_EXPECTED[name] else f"FAILED (expected {FIXTURE_EXPECTED[name]})"
+        print(f"[Benchmark] fixture {name}: {count} events {status}")
+    return counts
+
+
+def measure(bench: Benchmark, ctx, repeats: int) -> dict:
+    timings = []
+    items = 0
+    for _ in range(repeats):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            items = bench.run(ctx)
+            timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "min_s": min(timings),
+        "median_s": median,
+        "items": items,
+        "items_per_s": items / median if median > 0 else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_suite(sizes: List[int], only: Optional[List[str]] = None, repeats: int = 3,
+              caps: bool = True, seed: int = 42) -> dict:
+    selected = [b for b in BENCHMARKS if not only or any(b.name.startswith(p) for p in only)]
+    synthetic = SyntheticData(seed=seed)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for n in sizes:
+            data = SizeData(synthetic, n, workdir)
+            for bench in selected:
+                entry = {"name": bench.name, "n": n}
+                if caps and bench.max_size and n > bench.max_size:
+                    entry["skipped"] = f"above max size {bench.max_size} (use --no-caps)"
+                    print(f"[Benchmark] {bench.name:<26} n={n:>9,}  skipped ({entry['skipped']})")
+                    results.append(entry)
+                    continue
+                ctx = bench.setup(n, data)
+                # Large inputs run once; repeats matter for the fast small sizes
+                entry.update(measure(bench, ctx, repeats if n <= 100_000 else 1))
+                print(f"[Benchmark] {bench.name:<26} n={n:>9,}  median {entry['median_s'] * 1000:10.2f} ms"
+                      f"  ({entry['items_per_s'] or 0:,.0f} items/s)")
+                results.append(entry)
+                del ctx
+    return {
+        "created_at": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "sizes": sizes,
+        "repeats": repeats,
+        "fixtures": check_fixtures(),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline_path: str):
+    """Prints the median-time ratio of every (benchmark, size) present in both runs."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["name"], r["n"]): r for r in baseline.get("results", []) if "median_s" in r}
+    print(f"\n[Benchmark] Compared with {baseline_path} (commit {baseline.get('commit')}):")
+    for r in current["results"]:
+        old = before.get((r["name"], r["n"]))
+        if old is None or "median_s" not in r:
+            continue
+        ratio = r["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        print(f"  {r['name']:<26} n={r['n']:>9,}  {old['median_s'] * 1000:10.2f} -> "
+              f"{r['median_s'] * 1000:10.2f} ms  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated event counts")
+    parser.add_argument("--only", help="comma-separated benchmark name prefixes (e.g. nyrr,memory)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-caps", action="store_true", help="run the slow benchmarks at every size")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = [p.strip() for p in args.only.split(",")] if args.only else None
+    report = run_suite(sizes, only=only, repeats=args.repeats, caps=not args.no_caps, seed=args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
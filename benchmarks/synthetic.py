@@ -0,0 +1,129 @@
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta
+from html import escape
+from typing import List
+
+from src.models.event import Event
+
+TITLES = [
+    "RBC Brooklyn Half", "Prospect Park 5K", "Gridiron 4M", "Queens 10K",
+    "Smorgasburg Prospect Park", "Birdwatching Tour at the Audubon Center",
+    "Celebrate Brooklyn! at the Lena Horne Bandshell", "TCS New York City Marathon",
+    "Bronx 10 Mile", "Nature Exploration-Kids", "LeFrak Center Skate Night",
+    "Harlem 5K", "Staten Island Half", "Breeze Hill Cleanup",
+]
+VENUES = [
+    "Prospect Park, Brooklyn", "Lena Horne Bandshell", "LeFrak Center at Lakeside",
+    "Central Park, Manhattan", "Five Boroughs", "Audubon Center",
+    "Flushing Meadows Corona Park, Queens", "Van Cortlandt Park, Bronx",
+]
+SOURCES = ["NYRR", "Prospect Park", "Weather (NWS)", "MTA Subway Alerts"]
+TIMES = ["7:00 AM", "8:30 AM", "10:00 AM", "6:30 PM", "TBD"]
+
+
+class SyntheticData:
+    """
+    Seeded generator of events and raw source payloads shaped like the live
+    sites (NYRR race feed JSON and calendar HTML, Prospect Park event list),
+    so every benchmark size gets the same data on every run.
+    """
+
+    def __init__(self, seed: int = 42, start: datetime = datetime(2026, 1, 1)):
+        self.seed = seed
+        self.start = start
+
+    def _rng(self, n: int, salt: str) -> random.Random:
+        return random.Random(f"{self.seed}:{salt}:{n}")
+
+    def _title(self, rng: random.Random, i: int) -> str:
+        # The index suffix keeps hashes unique without unrealistically long titles
+        return f"{rng.choice(TITLES)} #{i}"
+
+    def events(self, n: int) -> List[Event]:
+        rng = self._rng(n, "events")
+        return [
+            Event(
+                title=self._title(rng, i),
+                description=rng.choice(["", "Family friendly.", "Road closures expected on Flatbush Ave."]),
+                start_time=self.start + timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                venue=rng.choice(VENUES),
+                source=rng.choice(SOURCES),
+                impact_score=rng.randint(1, 5),
+                attendance_estimate=rng.choice([None, 50, 500, 5000, 25000]),
+                raw_data={"url": f"https://example.org/events/{i}"},
+            )
+            for i in range(n)
+        ]
+
+    def nyrr_feed(self, n: int, depth: int = 3) -> dict:
+        """Race-calendar API payload with the event list nested `depth` levels down."""
+        rng = self._rng(n, "nyrr-feed")
+        races = []
+        for i in range(n):
+            day = self.start + timedelta(days=rng.randint(0, 365))
+            races.append({
+                "event_name": self._title(rng, i),
+                "start_date": day.strftime(rng.choice(["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y"])),
+                "location": rng.choice(VENUES),
+                "slug": f"races/race-{i}",
+                "distance": rng.choice(["5K", "10K", "4M", "13.1M"]),
+            })
+        payload: dict = {"events": races}
+        for level in range(depth):
+            payload = {"meta": {"level": level, "total": n}, "data": payload}
+        return payload
+
+    def nyrr_feed_body(self, n: int) -> str:
+        """Serialized feed response carrying a config/analytics block as large as the event list."""
+        rng = self._rng(n, "nyrr-body")
+        config = {
+            "i18n": {f"label_{i}": self._title(rng, i) for i in range(n)},
+            "analytics": [{"metric": f"metric_{i}", "value": rng.random()} for i in range(n)],
+        }
+        return json.dumps({"config": config, "feed": self.nyrr_feed(n)})
+
+    def nyrr_html(self, n: int) -> str:
+        rng = self._rng(n, "nyrr-html")
+        cards = []
+        for i in range(n):
+            day = self.start + timedelta(days=rng.randint(0, 365))
+            cards.append(
+                f'<div class="upcoming-event" data-start-date="{day:%Y/%m/%d}" '
+                f'data-location="{escape(rng.choice(VENUES))}">'
+                f'<article class="upcoming-race">'
+                f'<h3 class="upcoming-race-title">{escape(self._title(rng, i))}</h3>'
+                f'<p class="upcoming-race-time">{rng.choice(TIMES)}</p>'
+                f'<a class="learn-more-btn" href="/races/race-{i}">Learn More</a>'
+                f'</article></div>'
+            )
+        return ('<!DOCTYPE html><html><head><title>Race Calendar</title></head><body><main>'
+                '<section class="upcoming-events">' + "\n".join(cards) + '</section></main></body></html>')
+
+    def prospect_park_html(self, n: int) -> str:
+        rng = self._rng(n, "pp-html")
+        cards = []
+        for i in range(n):
+            moment = self.start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            cards.append(
+                f'<article class="tribe-events-calendar-list__event type-tribe_events">'
+                f'<time class="tribe-events-calendar-list__event-datetime" datetime="{moment:%Y-%m-%dT%H:%M:00}">'
+                f'{moment:%B %d @ %I:%M %p}</time>'
+                f'<h3 class="tribe-events-calendar-list__event-title">'
+                f'<a href="/events/event-{i}/">{escape(self._title(rng, i))}</a></h3></article>'
+            )
+        return ('<!DOCTYPE html><html><head><title>Events</title></head><body>'
+                '<div class="tribe-events-calendar-list">' + "\n".join(cards) + '</div></body></html>')
+
+    def memory_file(self, path: str, n: int):
+        """Writes an EventMemory file with `n` entries, half of them synced to a calendar."""
+        rng = self._rng(n, "memory")
+        event_map, source_map = {}, {}
+        for i in range(n):
+            key = hashlib.md5(f"{self.seed}:{i}".encode()).hexdigest()
+            event_map[key] = f"gcal{i:08d}" if i % 2 else None
+            source_map[key] = rng.choice(SOURCES)
+        with open(path, "w") as f:
+            json.dump({"last_updated": self.start.isoformat(), "event_map": event_map,
+                       "source_map": source_map}, f, indent=2)
@@ -1,57 +1,233 @@
+import argparse
 import asyncio
 import os
-import csv
-import functions_framework
 import sys
+import tempfile
+import threading
 from datetime import datetime
+from typing import List, Optional
+
+# Make `src` importable before anything else is loaded
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR) # Use insert(0) for priority
+
+from src.utils.startup import profiler, warm_cache
+from src.utils.snapshot import SingleFlight
+from src.utils.tracing import Tracer
+from src.utils.loop_watchdog import LoopWatchdog, install_loop_policy, offload
+
+# Optional uvloop event loop (LOOP_POLICY=uvloop), installed before any loop is created
+LOOP_POLICY = install_loop_policy()
+
+functions_framework = profiler.timed_import("functions_framework")
 
 VERSION = "3.0.0-PRO-RESILIENT"
 
-async def run_ingestion_pipeline():
-    """Main orchestration logic with global imports and redundant fail-safes."""
-    print(f"=== PIPELINE START (v{VERSION}) ===")
-    
-    # 1. Setup Environment
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    if base_dir not in sys.path:
-        sys.path.insert(0, base_dir) # Use insert(0) for priority
+# Collector registry. Modules are only imported when the collector is enabled, so
+# playwright/seleniumbase are not loaded otherwise. `source` is the Event.source the
+# collector emits; `browser` collectors treat an empty result as a failure.
+COLLECTORS = {
+    "NYRR": {"module": "src.ingestion.nyrr", "cls": "NYRRCollector", "method": "fetch_events",
+             "source": "NYRR", "browser": True},
+    "ProspectPark": {"module": "src.ingestion.prospect_park", "cls": "ProspectParkCollector", "method": "fetch_events",
+                     "source": "Prospect Park", "browser": True},
+    "Weather": {"module": "src.ingestion.weather", "cls": "WeatherConnector", "method": "fetch_active_alerts",
+                "source": "NWS Weather", "browser": False},
+}
+
+
+def enabled_collectors():
+    """Collectors selected by COLLECTORS_ENABLED (comma-separated names, default all)."""
+    selected = os.getenv("COLLECTORS_ENABLED")
+    if not selected:
+        return list(COLLECTORS)
+    wanted = {name.strip().lower() for name in selected.split(",")}
+    return [name for name in COLLECTORS if name.lower() in wanted]
+
+
+def scheduling_events(name, events):
+    """
+    Upcoming events that drive a collector's poll cadence: browser collectors
+    follow their own source's events, cheap ones (Weather) follow every event.
+    """
+    spec = COLLECTORS[name]
+    if not spec["browser"]:
+        return events
+    return [e for e in events if e.source == spec["source"]]
+
+
+async def run_ingestion_pipeline(due: Optional[List[str]] = None):
+    """
+    Main orchestration logic with lazy imports, warm caches and redundant fail-safes.
+
+    `due` restricts polling to those collectors (adaptive scheduling); the other
+    enabled collectors contribute their last-known-good events unchanged. Every
+    stage runs in a trace span; spans are exported when the run ends. A loop
+    watchdog (LOOP_WATCHDOG) reports anything that blocks the event loop.
+    """
+    tracer = Tracer()
+    watchdog = LoopWatchdog.from_env(tracer)
+    if watchdog is not None:
+        watchdog.start()
+    try:
+        with tracer.span("pipeline", mode="scheduled" if due is not None else "full") as span:
+            events = await _run_stages(tracer, due)
+            span.set(items_out=len(events))
+        return events
+    finally:
+        if watchdog is not None:
+            await watchdog.stop()
+        tracer.export()
+
+
+async def _run_stages(tracer: Tracer, due: Optional[List[str]]):
+    print(f"=== PIPELINE START (v{VERSION}) run {tracer.run_id} ===")
+    started_at = datetime.now()
     
     all_events = []
     
-    # Standard Imports (outside the loop for stability)
+    # 1. Core Imports (cached in sys.modules after the first invocation)
     try:
-        from src.ingestion.nyrr import NYRRCollector
-        from src.ingestion.prospect_park import ProspectParkCollector
-        from src.ingestion.weather import WeatherConnector
-        from src.models.event import Event
-        from src.reporting.report_generator import ReportGenerator
-        from src.reporting.notifier import Notifier
-        from src.utils.memory import EventMemory
-        from src.integration.calendar_connector import CalendarConnector
+        EventBatch = profiler.load("src.models.batch", "EventBatch")
+        ImpactScorer = profiler.load("src.scoring.impact", "ImpactScorer")
+        ReportGenerator = profiler.load("src.reporting.report_generator", "ReportGenerator")
+        Notifier = profiler.load("src.reporting.notifier", "Notifier")
+        exporter = profiler.timed_import("src.reporting.exporter")
+        export_events, parse_schema = exporter.export_events, exporter.parse_schema
+        EventMemory = profiler.load("src.utils.memory", "EventMemory")
+        FootTrafficIndex = profiler.load("src.scoring.traffic_index", "FootTrafficIndex")
+        SnapshotStore = profiler.load("src.utils.snapshot", "SnapshotStore")
+        CollectorHealth = profiler.load("src.utils.resilience", "CollectorHealth")
+        SourceDigestStore = profiler.load("src.utils.change_detection", "SourceDigestStore")
+        digest_json = profiler.load("src.utils.change_detection", "digest_json")
+        PollScheduler = profiler.load("src.scheduling.poll_scheduler", "PollScheduler")
+        sectors_module = profiler.timed_import("src.subscriptions.sectors")
+        load_sectors, SectorIndex = sectors_module.load_sectors, sectors_module.SectorIndex
+        compact_assignment = sectors_module.compact_assignment
+        active_cassette = profiler.load("src.utils.cassette", "active")
+        isolation = profiler.timed_import("src.utils.isolation")
+        CollectorRun, run_collector, run_in_process = isolation.CollectorRun, isolation.run_collector, isolation.run_in_process
         print("[Pipeline] Module setup complete.")
     except Exception as e:
         print(f"[Pipeline] FATAL: Import failure: {e}")
         # Last resort fallback if imports fail entirely
         return []
 
-    # 2. Collector Tasks
+    # 2. Collector Tasks (heavy browser dependencies load here, per enabled collector)
+    # Each collector sits behind a circuit breaker; when it is open or the run fails,
+    # the source's last-known-good events are served instead (flagged stale).
+    # With COLLECTOR_ISOLATION=process, browser collectors run in parallel worker
+    # processes with memory/CPU limits and a hard timeout; with COLLECTOR_DISPATCH=queue,
+    # they are enqueued as jobs for `main.py --worker` processes instead.
     print("[Pipeline] Initiating collectors...")
-    tasks = [
-        ("NYRR", NYRRCollector().fetch_events()),
-        ("ProspectPark", ProspectParkCollector().fetch_events()),
-        ("Weather", WeatherConnector().fetch_active_alerts()),
-    ]
-    
-    for name, coro in tasks:
-        print(f"[Pipeline] Running {name}...")
-        try:
-            res = await coro
-            count = len(res) if res else 0
-            print(f"[Pipeline] {name} results: {count}")
-            if res:
-                all_events.extend(res)
-        except Exception as e:
-            print(f"[Pipeline] {name} crashed: {e}")
+    health = CollectorHealth()
+    digests = SourceDigestStore()
+    scheduler = PollScheduler()
+    isolated = os.getenv("COLLECTOR_ISOLATION", "thread").lower() == "process"
+    queued = os.getenv("COLLECTOR_DISPATCH", "local").lower() == "queue"
+
+    collector_spans = {}
+
+    async def collect(name) -> CollectorRun:
+        spec = COLLECTORS[name]
+        # Only allow the unchanged short-circuit when there is a cached result to fall back on
+        known_digest = digests.get(spec["source"]) if health.has_cache(name) else None
+        in_process = isolated and spec["browser"]
+        with tracer.span("collector", collector=name, mode="process" if in_process else "thread") as span:
+            collector_spans[name] = span
+            if in_process:
+                run = await run_in_process(spec["module"], spec["cls"], spec["method"], spec["source"], known_digest)
+            else:
+                run = await run_collector(spec["module"], spec["cls"], spec["method"], spec["source"],
+                                          known_digest, loader=profiler.load)
+            span.set(items_out=len(run.events or []), bytes=run.bytes_fetched)
+        return run
+
+    # Sources not due for a poll this run (adaptive scheduling)
+    deferred_sources = set()
+    polled = []
+    for name in enabled_collectors():
+        if due is not None and name not in due and health.has_cache(name):
+            deferred_sources.add(COLLECTORS[name]["source"])
+        elif health.breaker(name).allow_request():
+            print(f"[Pipeline] Running {name}...")
+            polled.append(name)
+        else:
+            print(f"[Pipeline] {name} skipped: circuit breaker is {health.breaker(name).state}.")
+
+    if queued and polled:
+        dispatch = profiler.load("src.workqueue.worker", "dispatch")
+        with tracer.span("collector.dispatch", items_in=len(polled)) as span:
+            runs = await dispatch(COLLECTORS, polled, params={
+                name: {"known_digest": digests.get(COLLECTORS[name]["source"])}
+                for name in polled if health.has_cache(name)
+            }, run_id=tracer.run_id)
+            span.set(items_out=sum(len(r.events or []) for r in runs.values()),
+                     bytes=sum(r.bytes_fetched for r in runs.values()))
+    elif isolated:
+        runs = dict(zip(polled, await asyncio.gather(*(collect(name) for name in polled))))
+    else:
+        runs = {}
+        for name in polled:
+            runs[name] = await collect(name)
+
+    stale_sources = set()
+    # Sources whose upstream payload is byte-for-byte unchanged since the last parsed run
+    unchanged_sources = set()
+    for name in enabled_collectors():
+        spec = COLLECTORS[name]
+        breaker = health.breaker(name)
+        run = runs.get(name)
+        if spec["source"] in deferred_sources:
+            res = health.cached_events(name, stale=False)
+            outcome = "deferred"
+            print(f"[Pipeline] {name} not due until {scheduler.next_poll(name)}: reusing {len(res)} cached event(s).")
+        elif run is not None and run.unchanged:
+            breaker.record_success()
+            scheduler.record_poll(name, True, run.pending_digest)
+            res = health.cached_events(name, stale=False)
+            unchanged_sources.add(spec["source"])
+            outcome = "unchanged"
+            print(f"[Pipeline] {name} unchanged upstream: reusing {len(res)} cached event(s).")
+        elif run is not None and run.events is not None and (run.events or not spec["browser"]):
+            res = run.events
+            breaker.record_success()
+            health.store_good(name, res)
+            fingerprint = run.pending_digest
+            if fingerprint:
+                digests.update(spec["source"], fingerprint)
+            else:
+                fingerprint = digest_json([e.model_dump(mode="json") for e in res])
+            scheduler.record_poll(name, True, fingerprint)
+            outcome = "fresh"
+            print(f"[Pipeline] {name} results: {len(res)}")
+        else:
+            if run is not None:
+                if run.error:
+                    print(f"[Pipeline] {name} crashed: {run.error}")
+                breaker.record_failure()
+                scheduler.record_poll(name, False)
+            res = health.cached_events(name)
+            stale_sources.add(spec["source"])
+            outcome = "stale"
+            print(f"[Pipeline] {name} serving {len(res)} last-known-good event(s) (stale).")
+        if name in collector_spans:
+            collector_spans[name].set(outcome=outcome)
+        all_events.extend(res)
+    health.save()
+    digests.save()
+    payloads = profiler.load("src.utils.payload_store", "payload_store")()
+    if payloads is not None:
+        # Retention for the raw payloads the collectors just stored
+        await offload(payloads.prune)
+    print(f"[Pipeline] Sources skipped as unchanged: {len(unchanged_sources)}"
+          + (f" {sorted(unchanged_sources)}" if unchanged_sources else ""))
+    # Sources whose events were not freshly scraped this run must not be treated as "missing"
+    reused_sources = unchanged_sources | deferred_sources
+    protected_sources = stale_sources | reused_sources | {
+        spec["source"] for name, spec in COLLECTORS.items() if name not in enabled_collectors()
+    }
 
     # 3. Validation & Aggregation
     total = len(all_events)
@@ -60,136 +236,480 @@ async def run_ingestion_pipeline():
     if total == 0:
         print("[Pipeline] CRITICAL: 0 events found. This should not happen with fallbacks.")
 
-    # --- BROOKLYN FILTER ---
-    print(f"[Pipeline] Filtering {len(all_events)} items for Brooklyn/Prospect Park sector...")
-    brooklyn_keywords = ["Brooklyn", "Prospect Park", "Kings", "696 Flatbush", "Grand Army", "Lakeside", "LeFrak", "Zoo", "Breeze Hill", "Audubon", "Lookout Hill", "EcoCenter", "Parkside", "Lullwater", "The Loop"]
-    filtered_events = []
-    for event in all_events:
-        text = f"{event.title} {event.venue} {event.description or ''}".lower()
-        if any(kw.lower() in text for kw in brooklyn_keywords):
-            filtered_events.append(event)
-    
-    print(f"[Pipeline] Post-filter count: {len(filtered_events)}")
-    
     # --- DATE FILTER (Global) ---
+    # Filters run column-wise over an EventBatch instead of looping over pydantic objects.
     # Remove past events so they don't appear in Report, CSV, or Calendar
-    # And so Memory logic treats them as "missing" (triggering deletion)
-    future_events = []
-    now_date = datetime.now().date()
-    for event in filtered_events:
-        if event.start_time.date() >= now_date:
-            future_events.append(event)
+    # (Memory moves them to its history archive before the sync, keeping their calendar entry)
+    with tracer.span("date_filter", items_in=len(all_events)) as span:
+        batch = EventBatch.from_events(all_events)
+        batch = batch.select(batch.date_window_mask(start=datetime.now().date()))
+        span.set(items_out=len(batch))
+
+    # --- SECTOR FILTER ---
+    # One scrape serves every subscription: a single pass assigns each event to the
+    # sectors whose keyword/venue/source rules it matches (SECTORS_FILE, default Brooklyn).
+    sectors = load_sectors()
+    print(f"[Pipeline] Filtering {len(batch)} items for {len(sectors)} sector(s)...")
+    with tracer.span("sector_filter", items_in=len(batch)) as span:
+        rows, sector_rows = compact_assignment(SectorIndex(sectors).assign(batch))
+        batch = batch.select(rows)
+        span.set(items_out=len(batch))
     
-    print(f"[Pipeline] Post-Date-Filter count: {len(future_events)}")
-    all_events = future_events
+    source_counts = batch.source_counts()
+    print(f"[Pipeline] Post-filter count: {len(batch)} {source_counts} "
+          f"{ {name: len(r) for name, r in sector_rows.items()} }")
 
-    # --- MEMORY & CALENDAR INTEGRATION ---
-    print("[Pipeline] Initializing Memory and Calendar...")
-    try:
-        memory = EventMemory()
-        calendar = CalendarConnector()
-        
-        new_event_count = 0
-        current_run_hash_ids = set()
-
-        for event in all_events:
-            # Generate ID to track what we see in this run
-            event_hash = memory._generate_id(event)
-            current_run_hash_ids.add(event_hash)
-
-            if memory.is_new(event):
-                event.is_new = True
-                new_event_count += 1
-                google_id = None
-                if os.getenv("CALENDAR_ENABLED", "true").lower() == "true":
-                     google_id = calendar.add_event(event)
-                memory.mark_processed(event, google_event_id=google_id)
-        
-        # --- SYNC: Remove events that are no longer in the report ---
-        print("[Pipeline] Syncing: Checking for cancelled/removed events...")
-        known_ids = set(memory.get_all_ids())
-        
-        # Determine IDs that are in memory but NOT in the current run
-        # Note: We only remove if we are "source of truth". 
-        # For safety, maybe we should only remove "future" events? 
-        # For now, simplistic approach: if it's not in the run, we remove it.
-        # Ensure we don't wipe historical data?
-        # Given this is a weekly "upcoming" report, if it's not in the report, it shouldn't be on the calendar (or is past).
-        
-        missing_ids = known_ids - current_run_hash_ids
-        deleted_count = 0
-        
-        for missing_hash in missing_ids:
-            google_id = memory.get_google_id(missing_hash)
-            if google_id and os.getenv("CALENDAR_ENABLED", "true").lower() == "true":
-                calendar.delete_event(google_id)
-                deleted_count += 1
+    # --- IMPACT SCORING ---
+    # Fills impact_score/attendance_estimate for every event still unscored (collectors
+    # other than Weather do not set them).
+    with tracer.span("scoring", items_in=len(batch)) as span:
+        warm_cache.get("impact_scorer", ImpactScorer).score_batch(batch)
+        all_events = batch.to_events()
+        span.set(items_out=len(all_events))
+    print(f"[Pipeline] Impact summary: {batch.impact_summary()}")
+
+    # --- POLL SCHEDULE ---
+    # Next poll of each collector polled this run, from its upcoming impact, change rate and failures
+    with tracer.span("schedule", items_in=len(polled)):
+        for name in polled:
+            scheduler.plan(name, scheduling_events(name, all_events))
+        scheduler.save()
+    print(f"[Pipeline] Next polls: {scheduler.summary(enabled_collectors())}")
+
+    calendar_enabled = os.getenv("CALENDAR_ENABLED", "true").lower() == "true"
+    calendar = None
+    if calendar_enabled:
+        try:
+            # Credentials and the discovery-built service are reused across warm invocations
+            calendar = warm_cache.get(
+                "calendar",
+                lambda: profiler.load("src.integration.calendar_connector", "CalendarConnector")(),
+            )
+            if calendar.service is None:
+                # Not authenticated: retry on the next invocation instead of caching the failure
+                warm_cache.invalidate("calendar")
+        except Exception as e:
+            print(f"[Pipeline] Calendar setup failed: {e}")
+    traffic_index = FootTrafficIndex()
+    export_base = os.getenv("EXPORT_PATH", "/tmp/extracted_events.csv")
+
+    async def publish(sector, events):
+        """Memory/calendar sync, export, report and notification for one sector."""
+        print(f"[Pipeline] --- Sector '{sector.name}': {len(events)} event(s) ---")
+
+        # --- MEMORY & CALENDAR INTEGRATION ---
+        print("[Pipeline] Initializing Memory and Calendar...")
+        traffic_impact = None
+        new_event_count = deleted_count = 0
+        try:
+            with tracer.span("memory_sync", items_in=len(events), sector=sector.name) as sync_span:
+                # Blocking calls (memory file I/O, Calendar API, rendering) run on the offload pool
+                memory = await offload(EventMemory, sector.memory_file)
+                # Events that started before today can no longer pass the date filter: move them to
+                # the history archive first, so they keep their calendar entry and skip the sync below
+                today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                expired = await offload(memory.evict_before, today)
+                # Once per memory file: entries keyed by the pre-wall-clock event hash move to their current key
+                await offload(memory.migrate_keys, events)
+                current_run_hash_ids = set()
+
+                for event in events:
+                    if event.source in reused_sources and not memory.is_new(event):
+                        # Already tracked and on this sector's calendar from the run that cached it;
+                        # cached events this sector has not seen yet (new sector, reset memory) are replayed
+                        continue
+                    # Generate ID to track what we see in this run (hashed once, reused by is_new/mark_processed)
+                    event_hash = memory._generate_id(event)
+                    current_run_hash_ids.add(event_hash)
+                    # Only touches buckets when the event is new or its time/score changed
+                    traffic_index.upsert_event(sector.index_key(event_hash), event, sector=sector.name)
+
+                    if memory.is_new(event):
+                        event.is_new = True
+                        new_event_count += 1
+                        google_id = None
+                        if calendar is not None:
+                            with tracer.span("calendar", op="add", sector=sector.name):
+                                google_id = await offload(calendar.add_event, event, calendar_id=sector.calendar_id)
+                        await offload(memory.mark_processed, event, google_event_id=google_id)
+                    else:
+                        # Entries migrated from the JSON memory have no start time to expire by yet
+                        memory.fill_details(event)
+            
+                # --- SYNC: Remove events that are no longer in the report ---
+                print("[Pipeline] Syncing: Checking for cancelled/removed events...")
+                known_ids = set(memory.get_all_ids())
+            
+                # Determine IDs that are in memory but NOT in the current run
+                # Given this is a weekly "upcoming" report, if it's not in the report, it shouldn't be on the calendar (or is past).
+                missing_ids = known_ids - current_run_hash_ids
             
-            # Remove from memory regardless of calendar status so we don't track it forever
-            memory.remove_event(missing_hash)
+                for missing_hash in missing_ids:
+                    # Keep events of failed/skipped sources (and untagged legacy entries while any source is protected)
+                    source = memory.get_source(missing_hash)
+                    if protected_sources and (source is None or source in protected_sources):
+                        continue
+                    google_id = memory.get_google_id(missing_hash)
+                    if google_id and calendar is not None:
+                        with tracer.span("calendar", op="delete", sector=sector.name):
+                            await offload(calendar.delete_event, google_id, calendar_id=sector.calendar_id)
+                        deleted_count += 1
+                
+                    # Remove from memory regardless of calendar status so we don't track it forever (kept in the archive)
+                    await offload(memory.remove_event, missing_hash)
+                    traffic_index.remove(sector.index_key(missing_hash))
 
-        print(f"[Pipeline] New events: {new_event_count}, Removed/Synced events: {deleted_count}")
+                # Fold this run's journal into the sorted memory file once it has grown enough
+                await offload(memory.compact_if_needed)
+                sync_span.set(items_out=new_event_count)
+                print(f"[Pipeline] New events: {new_event_count}, Removed/Synced events: {deleted_count}, "
+                      f"Archived past events: {expired}"
+                      + (f", Protected sources: {sorted(protected_sources)}" if protected_sources else ""))
+
+            traffic_impact = traffic_index.day_summary(sector=sector.name)
+            print(f"[Pipeline] Foot traffic impact today: {traffic_impact}")
+            
+        except Exception as e:
+            print(f"[Pipeline] Memory/Calendar integration failed: {e}")
+
+        # 2. Export (streamed row by row; format from the EXPORT_PATH extension: csv, csv.gz, jsonl[.gz], parquet)
+        csv_file = sector.export_path(export_base)
+        try:
+            with tracer.span("export", items_in=len(events), sector=sector.name) as span:
+                rows = await offload(export_events, events, csv_file, schema=parse_schema(os.getenv("EXPORT_COLUMNS")))
+                span.set(items_out=rows, bytes=os.path.getsize(csv_file))
+            print(f"[Pipeline] Export generated at {csv_file} ({rows} rows)")
+        except Exception as e:
+            print(f"[Pipeline] Export generation failed: {e}")
         
-    except Exception as e:
-        print(f"[Pipeline] Memory/Calendar integration failed: {e}")
+        # 3. Report & Notification
+        try:
+            print("[Pipeline] Rendering report...")
+            with tracer.span("render", items_in=len(events), sector=sector.name) as span:
+                report_html = await offload(ReportGenerator.generate_html_report, events, traffic_impact=traffic_impact)
+                span.set(bytes=len(report_html.encode()))
+            if active_cassette() is not None:
+                active_cassette().verify(f"report {sector.name}", report_html.encode())
+            
+            notify = os.getenv("NOTIFICATIONS_ENABLED", "false").lower() == "true"
+            if notify and due is not None and not (new_event_count or deleted_count):
+                # Scheduled partial runs only email when the calendar actually changed
+                print("[Pipeline] Scheduled run with no new/removed events: notification skipped.")
+                notify = False
+            if notify:
+                if sector.recipients:
+                    print(f"[Pipeline] Sending to {len(sector.recipients)} recipient(s)...")
+                    notifier = Notifier()
+                    with tracer.span("send", items_in=len(sector.recipients), sector=sector.name) as span:
+                        results = await notifier.send_batch(
+                            recipients=sector.recipients,
+                            subject=sector.subject.format(date=datetime.now().strftime('%Y-%m-%d')),
+                            html_content=report_html,
+                            attachment_path=csv_file
+                        )
+                        span.set(items_out=sum(r.success for r in results))
+                    for result in results:
+                        print(f"[Pipeline] {result.recipient}: {'SENT' if result.success else 'SEND_FAILED'} (attempts: {result.attempts})")
+                    print(f"[Pipeline] Final Status: {'SENT' if all(r.success for r in results) else 'SEND_FAILED'}")
+                else:
+                    print(f"[Pipeline] Error: No recipients for sector '{sector.name}' (STAKEHOLDER_EMAILS/STAKEHOLDER_EMAIL or SECTORS_FILE).")
+        except Exception as e:
+            print(f"[Pipeline] Notification module failed: {e}")
+        return traffic_impact
 
-    # 2. Export CSV
-    csv_file = "/tmp/extracted_events.csv"
+    sector_impacts = {}
+    for sector in sectors:
+        rows = sector_rows[sector.name]
+        # Events shared by several sectors are copied so each sector's is_new flag stays its own
+        events = all_events if len(sectors) == 1 else [all_events[i].model_copy() for i in rows]
+        sector_impacts[sector.name] = await publish(sector, events)
     try:
-        with open(csv_file, mode='w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Source", "Title", "Date", "Venue"])
-            for event in all_events:
-                dt = event.start_time.strftime("%Y-%m-%d") if hasattr(event.start_time, "strftime") else str(event.start_time)
-                writer.writerow([event.source, event.title, dt, event.venue])
-        print(f"[Pipeline] CSV generated at {csv_file}")
+        with tracer.span("traffic_index"):
+            traffic_index.prune()
+            traffic_index.save()
     except Exception as e:
-        print(f"[Pipeline] CSV generation failed: {e}")
-    
-    # 3. Report & Notification
-    try:
-        from src.reporting.report_generator import ReportGenerator
-        from src.reporting.notifier import Notifier
-        
-        print("[Pipeline] Rendering report...")
-        report_html = ReportGenerator.generate_html_report(all_events)
-        
-        if os.getenv("NOTIFICATIONS_ENABLED", "false").lower() == "true":
-            recipient = os.getenv("STAKEHOLDER_EMAIL")
-            if recipient:
-                print(f"[Pipeline] Sending to {recipient}...")
-                notifier = Notifier()
-                success = await notifier.send_email(
-                    recipient=recipient,
-                    subject=f"Brooklyn Event Summary (696 Flatbush) - {datetime.now().strftime('%Y-%m-%d')}",
-                    html_content=report_html,
-                    attachment_path=csv_file
-                )
-                print(f"[Pipeline] Final Status: {'SENT' if success else 'SEND_FAILED'}")
-            else:
-                print("[Pipeline] Error: No STAKEHOLDER_EMAIL set.")
-    except Exception as e:
-        print(f"[Pipeline] Notification module failed: {e}")
+        print(f"[Pipeline] Traffic index save failed: {e}")
+    traffic_impact = sector_impacts.get(sectors[0].name)
     
+    # 4. Snapshot: persist the last good run so HTTP requests can be served without scraping
+    if total > 0:
+        try:
+            snapshot_store = warm_cache.get("snapshot_store", SnapshotStore)
+            with tracer.span("snapshot", items_in=len(all_events)) as span:
+                await offload(snapshot_store.save, all_events, {
+                    "version": VERSION,
+                    "run_id": tracer.run_id,
+                    "started_at": started_at.isoformat(),
+                    "duration_seconds": round((datetime.now() - started_at).total_seconds(), 2),
+                    "source_counts": source_counts,
+                    "traffic_impact": traffic_impact,
+                    "sectors": {
+                        sector.name: {"events": len(sector_rows[sector.name]), "traffic_impact": sector_impacts.get(sector.name)}
+                        for sector in sectors
+                    },
+                })
+                span.set(bytes=os.path.getsize(snapshot_store.storage_file))
+            print("[Pipeline] Snapshot saved.")
+        except Exception as e:
+            print(f"[Pipeline] Snapshot save failed: {e}")
+    else:
+        print("[Pipeline] Keeping previous snapshot (no events collected).")
+
     print("=== PIPELINE END ===")
     return all_events
 
+_loops = threading.local()
+
+
+def _get_event_loop():
+    """One event loop per worker thread, kept open across warm invocations."""
+    loop = getattr(_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _loops.loop = loop
+    return loop
+
+
+def _run_pipeline_sync(due: Optional[List[str]] = None):
+    return _get_event_loop().run_until_complete(run_ingestion_pipeline(due))
+
+
+def _run_pipeline_background():
+    """Refresh on a SingleFlight thread: a fresh loop that is closed afterwards (threads are not reused)."""
+    return asyncio.run(run_ingestion_pipeline())
+
+
+_refresh = SingleFlight()
+
+
 @functions_framework.http
 def cloud_function_entry(request):
-    """Secure HTTP Trigger."""
+    """
+    Secure HTTP Trigger (stale-while-revalidate).
+
+    Answers from the last good snapshot immediately and starts a single
+    background refresh when it is older than SNAPSHOT_TTL_SECONDS. The
+    platform may throttle CPU once the response is sent, so that refresh can
+    stall; a snapshot older than SNAPSHOT_MAX_STALE_SECONDS is therefore
+    refreshed inline before answering.
+    `?mode=sync` runs the pipeline inline (e.g. for Cloud Scheduler),
+    `?mode=scheduled` runs only the collectors whose adaptive poll time has
+    come (point a frequent trigger at it), `?format=html` returns the
+    rendered report (`&sector=<name>` for one subscription sector) and
+    `?format=metrics` the stage metrics of this instance's last run.
+    """
+    profiler.begin_invocation()
     try:
-        # Avoid async issues by creating a fresh event loop if needed
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        events = loop.run_until_complete(run_ingestion_pipeline())
-        loop.close()
-        return f"SUCCESS: {len(events)} events processed (v{VERSION})", 200
+        args = getattr(request, "args", None) or {}
+        store = warm_cache.get("snapshot_store", profiler.load("src.utils.snapshot", "SnapshotStore"))
+
+        if args.get("mode") == "sync":
+            events = _refresh.run(_run_pipeline_sync)
+            return f"SUCCESS: {len(events)} events processed (v{VERSION})", 200
+
+        if args.get("mode") == "scheduled":
+            scheduler = profiler.load("src.scheduling.poll_scheduler", "PollScheduler")()
+            due = scheduler.due(enabled_collectors())
+            if not due:
+                return f"SUCCESS: no collectors due (next poll {scheduler.next_due(enabled_collectors())}) (v{VERSION})", 200
+            events = _refresh.run(lambda: _run_pipeline_sync(due))
+            return f"SUCCESS: polled {', '.join(due)}; {len(events)} events processed (v{VERSION})", 200
+
+        if args.get("format") == "metrics":
+            if Tracer.last is None:
+                return f"ERROR: No pipeline run on this instance yet (v{VERSION})", 404
+            return Tracer.last.prometheus_text(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+        snapshot = store.load()
+        if snapshot is None:
+            # Cold instance with no snapshot yet: wait for the one in-flight run (or start it)
+            _refresh.run(lambda: store.load() or _run_pipeline_sync())
+            snapshot = store.load()
+            if snapshot is None:
+                return f"ERROR: No snapshot available yet (v{VERSION})", 503
+
+        if store.is_expired(snapshot):
+            # Background refreshes have not landed (e.g. CPU throttled after responses): refresh inline
+            print(f"[Pipeline] Snapshot is {snapshot.age():.0f}s old; refreshing before answering.")
+            def _refresh_if_expired():
+                # Another request may have refreshed it while this one waited for the lock
+                if store.is_expired(store.load() or snapshot):
+                    _run_pipeline_sync()
+
+            _refresh.run(_refresh_if_expired)
+            snapshot = store.load() or snapshot
+
+        refreshing = store.is_stale(snapshot) and _refresh.trigger(_run_pipeline_background)
+
+        if args.get("format") == "html":
+            ReportGenerator = profiler.load("src.reporting.report_generator", "ReportGenerator")
+            events, traffic_impact = snapshot.events, snapshot.metadata.get("traffic_impact")
+            if args.get("sector"):
+                sectors = {s.name: s for s in profiler.load("src.subscriptions.sectors", "load_sectors")()}
+                sector = sectors.get(args["sector"])
+                if sector is None:
+                    return f"ERROR: Unknown sector {args['sector']!r} (v{VERSION})", 404
+                SectorIndex = profiler.load("src.subscriptions.sectors", "SectorIndex")
+                EventBatch = profiler.load("src.models.batch", "EventBatch")
+                rows = SectorIndex([sector]).assign(EventBatch.from_events(events))[sector.name]
+                events = [events[i] for i in rows]
+                traffic_impact = snapshot.metadata.get("sectors", {}).get(sector.name, {}).get("traffic_impact")
+            html = ReportGenerator.generate_html_report(events, traffic_impact=traffic_impact)
+            return html, 200, {"Content-Type": "text/html; charset=utf-8"}
+
+        status = ", refresh started" if refreshing else (", refresh in progress" if _refresh.in_flight else "")
+        return f"SUCCESS: {len(snapshot.events)} events served from snapshot (age {snapshot.age():.0f}s{status}) (v{VERSION})", 200
     except Exception as e:
         print(f"[FATAL] Entry point crash: {e}")
         return f"ERROR: See logs. {e}", 500
+    finally:
+        profiler.log_report()
+
+@functions_framework.http
+def query_api(request):
+    """Read-only /v1 query API (events, alerts, impact) served from the snapshot; never scrapes."""
+    service = warm_cache.get(
+        "query_service",
+        lambda: profiler.load("src.api.query_service", "QueryService")(
+            warm_cache.get("snapshot_store", profiler.load("src.utils.snapshot", "SnapshotStore"))
+        ),
+    )
+    return service.handle(request)
+
+# Settings that change what a run produces; recorded with a cassette and restored on replay
+CASSETTE_ENV = (
+    "COLLECTORS_ENABLED", "NOTIFICATIONS_ENABLED", "CALENDAR_ENABLED", "GOOGLE_CALENDAR_ID",
+    "CALENDAR_REMINDER_MINUTES", "STAKEHOLDER_EMAIL", "STAKEHOLDER_EMAILS", "SENDER_EMAIL",
+    "EXPORT_PATH", "EXPORT_COLUMNS", "BREAKER_FAILURE_THRESHOLD", "BREAKER_RESET_HOURS",
+    "POLL_MIN_HOURS", "POLL_MAX_HOURS", "POLL_RETRY_HOURS", "POLL_LOOKAHEAD_DAYS", "POLL_HIGH_IMPACT",
+)
+
+
+def run_with_cassette(directory: str, mode: str):
+    """
+    `--record DIR`: normal run that also stores every network exchange, the
+    starting state files and the run's outputs in DIR.
+    `--replay DIR`: offline re-run from DIR in a scratch working directory with
+    the clock frozen at recording time; outputs are checked against the recording.
+    """
+    cassette = profiler.timed_import("src.utils.cassette")
+    directory = os.path.abspath(directory)
+    # Recorded exchanges live in this process: collectors must not move to workers
+    os.environ["COLLECTOR_ISOLATION"] = "thread"
+    os.environ["COLLECTOR_DISPATCH"] = "local"
+
+    tape = cassette.Cassette(directory, mode)
+    if mode == cassette.RECORD:
+        tape.snapshot_state("data", CASSETTE_ENV, files={"sectors.json": os.getenv("SECTORS_FILE")})
+    else:
+        workdir = tempfile.mkdtemp(prefix="event-scout-replay-")
+        files = tape.restore_state(workdir, CASSETTE_ENV + ("SECTORS_FILE",))
+        if "sectors.json" in files:
+            os.environ["SECTORS_FILE"] = files["sectors.json"]
+        os.chdir(workdir)
+        cassette.freeze_clock(tape.recorded_at)
+        print(f"[Cassette] Replaying {directory} (recorded {tape.recorded_at.isoformat()}) in {workdir}")
+    cassette.activate(tape)
+    try:
+        events = _get_event_loop().run_until_complete(run_ingestion_pipeline())
+    finally:
+        tape.save()
+        cassette.activate(None)
+    if mode == cassette.REPLAY:
+        print(f"[Cassette] Replay finished: {len(events)} events, {tape.mismatches} output mismatch(es).")
+    return events
+
+
+def simulate_schedule(days: float):
+    """Offline dry run of the adaptive schedule over the last snapshot's events (nothing is scraped)."""
+    simulate = profiler.load("src.scheduling.runner", "simulate")
+    snapshot = profiler.load("src.utils.snapshot", "SnapshotStore")().load()
+    events = snapshot.events if snapshot else []
+    print(f"[Scheduler] Simulating {days:g} day(s) over {len(events)} snapshot event(s)...")
+    polls = simulate(enabled_collectors(), events, days=days, events_for=scheduling_events)
+    for at, name, reason in polls:
+        print(f"  {at:%Y-%m-%d %H:%M}  {name:<13} {reason}")
+    print(f"[Scheduler] {len(polls)} poll(s): " + ", ".join(
+        f"{name}={sum(1 for _, n, _ in polls if n == name)}" for name in enabled_collectors()))
+
+
+def reparse_payloads(since: Optional[datetime], until: Optional[datetime], output: str) -> int:
+    """
+    Runs the current parsers of the enabled collectors over the raw payloads in
+    the PayloadStore (nothing is fetched) and exports the distinct events found.
+    """
+    store = profiler.load("src.utils.payload_store", "PayloadStore").from_env()
+    if store is None:
+        print("[Reparse] PAYLOAD_STORE is disabled.")
+        return 0
+    event_digest = profiler.load("src.utils.memory", "event_digest")
+    EventExporter = profiler.load("src.reporting.exporter", "EventExporter")
+    seen = set()
+    with EventExporter(output) as exporter:
+        for name in enabled_collectors():
+            spec = COLLECTORS[name]
+            collector = profiler.load(spec["module"], spec["cls"])()
+            if not hasattr(collector, "parse_payload"):
+                continue
+            captures = parsed = 0
+            for capture in store.captures(spec["source"], since, until):
+                captures += 1
+                try:
+                    body = store.get(capture["digest"]).decode("utf-8")
+                    events = collector.parse_payload(capture["kind"], body, capture["url"],
+                                                     datetime.fromisoformat(capture["fetched_at"]))
+                except Exception as e:
+                    print(f"[Reparse] {name}: payload {capture['digest'][:12]} failed: {e}")
+                    continue
+                for event in events:
+                    parsed += 1
+                    digest = event_digest(event)
+                    if digest not in seen:
+                        seen.add(digest)
+                        exporter.write(event)
+            print(f"[Reparse] {name}: {captures} payload(s), {parsed} event(s) parsed.")
+    print(f"[Reparse] {len(seen)} distinct event(s) written to {output}")
+    return len(seen)
+
 
 if __name__ == "__main__":
-    # Local execution - mimics Cloud Function behavior
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(run_ingestion_pipeline())
+    parser = argparse.ArgumentParser(description="Brooklyn Event Scout pipeline")
+    parser.add_argument("--schedule", action="store_true",
+                        help="run locally on the adaptive poll schedule instead of once")
+    parser.add_argument("--simulate-schedule", type=float, metavar="DAYS",
+                        help="print the poll plan for the next DAYS without scraping")
+    parser.add_argument("--worker", action="store_true",
+                        help="consume scrape jobs from the work queue (COLLECTOR_DISPATCH=queue)")
+    parser.add_argument("--once", action="store_true",
+                        help="with --worker: exit when no job is available")
+    cassette_mode = parser.add_mutually_exclusive_group()
+    cassette_mode.add_argument("--record", metavar="DIR",
+                               help="run once, recording all network traffic and state to DIR")
+    cassette_mode.add_argument("--replay", metavar="DIR",
+                               help="re-run a recorded run from DIR fully offline")
+    parser.add_argument("--reparse", metavar="OUTPUT", nargs="?", const="data/reparsed_events.jsonl",
+                        help="re-run the parsers over stored raw payloads (no network) and export the events")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="with --reparse: payloads fetched from this date")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="with --reparse: payloads fetched before this date")
+    cli = parser.parse_args()
+
+    if cli.record or cli.replay:
+        profiler.begin_invocation()
+        run_with_cassette(cli.record or cli.replay, "record" if cli.record else "replay")
+        profiler.log_report()
+    elif cli.reparse:
+        reparse_payloads(cli.since, cli.until, cli.reparse)
+    elif cli.worker:
+        QueueWorker = profiler.load("src.workqueue.worker", "QueueWorker")
+        _get_event_loop().run_until_complete(QueueWorker(COLLECTORS).run(stop_when_idle=cli.once))
+    elif cli.simulate_schedule:
+        simulate_schedule(cli.simulate_schedule)
+    elif cli.schedule:
+        LocalRunner = profiler.load("src.scheduling.runner", "LocalRunner")
+        LocalRunner(enabled_collectors(), _run_pipeline_sync).run()
+    else:
+        # Local execution - mimics Cloud Function behavior
+        profiler.begin_invocation()
+        _get_event_loop().run_until_complete(run_ingestion_pipeline())
+        profiler.log_report()
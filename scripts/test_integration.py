@@ -30,6 +30,7 @@ async def test_integration():
     
     # 2. Initialize Components
     memory = EventMemory(storage_file=test_memory_file)
+    memory.clear()  # Binary file and journal left by an earlier run
     calendar = MockCalendarConnector()
     
     # 3. Create Dummy Events
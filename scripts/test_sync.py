@@ -39,6 +39,7 @@ async def test_sync_logic():
         os.remove(test_memory_file)
     
     memory = EventMemory(storage_file=test_memory_file)
+    memory.clear()  # Binary file and journal left by an earlier run
     calendar = MockCalendarConnector()
     
     # 1. Run 1: Two events
@@ -65,8 +66,8 @@ async def test_sync_logic():
             calendar.delete_event(gid)
         memory.remove_event(missing_hash)
         
-    print(f"Memory size: {len(memory.event_map)}")
-    if len(memory.event_map) != 2:
+    print(f"Memory size: {len(memory)}")
+    if len(memory) != 2:
         print("FAIL: Expected 2 events in memory.")
         return
 
@@ -97,8 +98,8 @@ async def test_sync_logic():
             calendar.delete_event(gid)
         memory.remove_event(missing_hash)
 
-    print(f"Memory size: {len(memory.event_map)}") # Should be A and C
-    if len(memory.event_map) != 2:
+    print(f"Memory size: {len(memory)}") # Should be A and C
+    if len(memory) != 2:
         print("FAIL: Expected 2 events in memory (A and C).")
         return
         
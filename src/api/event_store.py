@@ -0,0 +1,127 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.models.event import Event
+from src.utils.normalization import to_local_naive
+
+# NWS severities mapped onto the API's low|med|high scale.
+SEVERITY_LEVELS = {"extreme": "high", "severe": "high", "moderate": "med", "minor": "low", "unknown": "low"}
+
+
+def _norm(value: str) -> str:
+    """Index key for free-text filters: 'Prospect Park' and 'ProspectPark' match."""
+    return "".join(value.lower().split())
+
+
+def is_alert(event: Event) -> bool:
+    return "Weather" in event.source
+
+
+def alert_expiry(event: Event) -> Optional[datetime]:
+    """When an alert stops applying (NYC wall time): its end time, else the NWS `expires`; None if unknown."""
+    if event.end_time is not None:
+        return to_local_naive(event.end_time)
+    raw = (event.raw_data or {}).get("expires")
+    if not raw:
+        return None
+    try:
+        return to_local_naive(datetime.fromisoformat(raw[:-1] + "+00:00" if raw.endswith("Z") else raw))
+    except ValueError:
+        return None
+
+
+def alert_severity(event: Event) -> str:
+    raw = ((event.raw_data or {}).get("severity") or "").lower()
+    if raw in SEVERITY_LEVELS:
+        return SEVERITY_LEVELS[raw]
+    return "high" if (event.impact_score or 0) >= 4 else "med"
+
+
+class EventStore:
+    """
+    Read-only, in-memory indexed view over a snapshot's events.
+
+    Events are held in start-time order, so a position doubles as the rank in
+    the sorted start_time index. Source/venue hash indexes and the impact bucket
+    index store sorted position lists, which lets a time-window + filter query
+    bisect into the candidate list instead of scanning every event.
+    """
+
+    def __init__(self, events: Iterable[Event]):
+        pairs = sorted(((to_local_naive(e.start_time), e) for e in events), key=lambda p: p[0])
+        self.start_keys: List[datetime] = [k for k, _ in pairs]
+        self.events: List[Event] = [e for _, e in pairs]
+        self.by_source: Dict[str, List[int]] = defaultdict(list)
+        self.by_venue: Dict[str, List[int]] = defaultdict(list)
+        self.by_impact: Dict[int, List[int]] = defaultdict(list)
+        self.alerts: List[int] = []
+        for pos, event in enumerate(self.events):
+            self.by_source[_norm(event.source)].append(pos)
+            self.by_venue[_norm(event.venue)].append(pos)
+            self.by_impact[event.impact_score or 0].append(pos)
+            if is_alert(event):
+                self.alerts.append(pos)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def _window(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+        lo = bisect_left(self.start_keys, start) if start else 0
+        hi = bisect_right(self.start_keys, end) if end else len(self.start_keys)
+        return lo, hi
+
+    @staticmethod
+    def _clip(positions: List[int], lo: int, hi: int) -> List[int]:
+        """Slice of a sorted position list falling inside [lo, hi)."""
+        return positions[bisect_left(positions, lo):bisect_left(positions, hi)]
+
+    def _venue_positions(self, venue: str) -> List[int]:
+        """Positions whose source or venue matches `venue` (exact key first, substring otherwise)."""
+        key = _norm(venue)
+        lists = [self.by_source[key]] if key in self.by_source else []
+        if key in self.by_venue:
+            lists.append(self.by_venue[key])
+        if not lists:
+            # Substring match is done per distinct key, not per event
+            lists = [p for k, p in self.by_source.items() if key in k] + \
+                    [p for k, p in self.by_venue.items() if key in k]
+        return sorted(set(heapq.merge(*lists)))
+
+    def upcoming(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 venue: Optional[str] = None, min_impact: Optional[int] = None,
+                 offset: int = 0, limit: int = 50) -> Tuple[List[Event], int]:
+        """Events in [start, end] matching the filters; returns (page, total matches)."""
+        lo, hi = self._window(start, end)
+        candidates: Optional[List[int]] = None
+        if venue:
+            candidates = self._clip(self._venue_positions(venue), lo, hi)
+        if min_impact:
+            buckets = [self._clip(p, lo, hi) for score, p in self.by_impact.items() if score >= min_impact]
+            impact_positions = list(heapq.merge(*buckets))
+            if candidates is None:
+                candidates = impact_positions
+            else:
+                wanted = set(impact_positions)
+                candidates = [p for p in candidates if p in wanted]
+        if candidates is None:
+            candidates = range(lo, hi)
+        return [self.events[p] for p in candidates[offset:offset + limit]], len(candidates)
+
+    def active_alerts(self, location: Optional[str] = None, severity: Optional[str] = None,
+                      offset: int = 0, limit: int = 50, now: Optional[datetime] = None) -> Tuple[List[Event], int]:
+        """
+        Weather/transit alerts that have not expired by `now` (naive NYC time, default:
+        the current time), filtered by location substring and severity level.
+        """
+        now = now or datetime.now()
+        matches = [self.events[p] for p in self.alerts]
+        matches = [e for e in matches if (expiry := alert_expiry(e)) is None or expiry > now]
+        if location:
+            key = _norm(location)
+            matches = [e for e in matches if key in _norm(e.venue) or key in _norm(e.title)]
+        if severity:
+            matches = [e for e in matches if alert_severity(e) == severity.lower()]
+        return matches[offset:offset + limit], len(matches)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from src.api.event_store import EventStore, alert_severity
+from src.models.event import Event
+from src.scoring.traffic_index import FootTrafficIndex
+from src.utils.normalization import NEW_YORK
+from src.utils.snapshot import SnapshotStore
+
+MAX_PAGE_SIZE = 200
+
+
+def _event_json(event: Event) -> dict:
+    return {
+        "title": event.title,
+        "source": event.source,
+        "venue": event.venue,
+        "start_time": event.start_time.isoformat(),
+        "end_time": event.end_time.isoformat() if event.end_time else None,
+        "impact_score": event.impact_score,
+        "attendance_estimate": event.attendance_estimate,
+        "url": (event.raw_data or {}).get("url"),
+    }
+
+
+def _alert_json(event: Event) -> dict:
+    return {
+        "source": event.source,
+        "headline": event.title,
+        "description": event.description,
+        "area": event.venue,
+        "severity": alert_severity(event),
+        "impact_score": event.impact_score,
+        "start_time": event.start_time.isoformat(),
+    }
+
+
+class QueryService:
+    """
+    Read-only `/v1` query API over the last pipeline snapshot.
+
+    Never triggers a scrape: the EventStore is rebuilt only when a new snapshot
+    appears. Each route reads the clock at a fixed granularity (the minute for
+    time windows, the day for /v1/impact/today), and the ETag hashes the
+    snapshot, route, query arguments and that time bucket, so a client sending
+    a matching If-None-Match gets a 304 only when the body would be identical.
+    """
+
+    def __init__(self, snapshot_store: Optional[SnapshotStore] = None, index_file: str = "data/impact_index.json"):
+        self.snapshot_store = snapshot_store or SnapshotStore()
+        self.index_file = index_file
+        self._version: Optional[float] = None
+        self._store: Optional[EventStore] = None
+        self._traffic_index: Optional[FootTrafficIndex] = None
+
+    def _refresh(self) -> bool:
+        snapshot = self.snapshot_store.load()
+        if snapshot is None:
+            return False
+        if snapshot.created_at != self._version:
+            self._store = EventStore(snapshot.events)
+            self._traffic_index = FootTrafficIndex(self.index_file)
+            self._version = snapshot.created_at
+        return True
+
+    def etag(self, route: str, args, bucket: datetime) -> str:
+        """Weak ETag for one response: snapshot version, route, sorted arguments and time bucket."""
+        pairs = sorted(args.items(multi=True)) if hasattr(args, "getlist") else sorted(args.items())
+        key = json.dumps([f"{self._version:.6f}", route, pairs, bucket.isoformat()])
+        return f'W/"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+    @staticmethod
+    def _bucket(route: str) -> datetime:
+        """The current NYC wall time at the granularity `route` depends on."""
+        now = datetime.now(NEW_YORK).replace(tzinfo=None)
+        if QueryService.BUCKETS[route] == "day":
+            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return now.replace(second=0, microsecond=0)
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+    def upcoming_events(self, args, now: datetime) -> dict:
+        days = int(args.get("days", 7))
+        min_impact = int(args["min_impact"]) if args.get("min_impact") else None
+        offset, limit = self._page(args)
+        events, total = self._store.upcoming(
+            start=now, end=now + timedelta(days=days),
+            venue=args.get("venue"), min_impact=min_impact,
+            offset=offset, limit=limit,
+        )
+        return self._paged([_event_json(e) for e in events], total, offset, limit)
+
+    def alerts(self, args, now: datetime) -> dict:
+        offset, limit = self._page(args)
+        alerts, total = self._store.active_alerts(
+            location=args.get("location"), severity=args.get("severity"),
+            offset=offset, limit=limit, now=now,
+        )
+        return self._paged([_alert_json(e) for e in alerts], total, offset, limit)
+
+    def impact_today(self, args, now: datetime) -> dict:
+        return self._traffic_index.day_summary(now.date(), sector=args.get("sector", "brooklyn"))
+
+    @staticmethod
+    def _page(args) -> Tuple[int, int]:
+        offset = max(0, int(args.get("cursor", 0)))
+        limit = min(MAX_PAGE_SIZE, max(1, int(args.get("limit", 50))))
+        return offset, limit
+
+    @staticmethod
+    def _paged(items: list, total: int, offset: int, limit: int) -> dict:
+        next_cursor = offset + limit if offset + limit < total else None
+        return {"items": items, "total": total, "next_cursor": next_cursor}
+
+    # ------------------------------------------------------------------
+    # HTTP dispatch
+    # ------------------------------------------------------------------
+    ROUTES = {
+        "/v1/events/upcoming": "upcoming_events",
+        "/v1/alerts": "alerts",
+        "/v1/impact/today": "impact_today",
+    }
+    # Clock granularity each route's body depends on
+    BUCKETS = {
+        "upcoming_events": "minute",
+        "alerts": "minute",
+        "impact_today": "day",
+    }
+
+    def handle(self, request):
+        """Returns a (body, status, headers) tuple for functions_framework."""
+        headers = {"Content-Type": "application/json"}
+        route = self.ROUTES.get(request.path.rstrip("/"))
+        if route is None:
+            return json.dumps({"error": "not found"}), 404, headers
+        if not self._refresh():
+            return json.dumps({"error": "no snapshot available yet"}), 503, headers
+
+        bucket = self._bucket(route)
+        headers["ETag"] = self.etag(route, request.args, bucket)
+        headers["Cache-Control"] = "no-cache"
+        if request.headers.get("If-None-Match") == headers["ETag"]:
+            return "", 304, headers
+        try:
+            body = getattr(self, route)(request.args, bucket)
+        except (ValueError, TypeError) as e:
+            return json.dumps({"error": f"bad request: {e}"}), 400, headers
+        return json.dumps(body), 200, headers
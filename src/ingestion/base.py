@@ -1,8 +1,84 @@
+import os
 from abc import ABC, abstractmethod
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Union
 from src.models.event import Event
+from src.utils.change_detection import parser_fingerprint, scoped_digest
+from src.utils.loop_watchdog import offload
+from src.utils.payload_store import payload_store
+
+# In-page equivalent of BeautifulSoup's get_text(strip=True), shared by the extraction
+# scripts so in-browser and BeautifulSoup extraction yield the same field values
+STRIPPED_TEXT_JS = """
+const strippedText = (el) => {
+  if (!el) return null;
+  const parts = [];
+  const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+  for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+    const part = node.nodeValue.trim();
+    if (part) parts.push(part);
+  }
+  return parts.join("");
+};
+"""
+
+
+def browser_extraction() -> bool:
+    """
+    True unless BROWSER_EXTRACTION=html. Browser collectors then pull the event
+    fields out of the rendered page with one script and get compact JSON back,
+    instead of serializing the whole page and parsing it with BeautifulSoup.
+    """
+    return os.getenv("BROWSER_EXTRACTION", "script").lower() != "html"
+
 
 class EventCollector(ABC):
+    # Optional SourceDigestStore injected by the pipeline. When the fetched payload's
+    # digest matches the stored one, the collector skips parsing, sets `unchanged`
+    # and returns [] (the pipeline then reuses the source's last-known-good events).
+    digest_store = None
+    source_name: str = ""
+    # Modules besides the collector's own (and its bases') whose code shapes the parsed
+    # events; a change to any of them invalidates the stored payload digests
+    parser_modules = ("src.models.event", "src.utils.normalization")
+
+    def __init__(self):
+        self.unchanged = False
+        self.pending_digest: Optional[str] = None
+        # Raw payload bytes fetched from upstream (reported on the collector's trace span)
+        self.bytes_fetched = 0
+
+    def _payload_unchanged(self, digest: str) -> bool:
+        """Records the payload digest and reports whether it matches the last parsed run (by the same parser)."""
+        digest = scoped_digest(digest, parser_fingerprint(type(self), self.parser_modules))
+        self.pending_digest = digest
+        if self.digest_store is not None and self.digest_store.matches(self.source_name, digest):
+            print(f"[{self.__class__.__name__}] Upstream payload unchanged — skipping parse.")
+            self.unchanged = True
+        return self.unchanged
+
+    def _store_payload(self, kind: str, url: str, body: Union[str, bytes]) -> Optional[str]:
+        """
+        Keeps the raw payload in the PayloadStore for `--reparse`; returns its digest.
+        Blocking: call it from executor threads, and _store_payload_async() on the loop.
+        """
+        store = payload_store()
+        if store is None:
+            return None
+        try:
+            return store.put(self.source_name, kind, url, body)
+        except Exception as e:
+            print(f"[{self.__class__.__name__}] Could not store raw payload: {e}")
+            return None
+
+    async def _store_payload_async(self, kind: str, url: str, body: Union[str, bytes]) -> Optional[str]:
+        """_store_payload() on the offload pool, for collectors running on the event loop."""
+        return await offload(self._store_payload, kind, url, body)
+
+    def parse_payload(self, kind: str, body: str, url: str, fetched_at: datetime) -> List[Event]:
+        """Events from one stored raw payload (`kind` as passed to _store_payload); used by --reparse."""
+        raise NotImplementedError(f"{self.__class__.__name__} cannot re-parse stored payloads")
+
     @abstractmethod
     async def fetch_events(self) -> List[Event]:
         pass
@@ -1,17 +1,19 @@
-import httpx
 from typing import List
 from ..models.event import Alert
-from ..utils.normalization import normalize_iso_format
+from ..utils.normalization import NEW_YORK, dates
+from ..utils.cassette import http_client
 from datetime import datetime
 
 class MTAConnector:
     SUBWAY_JSON = "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/camsys%2Fsubway-alerts.json"
     BUS_JSON = "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/camsys%2Fbus-alerts.json"
+    bytes_fetched = 0
 
     async def fetch_alerts(self, endpoint: str) -> List[Alert]:
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.get(endpoint)
             response.raise_for_status()
+            self.bytes_fetched += len(response.content)
             data = response.json()
             
             alerts = []
@@ -27,8 +29,12 @@ class MTAConnector:
                 
                 # Active periods
                 active_periods = alert_data.get("active_period", [])
-                start_time = datetime.fromtimestamp(active_periods[0].get("start", 0)) if active_periods else datetime.now()
-                end_time = datetime.fromtimestamp(active_periods[0].get("end", 0)) if active_periods and active_periods[0].get("end") else None
+                period = active_periods[0] if active_periods else {}
+                # No start means the alert is in effect now
+                start_time = dates.try_parse(period["start"], "MTA") if period.get("start") else datetime.now(NEW_YORK)
+                if start_time is None:
+                    continue
+                end_time = dates.try_parse(period["end"], "MTA") if period.get("end") else None
 
                 alerts.append(Alert(
                     category="Transit",
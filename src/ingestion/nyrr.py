@@ -1,17 +1,53 @@
 import asyncio
+import hashlib
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
-from playwright.async_api import async_playwright
+import os
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
 from bs4 import BeautifulSoup
 
-from src.ingestion.base import EventCollector
+from src.ingestion.base import STRIPPED_TEXT_JS, EventCollector, browser_extraction
 from src.models.event import Event
+from src.utils.cassette import attach_playwright
+from src.utils.change_detection import digest_json
+from src.utils.feed_endpoints import FeedEndpoints
+from src.utils.normalization import dates, parse_clock
+
+# Keys the event array is looked for under until the feed's layout has been learned
+FEED_KEYS = ("events", "event_lists", "races", "upcoming", "items", "results", "data")
+# Words in the first 2KB of a body that justify decoding it completely
+FEED_KEYWORDS = ("event_name", "race_name", "upcoming", "start_date", "event_lists", "races")
+EVENT_FIELDS = ("event_name", "race_name", "name", "title", "start_date")
+_WS = re.compile(r"[ \t\n\r]*")
+_ISO_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]")
+_decoder = json.JSONDecoder()
+
+# Runs inside the rendered race calendar and returns one record per event container
+# (the fields _container_records() reads with BeautifulSoup)
+EXTRACT_CONTAINERS_JS = "() => {" + STRIPPED_TEXT_JS + """
+  let containers = document.querySelectorAll("div.upcoming-event");
+  if (!containers.length) containers = document.querySelectorAll("article.upcoming-race");
+  return Array.from(containers, (container) => {
+    const article = container.querySelector("article.upcoming-race") || container;
+    const link = article.querySelector("a.learn-more-btn");
+    return {
+      start: container.getAttribute("data-start-date"),
+      location: container.getAttribute("data-location"),
+      title: strippedText(article.querySelector(".upcoming-race-title")),
+      time: strippedText(article.querySelector(".upcoming-race-time")),
+      link: link ? link.getAttribute("href") : null,
+    };
+  });
+}"""
 
 
 class NYRRCollector(EventCollector):
+    source_name = "NYRR"
+
     def __init__(self):
+        super().__init__()
         self.url = "https://www.nyrr.org/run/race-calendar"
 
     async def fetch_events(self) -> List[Event]:
@@ -19,13 +55,41 @@ class NYRRCollector(EventCollector):
         Dual-strategy NYRR scraper:
           1. PRIMARY — Network Interception: capture the Haku API JSON response
              that contains the raw event data.
-          2. FALLBACK — DOM Scraping: parse the fully-rendered HTML using the
-             known CSS selectors (div.upcoming-event, .upcoming-race-title, etc.).
+          2. FALLBACK — DOM Scraping: collect the fields of the known selectors
+             (div.upcoming-event, .upcoming-race-title, etc.) with a script in
+             the page, or from the serialized HTML (BROWSER_EXTRACTION=html).
         """
         events: List[Event] = []
         captured_json: list = []
+        endpoints = FeedEndpoints(os.getenv("FEED_ENDPOINTS_FILE", "data/feed_endpoints.json"))
+        seen_bodies: set = set()
+        served: set = set()
+        # JSON responses passed over because a learned endpoint is expected to serve the feed
+        deferred: list = []
+
+        async def _capture(response):
+            """Reads one response and keeps its event array, if it has one."""
+            body = await response.body()
+            digest = hashlib.sha256(body).hexdigest()
+            if digest in seen_bodies:
+                return  # The widget refetched an identical payload
+            seen_bodies.add(digest)
+            self.bytes_fetched += len(body)
+            url = response.url
+            entry = endpoints.lookup(self.source_name, url)
+            found = self._extract_event_list(body.decode("utf-8", "replace"), (entry["key"],) if entry else None)
+            if found is None:
+                return
+            key, items = found
+            captured_json.append(items)
+            endpoints.learn(self.source_name, url, key)
+            served.add(endpoints.pattern_of(url))
+            await self._store_payload_async("json", url, body)
+            print(f"[{self.__class__.__name__}] Captured {len(items)} feed items from {url[:80]}...")
 
         try:
+            # Imported here so the module stays cheap to load when NYRR is disabled
+            from playwright.async_api import async_playwright
             print(f"[{self.__class__.__name__}] Launching Playwright (network-interception mode)...")
             async with async_playwright() as p:
                 browser = await p.chromium.launch(
@@ -39,28 +103,23 @@ class NYRRCollector(EventCollector):
                         "Chrome/120.0.0.0 Safari/537.36"
                     ),
                 )
+                # Record/replay every browser request when a cassette is active
+                await attach_playwright(context)
                 page = await context.new_page()
 
                 # ---- Strategy 1: Intercept network responses ----
                 async def _on_response(response):
-                    """Capture any JSON that looks like the Haku event feed."""
+                    """Capture the Haku event feed; other JSON bodies are not read."""
                     try:
                         url = response.url
                         ct = response.headers.get("content-type", "")
-                        # The Haku widget fetches event data from various endpoints.
-                        # We look for JSON responses that contain race/event data.
-                        if "json" in ct or url.endswith(".json"):
-                            body = await response.text()
-                            if any(kw in body[:2000] for kw in [
-                                "event_name", "race_name", "upcoming",
-                                "start_date", "event_lists", "races"
-                            ]):
-                                try:
-                                    data = json.loads(body)
-                                    captured_json.append(data)
-                                    print(f"[{self.__class__.__name__}] Captured JSON from {url[:80]}...")
-                                except json.JSONDecodeError:
-                                    pass
+                        if not ("json" in ct or url.endswith(".json")) or endpoints.is_noise(url):
+                            return
+                        # Once the feed's endpoint is known, only responses matching it are read
+                        if endpoints.known(self.source_name) and endpoints.lookup(self.source_name, url) is None:
+                            deferred.append(response)
+                            return
+                        await _capture(response)
                     except Exception:
                         pass  # Some responses may not be readable
 
@@ -80,10 +139,21 @@ class NYRRCollector(EventCollector):
                     # Small extra wait for any trailing XHR
                     await page.wait_for_timeout(3000)
 
+                    if not captured_json and deferred:
+                        # The learned endpoint stayed silent: probe the JSON responses passed over
+                        print(f"[{self.__class__.__name__}] Learned feed endpoint silent — probing {len(deferred)} other JSON response(s).")
+                        for response in deferred:
+                            try:
+                                await _capture(response)
+                            except Exception:
+                                pass
+
                     # ---------------------------------------------------
                     # Try strategy 1 first: parse intercepted JSON
                     # ---------------------------------------------------
                     if captured_json:
+                        if self._payload_unchanged(digest_json(captured_json)):
+                            return []
                         events = self._parse_json_feed(captured_json)
                         if events:
                             print(f"[{self.__class__.__name__}] ✓ Extracted {len(events)} events via JSON interception.")
@@ -93,8 +163,16 @@ class NYRRCollector(EventCollector):
                     # ---------------------------------------------------
                     if not events:
                         print(f"[{self.__class__.__name__}] JSON empty — falling back to DOM scraping.")
-                        content = await page.content()
-                        events = self._parse_html(content)
+                        records = await self._extract_in_page(page) if browser_extraction() else None
+                        if not records:
+                            # Serialize the whole page (also what gets stored when nothing was found)
+                            content = await page.content()
+                            self.bytes_fetched += len(content.encode())
+                            await self._store_payload_async("html", self.url, content)
+                            records = self._container_records(self._select_containers(content))
+                        if self._payload_unchanged(digest_json(records)):
+                            return []
+                        events = self._parse_records(records)
                         if events:
                             print(f"[{self.__class__.__name__}] ✓ Extracted {len(events)} events via DOM scraping.")
 
@@ -102,6 +180,8 @@ class NYRRCollector(EventCollector):
                     print(f"[{self.__class__.__name__}] Playwright page error: {e}")
                 finally:
                     await browser.close()
+                    endpoints.end_run(self.source_name, served)
+                    endpoints.save()
 
         except Exception as e:
             print(f"[{self.__class__.__name__}] Failed to run Playwright: {e}")
@@ -110,15 +190,52 @@ class NYRRCollector(EventCollector):
             print(f"[{self.__class__.__name__}] ✗ No events found from any strategy.")
         return events
 
+    async def _extract_in_page(self, page) -> Optional[list]:
+        """Event container fields collected by a script in the page, or None if it failed."""
+        try:
+            records = await page.evaluate(EXTRACT_CONTAINERS_JS)
+        except Exception as e:
+            print(f"[{self.__class__.__name__}] In-page extraction failed: {e}")
+            return None
+        if records:
+            body = json.dumps(records)
+            self.bytes_fetched += len(body.encode())
+            await self._store_payload_async("dom", self.url, body)
+            print(f"[{self.__class__.__name__}] Extracted {len(records)} event containers in-page.")
+        return records
+
+    def parse_payload(self, kind: str, body: str, url: str, fetched_at: datetime) -> List[Event]:
+        """Re-parses a stored intercepted feed ('json'), in-page extraction ('dom') or rendered page ('html')."""
+        if kind == "json":
+            return self._parse_json_feed([json.loads(body)])
+        if kind == "dom":
+            return self._parse_records(json.loads(body))
+        return self._parse_html(body)
+
     # ------------------------------------------------------------------
     # JSON feed parser (Strategy 1)
     # ------------------------------------------------------------------
+    @staticmethod
+    def _feed_date(raw):
+        """
+        The calendar date of an ISO timestamp ('2026-11-22T00:00:00Z' -> '2026-11-22'),
+        taken before any offset conversion could move it to the previous day.
+        """
+        if isinstance(raw, str) and _ISO_TIMESTAMP.match(raw.strip()):
+            return raw.strip()[:10]
+        return raw
+
     def _parse_json_feed(self, payloads: list) -> List[Event]:
         """Walk through captured JSON payloads and extract Event objects."""
         events: List[Event] = []
         for payload in payloads:
             items = self._find_event_list(payload)
-            for item in items:
+            starts = dates.parse_many(
+                [self._feed_date(item.get("start_date") or item.get("date") or item.get("event_date"))
+                 if isinstance(item, dict) else None for item in items],
+                self.source_name,
+            )
+            for item, start_time in zip(items, starts):
                 try:
                     title = (
                         item.get("event_name")
@@ -126,23 +243,10 @@ class NYRRCollector(EventCollector):
                         or item.get("name")
                         or item.get("title")
                     )
-                    if not title:
+                    if not title or start_time is None:
                         continue
-
-                    # Date
-                    raw_date = (
-                        item.get("start_date")
-                        or item.get("date")
-                        or item.get("event_date")
-                    )
-                    start_time = datetime.now()
-                    if raw_date:
-                        for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%B %d, %Y"):
-                            try:
-                                start_time = datetime.strptime(raw_date[:10], fmt)
-                                break
-                            except ValueError:
-                                continue
+                    # The feed is date-granular: midnight of the feed's calendar date
+                    start_time = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
 
                     # URL
                     url = item.get("url") or item.get("link") or item.get("slug", "")
@@ -171,6 +275,92 @@ class NYRRCollector(EventCollector):
                     print(f"[{self.__class__.__name__}] JSON item parse error: {e}")
         return events
 
+    def _extract_event_list(self, text: str, keys: Optional[tuple] = None) -> Optional[Tuple[Optional[str], list]]:
+        """
+        The event array of a JSON body as (key it sits under, items), or None.
+
+        The body is scanned once for arrays under the learned key in `keys`
+        (default: the usual FEED_KEYS in order, then the root), and only the
+        array found is decoded, so the rest of the body is never decoded. Only
+        when that fails is the whole body decoded, once, and searched.
+        """
+        found = self._decode_keyed_array(text, keys or FEED_KEYS + (None,))
+        if found is not None:
+            return found
+        if not any(kw in text[:2000] for kw in FEED_KEYWORDS):
+            return None
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        items = self._find_event_list(payload)
+        if not items:
+            return None
+        return self._event_list_key(payload, items), items
+
+    @staticmethod
+    def _decode_keyed_array(text: str, keys: tuple) -> Optional[Tuple[Optional[str], list]]:
+        """First array of event-like dicts under `"key": [` for `keys` in order (None: the root array)."""
+        openings = {}
+        named = [key for key in keys if key is not None]
+        if named:
+            pattern = r'"(%s)"\s*:\s*\[' % "|".join(re.escape(key) for key in named)
+            for m in re.finditer(pattern, text):
+                if text[m.start() - 1:m.start()] != "\\":  # Not inside an escaped JSON string
+                    openings.setdefault(m.group(1), []).append(m.end() - 1)
+        for key in keys:
+            if key is None:
+                start = _WS.match(text).end()
+                starts = [start] if text.startswith("[", start) else []
+            else:
+                starts = openings.get(key, ())
+            for start in starts:
+                try:
+                    items = NYRRCollector._decode_array(text, start)
+                except (ValueError, IndexError):
+                    continue
+                if items:
+                    return key, items
+        return None
+
+    @staticmethod
+    def _decode_array(text: str, start: int) -> Optional[list]:
+        """The JSON array opening at text[start], or None as soon as its first element is not an event."""
+        items = []
+        pos = _WS.match(text, start + 1).end()
+        if text[pos] == "]":
+            return None
+        while True:
+            item, pos = _decoder.raw_decode(text, pos)
+            if not items and not NYRRCollector._looks_like_event(item):
+                return None
+            items.append(item)
+            pos = _WS.match(text, pos).end()
+            if text[pos] == "]":
+                return items
+            if text[pos] != ",":
+                raise ValueError(f"expected ',' at {pos}")
+            pos = _WS.match(text, pos + 1).end()
+
+    @staticmethod
+    def _looks_like_event(obj) -> bool:
+        return isinstance(obj, dict) and any(k in obj for k in EVENT_FIELDS)
+
+    @staticmethod
+    def _event_list_key(obj, items, depth=0) -> Optional[str]:
+        """The dict key `items` was found under (None if it is the root)."""
+        if depth > 8:
+            return None
+        children = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else ()
+        for k, value in children:
+            if value is items and isinstance(k, str):
+                return k
+            if isinstance(value, (dict, list)) and value is not items:
+                found = NYRRCollector._event_list_key(value, items, depth + 1)
+                if found is not None:
+                    return found
+        return None
+
     @staticmethod
     def _find_event_list(obj, depth=0):
         """Recursively search a JSON structure for lists of event-like dicts."""
@@ -178,9 +368,7 @@ class NYRRCollector(EventCollector):
             return []
         if isinstance(obj, list):
             # Check if this list contains event-like dicts
-            if obj and isinstance(obj[0], dict) and any(
-                k in obj[0] for k in ("event_name", "race_name", "name", "title", "start_date")
-            ):
+            if obj and NYRRCollector._looks_like_event(obj[0]):
                 return obj
             # Otherwise recurse into list items
             for item in obj:
@@ -199,50 +387,59 @@ class NYRRCollector(EventCollector):
     # ------------------------------------------------------------------
     def _parse_html(self, content: str) -> List[Event]:
         """Parse fully-rendered HTML using the confirmed CSS selectors."""
-        events: List[Event] = []
-        soup = BeautifulSoup(content, "html.parser")
+        return self._parse_records(self._container_records(self._select_containers(content)))
 
+    @staticmethod
+    def _select_containers(content: str) -> list:
+        """Event container elements of the rendered race calendar."""
+        soup = BeautifulSoup(content, "html.parser")
         event_containers = soup.select("div.upcoming-event")
         if not event_containers:
             event_containers = soup.select("article.upcoming-race")
+        return event_containers
 
+    @staticmethod
+    def _container_records(event_containers: list) -> List[dict]:
+        """The fields EXTRACT_CONTAINERS_JS collects in the browser, read from parsed containers."""
+        records = []
         for container in event_containers:
-            start_date_str = container.get("data-start-date")
-            location = container.get("data-location", "New York, NY")
-
             article = container.find("article", class_="upcoming-race") or container
-
             title_el = article.select_one(".upcoming-race-title")
-            title = title_el.get_text(strip=True) if title_el else None
-
+            time_el = article.select_one(".upcoming-race-time")
             link_el = article.select_one("a.learn-more-btn")
-            link = link_el["href"] if link_el else None
+            records.append({
+                "start": container.get("data-start-date"),
+                "location": container.get("data-location"),
+                "title": title_el.get_text(strip=True) if title_el else None,
+                "time": time_el.get_text(strip=True) if time_el else None,
+                "link": link_el.get("href") if link_el else None,
+            })
+        return records
 
-            if title and link:
-                if not link.startswith("http"):
-                    link = "https://www.nyrr.org" + link
+    def _parse_records(self, records: List[dict]) -> List[Event]:
+        """Build Events from container records."""
+        events: List[Event] = []
+        for record in records:
+            title, link = record.get("title"), record.get("link")
+            if not (title and link):
+                continue
+            if not link.startswith("http"):
+                link = "https://www.nyrr.org" + link
 
-                start_time = datetime.now()
-                if start_date_str:
-                    try:
-                        start_time = datetime.strptime(start_date_str, "%Y/%m/%d")
-                        time_el = article.select_one(".upcoming-race-time")
-                        if time_el:
-                            time_str = time_el.get_text(strip=True)
-                            try:
-                                time_obj = datetime.strptime(time_str, "%I:%M %p").time()
-                                start_time = datetime.combine(start_time.date(), time_obj)
-                            except ValueError:
-                                pass
-                    except ValueError as e:
-                        print(f"[NYRRCollector] Date parse error: {e}")
-
-                events.append(Event(
-                    source="NYRR",
-                    title=title,
-                    description="Live scraped via Playwright",
-                    start_time=start_time,
-                    venue=location,
-                    raw_data={"url": link},
-                ))
+            start_time = dates.try_parse(record.get("start"), self.source_name)
+            if start_time is None:
+                continue
+            clock = parse_clock(record.get("time"))
+            if clock is not None:
+                start_time = start_time.replace(hour=clock.hour, minute=clock.minute)
+
+            location = record.get("location")
+            events.append(Event(
+                source="NYRR",
+                title=title,
+                description="Live scraped via Playwright",
+                start_time=start_time,
+                venue="New York, NY" if location is None else location,
+                raw_data={"url": link},
+            ))
         return events
@@ -1,20 +1,64 @@
+import json
 import logging
 import asyncio
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Union
 from bs4 import BeautifulSoup
 
-# Use SeleniumBase for Cloudflare bypass
-try:
-    from seleniumbase import SB
-except ImportError:
-    logging.warning("SeleniumBase not installed. Prospect Park collector will fail.")
-
-from src.ingestion.base import EventCollector
+from src.ingestion.base import STRIPPED_TEXT_JS, EventCollector, browser_extraction
 from src.models.event import Event
+from src.utils import cassette
+from src.utils.change_detection import digest_json
+from src.utils.normalization import dates
+
+CARD_SELECTOR = (
+    ".tribe-events-calendar-list__event, "
+    ".tribe-events-list .type-tribe_events, "
+    ".result-item, "
+    "article.type-tribe_events, "
+    ".tribe-common-g-row"
+)
+FALLBACK_CARD_SELECTOR = "div[class*='event'], article[class*='event']"
+TITLE_SELECTORS = (
+    ".tribe-events-calendar-list__event-title a",
+    "h3 a, h2 a, .tribe-events-list-event-title a",
+    "h3, h4, .title",
+)
+DATE_SELECTOR = (
+    ".tribe-events-calendar-list__event-datetime, "
+    "time[datetime], "
+    ".tribe-event-schedule-details, "
+    ".date"
+)
+
+# Runs in the rendered page (via execute_script) and returns one record per event card
+# with a title (the fields _card_records() reads with BeautifulSoup)
+EXTRACT_CARDS_JS = "return ((selectors) => {" + STRIPPED_TEXT_JS + """
+  let cards = document.querySelectorAll(selectors.cards);
+  if (!cards.length) cards = document.querySelectorAll(selectors.fallback);
+  const records = [];
+  for (const card of cards) {
+    let titleEl = null;
+    for (const selector of selectors.titles) {
+      titleEl = card.querySelector(selector);
+      if (titleEl) break;
+    }
+    if (!titleEl) continue;
+    const dateEl = card.querySelector(selectors.date);
+    records.push({
+      title: strippedText(titleEl),
+      link: titleEl.getAttribute("href"),
+      date: dateEl ? (dateEl.getAttribute("datetime") || strippedText(dateEl)) : null,
+    });
+  }
+  return records;
+})(arguments[0]);"""
 
 class ProspectParkCollector(EventCollector):
+    source_name = "Prospect Park"
+
     def __init__(self):
+        super().__init__()
         # The Alliance events events/calendar page
         self.url = "https://www.prospectpark.org/events/list/"
         self.calendar_url = "https://www.prospectpark.org/calendar/"
@@ -32,134 +76,161 @@ class ProspectParkCollector(EventCollector):
         except Exception as e:
             print(f"[{self.__class__.__name__}] SB execution failed: {e}")
             
-        if not events:
+        if not events and not self.unchanged:
             print(f"[{self.__class__.__name__}] ✗ No events found via SeleniumBase.")
         return events
 
     def _scrape_sync(self) -> List[Event]:
         """Synchronous SeleniumBase logic."""
-        events = []
+        if cassette.replaying():
+            # Offline replay: recorded extractions / page sources stand in for the browser
+            print(f"[{self.__class__.__name__}] Replaying recorded page sources...")
+
+            def replay(url: str, primary: bool) -> Union[list, str]:
+                try:
+                    records = cassette.call("dom", url, None)
+                    if records:
+                        return records
+                except cassette.CassetteMiss:
+                    pass  # Recorded with BROWSER_EXTRACTION=html
+                return cassette.page_source(url, None)
+
+            return self._scrape_pages(replay)
+
+        # Use SeleniumBase for Cloudflare bypass (imported lazily: it is heavy and only needed here)
+        try:
+            from seleniumbase import SB
+        except ImportError:
+            logging.warning("SeleniumBase not installed. Prospect Park collector will fail.")
+            raise
         print(f"[{self.__class__.__name__}] Launching SeleniumBase (UC Mode)...")
         
         # Context Manager: SB(uc=True, headless=True)
         # headless2 is often better for UC mode 
         with SB(uc=True, test=True, headless2=True) as sb: 
-            # Try primary URL
-            try:
-                print(f"[{self.__class__.__name__}] Navigate to {self.url}...")
-                sb.open(self.url)
-                
-                # Check for Cloudflare title
-                if "Just a moment" in sb.get_title():
-                    print(f"[{self.__class__.__name__}] Cloudflare challenge detected. Attempting bypass...")
-                    # UC mode handles some automatically. 
-                    # If specific iframe:
-                    if sb.is_element_visible('iframe[src*="cloudflare"]'):
-                        sb.uc_gui_click_captcha()
-                
+            def load(url: str, primary: bool) -> Union[list, str]:
+                print(f"[{self.__class__.__name__}] Navigate to {url}...")
+                sb.open(url)
+                if primary:
+                    # Check for Cloudflare title
+                    if "Just a moment" in sb.get_title():
+                        print(f"[{self.__class__.__name__}] Cloudflare challenge detected. Attempting bypass...")
+                        # UC mode handles some automatically. 
+                        # If specific iframe:
+                        if sb.is_element_visible('iframe[src*="cloudflare"]'):
+                            sb.uc_gui_click_captcha()
                 sb.sleep(5) # Wait for load
-                
-                # Check for calendar items
-                if not sb.is_element_visible(".tribe-events-calendar-list") and \
-                   not sb.is_element_visible(".result-item"):
-                       pass
+                if browser_extraction():
+                    try:
+                        records = cassette.call("dom", url, lambda: sb.execute_script(EXTRACT_CARDS_JS, {
+                            "cards": CARD_SELECTOR, "fallback": FALLBACK_CARD_SELECTOR,
+                            "titles": list(TITLE_SELECTORS), "date": DATE_SELECTOR,
+                        }))
+                        if records:
+                            return records
+                    except Exception as e:
+                        print(f"[{self.__class__.__name__}] In-page extraction failed: {e}")
+                # Nothing extracted: the page source shows what the browser got (e.g. a challenge page)
+                return cassette.page_source(url, sb.get_page_source)
 
-                # Debug: Save what we actually see
-                sb.save_page_source("pp_debug.html")
+            return self._scrape_pages(load)
 
-                content = sb.get_page_source()
-                parsed = self._parse_html(content, self.url)
+    def _scrape_pages(self, load) -> List[Event]:
+        """
+        Primary list page first, calendar page if it yields nothing.
+        `load(url, primary)` returns the card records extracted in the page, or the page source.
+        """
+        events = []
+        for url, primary in ((self.url, True), (self.calendar_url, False)):
+            if not primary:
+                print(f"[{self.__class__.__name__}] Trying secondary {url}...")
+            try:
+                page = load(url, primary)
+                # What we actually saw, kept for debugging and --reparse
+                if isinstance(page, str):
+                    self.bytes_fetched += len(page.encode())
+                    self._store_payload("html", url, page)
+                    records = self._card_records(self._select_cards(page))
+                else:
+                    records = page
+                    body = json.dumps(records)
+                    self.bytes_fetched += len(body.encode())
+                    self._store_payload("dom", url, body)
+                if records and self._payload_unchanged(digest_json(records)):
+                    return []
+                parsed = self._parse_records(records, url)
                 if parsed:
                     events.extend(parsed)
-                    print(f"[{self.__class__.__name__}] ✓ Extracted {len(parsed)} events from primary URL.")
+                    print(f"[{self.__class__.__name__}] ✓ Extracted {len(parsed)} events from {'primary' if primary else 'calendar'} URL.")
                     return events
-
             except Exception as e:
-                print(f"[{self.__class__.__name__}] Error on {self.url}: {e}")
-
-            # Try secondary URL if empty
-            if not events:
-                try:
-                    print(f"[{self.__class__.__name__}] Trying secondary {self.calendar_url}...")
-                    sb.open(self.calendar_url)
-                    sb.sleep(5)
-                    content = sb.get_page_source()
-                    parsed = self._parse_html(content, self.calendar_url)
-                    if parsed:
-                        events.extend(parsed)
-                        print(f"[{self.__class__.__name__}] ✓ Extracted {len(parsed)} events from calendar URL.")
-                except Exception as e:
-                    print(f"[{self.__class__.__name__}] Error on {self.calendar_url}: {e}")
-
+                print(f"[{self.__class__.__name__}] Error on {url}: {e}")
         return events
 
-    def _parse_html(self, content: str, base_url: str) -> List[Event]:
+    def _parse_html(self, content: str, base_url: str, reference: Optional[datetime] = None) -> List[Event]:
         """Parse HTML content using BeautifulSoup (reused logic)."""
-        events: List[Event] = []
+        return self._parse_records(self._card_records(self._select_cards(content)), base_url, reference)
+
+    def parse_payload(self, kind: str, body: str, url: str, fetched_at: datetime) -> List[Event]:
+        """Re-parses a stored page or in-page extraction ('dom'); year-less dates resolve from the day it was fetched."""
+        reference = fetched_at if fetched_at.tzinfo else fetched_at.replace(tzinfo=dates.tz)
+        if kind == "dom":
+            return self._parse_records(json.loads(body), url, reference)
+        return self._parse_html(body, url, reference)
+
+    @staticmethod
+    def _select_cards(content: str) -> list:
+        """Event card elements of the events list / calendar page."""
         soup = BeautifulSoup(content, "html.parser")
-        
-        cards = soup.select(
-            ".tribe-events-calendar-list__event, "
-            ".tribe-events-list .type-tribe_events, "
-            ".result-item, "
-            "article.type-tribe_events, "
-            ".tribe-common-g-row"
-        )
-        
+        cards = soup.select(CARD_SELECTOR)
         if not cards:
-            cards = soup.select("div[class*='event'], article[class*='event']")
+            cards = soup.select(FALLBACK_CARD_SELECTOR)
+        return cards
 
+    @staticmethod
+    def _card_records(cards: list) -> List[dict]:
+        """The fields EXTRACT_CARDS_JS collects in the browser, read from parsed cards."""
+        records = []
         for card in cards:
-            title_el = (
-                card.select_one(".tribe-events-calendar-list__event-title a")
-                or card.select_one("h3 a, h2 a, .tribe-events-list-event-title a")
-                or card.select_one("h3, h4, .title")
-            )
+            title_el = None
+            for selector in TITLE_SELECTORS:
+                title_el = card.select_one(selector)
+                if title_el:
+                    break
             if not title_el:
                 continue
+            # Date: the machine-readable datetime attribute, else the visible text ('June 6 @ 10:00 am')
+            date_el = card.select_one(DATE_SELECTOR)
+            records.append({
+                "title": title_el.get_text(strip=True),
+                "link": title_el.get("href"),
+                "date": (date_el.get("datetime") or date_el.get_text(strip=True)) if date_el else None,
+            })
+        return records
 
-            title = title_el.get_text(strip=True)
-            link = title_el.get("href", base_url)
+    def _parse_records(self, records: List[dict], base_url: str, reference: Optional[datetime] = None) -> List[Event]:
+        """Build Events from card records."""
+        events: List[Event] = []
+        # Year-less dates ('June 6') resolve to the next such day from `reference` (default: now)
+        reference = reference or datetime.now(dates.tz)
+        for record in records:
+            link = record.get("link")
+            if link is None:
+                link = base_url
             if not link.startswith("http"):
                 link = "https://www.prospectpark.org" + link
 
-            # Date
-            start_time = datetime.now()
-            date_el = card.select_one(
-                ".tribe-events-calendar-list__event-datetime, "
-                "time[datetime], "
-                ".tribe-event-schedule-details, "
-                ".date"
-            )
-            if date_el:
-                dt_attr = date_el.get("datetime")
-                if dt_attr:
-                    try:
-                        start_time = datetime.fromisoformat(dt_attr.replace("Z", "+00:00"))
-                    except:
-                        pass
-                else:
-                    date_text = date_el.get_text(strip=True)
-                    try:
-                        parts = date_text.split()
-                        if len(parts) >= 2:
-                            month = parts[0]
-                            day = parts[1].replace(",", "")
-                            year = datetime.now().year
-                            dt = datetime.strptime(f"{month} {day} {year}", "%B %d %Y")
-                            if dt < datetime.now():
-                                dt = dt.replace(year=year + 1)
-                            start_time = dt
-                    except:
-                        pass
+            start_time = dates.try_parse(record.get("date"), self.source_name, reference)
+            if start_time is None:
+                continue
 
             events.append(Event(
                 source="Prospect Park",
-                title=title,
+                title=record["title"],
                 description="Live scraped via SeleniumBase",
                 start_time=start_time,
                 venue="Prospect Park, Brooklyn",
                 raw_data={"url": link},
             ))
-            
+
         return events
@@ -1,35 +1,43 @@
-import httpx
 from typing import List
 from ..models.event import Event
-from ..utils.normalization import normalize_iso_format
+from ..utils.normalization import dates
+from ..utils.cassette import http_client
 from datetime import datetime
 
 class WeatherConnector:
     # NYC Zone ID for NWS (e.g., NYZ072 for New York County)
     NWS_ALERTS_API = "https://api.weather.gov/alerts/active?area=NY"
+    bytes_fetched = 0
 
     async def fetch_active_alerts(self) -> List[Event]:
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             headers = {"User-Agent": "Event-Driven-Alerts/1.0 (contact@example.com)"}
             try:
                 response = await client.get(self.NWS_ALERTS_API, headers=headers)
                 response.raise_for_status()
+                self.bytes_fetched += len(response.content)
                 data = response.json()
                 
                 events = []
                 features = data.get("features", [])
                 for feature in features:
                     props = feature.get("properties", {})
-                    
+                    start_time = dates.try_parse(
+                        props.get("effective") or props.get("onset") or props.get("sent"), "NWS Weather"
+                    )
+                    if start_time is None:
+                        continue
+
                     # Convert Weather Alert to Event for reporting compatibility
                     events.append(Event(
                         title=props.get("headline", "Weather Alert"),
                         description=props.get("description", ""),
                         venue=props.get("areaDesc", "NYC Area"),
                         source="NWS Weather",
-                        start_time=normalize_iso_format(props.get("effective")),
+                        start_time=start_time,
                         impact_score=4 if props.get("severity") in ["Extreme", "Severe"] else 3,
-                        raw_data={"severity": props.get("severity")}
+                        # When the alert stops applying; the query API hides it afterwards
+                        raw_data={"severity": props.get("severity"), "expires": props.get("ends") or props.get("expires")}
                     ))
                 return events
             except Exception as e:
@@ -1,12 +1,10 @@
 import os
 import datetime
 import os.path
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.utils import cassette
+
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/calendar.events']
 
@@ -18,10 +16,19 @@ class CalendarConnector:
         self.creds = None
         self.service = None
         self.calendar_id = os.getenv("GOOGLE_CALENDAR_ID", "primary")
-        self._authenticate()
+        # Replayed runs answer from the cassette and never authenticate
+        self.replaying = cassette.replaying()
+        if not self.replaying:
+            self._authenticate()
 
     def _authenticate(self):
         """Authenticates with Google Calendar API using token.json or credentials.json."""
+        # The auth/discovery stack is heavy; load it only when a connector is actually created
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         # The file token.json stores the user's access and refresh tokens, and is
         # created automatically when the authorization flow completes for the first
         # time.
@@ -62,8 +69,12 @@ class CalendarConnector:
                 print(f"[Calendar] Failed to build service: {e}")
                 self.service = None
 
-    def add_event(self, event):
-        """Adds an event to the Google Calendar."""
+    def add_event(self, event, calendar_id: str = None):
+        """Adds an event to the Google Calendar (`calendar_id` overrides GOOGLE_CALENDAR_ID)."""
+        key = f"insert {calendar_id or self.calendar_id} {event.title} {event.start_time.isoformat()}"
+        return cassette.call("calendar", key, lambda: self._add_event(event, calendar_id))
+
+    def _add_event(self, event, calendar_id: str = None):
         if not self.service:
             return False
 
@@ -109,7 +120,7 @@ class CalendarConnector:
                 },
             }
 
-            event_result = self.service.events().insert(calendarId=self.calendar_id, body=event_body).execute()
+            event_result = self.service.events().insert(calendarId=calendar_id or self.calendar_id, body=event_body).execute()
             print(f"[Calendar] Event created: {event_result.get('htmlLink')}")
             return event_result.get('id')
 
@@ -120,13 +131,17 @@ class CalendarConnector:
             print(f"[Calendar] Unexpected error: {e}")
             return None
 
-    def delete_event(self, event_id: str):
-        """Deletes an event from the Google Calendar."""
+    def delete_event(self, event_id: str, calendar_id: str = None):
+        """Deletes an event from the Google Calendar (`calendar_id` overrides GOOGLE_CALENDAR_ID)."""
+        key = f"delete {calendar_id or self.calendar_id} {event_id}"
+        return cassette.call("calendar", key, lambda: self._delete_event(event_id, calendar_id))
+
+    def _delete_event(self, event_id: str, calendar_id: str = None):
         if not self.service or not event_id:
             return False
 
         try:
-            self.service.events().delete(calendarId=self.calendar_id, eventId=event_id).execute()
+            self.service.events().delete(calendarId=calendar_id or self.calendar_id, eventId=event_id).execute()
             print(f"[Calendar] Event deleted: {event_id}")
             return True
         except HttpError as error:
@@ -0,0 +1,195 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.models.event import Event
+
+# Sentinels for "missing" values in the fixed-width numeric columns.
+NO_SCORE = 0
+NO_ATTENDANCE = -1
+NO_OFFSET = np.iinfo(np.int32).min
+NAT_MICROS = np.iinfo(np.int64).min  # int64 view of datetime64 NaT
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _object_column(values: Iterable) -> np.ndarray:
+    """Builds a 1-D object array without NumPy trying to broadcast nested values."""
+    values = list(values)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _encode_categories(values: Iterable[str]):
+    """Dictionary-encodes a string sequence into (codes, categories)."""
+    lookup: Dict[str, int] = {}
+    codes = [lookup.setdefault(v, len(lookup)) for v in values]
+    return np.asarray(codes, dtype=np.int32), _object_column(lookup)
+
+
+def _split_datetime(dt: Optional[datetime]):
+    """Returns (wall-clock microseconds since epoch, utc offset seconds) for a datetime."""
+    if dt is None:
+        return NAT_MICROS, NO_OFFSET
+    if dt.tzinfo is None:
+        return (dt - _EPOCH) // _MICROSECOND, NO_OFFSET
+    offset = dt.utcoffset()
+    wall = (dt.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+    return wall, (NO_OFFSET if offset is None else int(offset.total_seconds()))
+
+
+def _join_datetime(micros: int, offset: int) -> Optional[datetime]:
+    """Inverse of _split_datetime."""
+    if micros == NAT_MICROS:
+        return None
+    dt = _EPOCH + timedelta(microseconds=micros)
+    if offset != NO_OFFSET:
+        dt = dt.replace(tzinfo=timezone(timedelta(seconds=offset)))
+    return dt
+
+
+class EventBatch:
+    """
+    Columnar, NumPy-backed container for a set of events.
+
+    Start/end times are stored as wall-clock datetime64[us] (the same clock the
+    pipeline has always compared on) plus a UTC offset column so tz-aware events
+    round-trip unchanged. Source and venue are dictionary-encoded, so per-venue
+    or per-source work is done once per category instead of once per row.
+    """
+
+    def __init__(self, titles, descriptions, start_times, start_offsets, end_times, end_offsets,
+                 source_codes, sources, venue_codes, venues, impact_scores, attendance, is_new, raw_data):
+        self.titles = titles
+        self.descriptions = descriptions
+        self.start_times = start_times
+        self.start_offsets = start_offsets
+        self.end_times = end_times
+        self.end_offsets = end_offsets
+        self.source_codes = source_codes
+        self.sources = sources
+        self.venue_codes = venue_codes
+        self.venues = venues
+        self.impact_scores = impact_scores
+        self.attendance = attendance
+        self.is_new = is_new
+        self.raw_data = raw_data
+        self._text: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------
+    # Construction / round trip
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_events(cls, events: Sequence[Event]) -> "EventBatch":
+        """Builds a batch from Event objects in a single pass."""
+        starts = [_split_datetime(e.start_time) for e in events]
+        ends = [_split_datetime(e.end_time) for e in events]
+        titles = _object_column(e.title for e in events)
+        descriptions = _object_column(e.description for e in events)
+        raw_data = _object_column(e.raw_data for e in events)
+        start_times = np.array([s[0] for s in starts], dtype=np.int64).view("datetime64[us]")
+        start_offsets = np.array([s[1] for s in starts], dtype=np.int32)
+        end_times = np.array([s[0] for s in ends], dtype=np.int64).view("datetime64[us]")
+        end_offsets = np.array([s[1] for s in ends], dtype=np.int32)
+        impact_scores = np.array(
+            [NO_SCORE if e.impact_score is None else e.impact_score for e in events], dtype=np.int8)
+        attendance = np.array(
+            [NO_ATTENDANCE if e.attendance_estimate is None else e.attendance_estimate for e in events], dtype=np.int64)
+        is_new = np.array([e.is_new for e in events], dtype=bool)
+
+        source_codes, sources = _encode_categories(e.source for e in events)
+        venue_codes, venues = _encode_categories(e.venue for e in events)
+        return cls(titles, descriptions, start_times, start_offsets, end_times, end_offsets,
+                   source_codes, sources, venue_codes, venues, impact_scores, attendance, is_new, raw_data)
+
+    def to_events(self) -> List[Event]:
+        """Materializes the batch back into Event objects (no re-validation)."""
+        venues = self.venues[self.venue_codes].tolist()
+        sources = self.sources[self.source_codes].tolist()
+        starts = zip(self.start_times.view(np.int64).tolist(), self.start_offsets.tolist())
+        ends = zip(self.end_times.view(np.int64).tolist(), self.end_offsets.tolist())
+        events: List[Event] = []
+        for i, (score, attendance, start, end) in enumerate(
+                zip(self.impact_scores.tolist(), self.attendance.tolist(), starts, ends)):
+            events.append(Event.model_construct(
+                title=self.titles[i],
+                description=self.descriptions[i],
+                start_time=_join_datetime(*start),
+                end_time=_join_datetime(*end),
+                venue=venues[i],
+                source=sources[i],
+                raw_data=self.raw_data[i],
+                impact_score=None if score == NO_SCORE else score,
+                attendance_estimate=None if attendance == NO_ATTENDANCE else attendance,
+                is_new=bool(self.is_new[i]),
+            ))
+        return events
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def select(self, rows) -> "EventBatch":
+        """Returns a new batch holding the rows given by a boolean mask or index array."""
+        batch = EventBatch(
+            self.titles[rows], self.descriptions[rows],
+            self.start_times[rows], self.start_offsets[rows],
+            self.end_times[rows], self.end_offsets[rows],
+            self.source_codes[rows], self.sources,
+            self.venue_codes[rows], self.venues,
+            self.impact_scores[rows], self.attendance[rows],
+            self.is_new[rows], self.raw_data[rows],
+        )
+        if self._text is not None:
+            batch._text = self._text[rows]
+        return batch
+
+    # ------------------------------------------------------------------
+    # Vectorized operations
+    # ------------------------------------------------------------------
+    def text(self) -> np.ndarray:
+        """
+        Lower-cased 'title venue description' column used for keyword matching.
+        An object column: a fixed-width str array would size every row to the
+        longest description.
+        """
+        if self._text is None:
+            venues = self.venues[self.venue_codes] if len(self) else self.venues[:0]
+            self._text = _object_column(
+                f"{t} {v} {d or ''}".lower() for t, v, d in zip(self.titles, venues, self.descriptions)
+            )
+        return self._text
+
+    def keyword_mask(self, keywords: Iterable[str]) -> np.ndarray:
+        """Rows whose title/venue/description contain any keyword (case-insensitive)."""
+        keywords = [kw.lower() for kw in keywords]
+        return np.fromiter((any(kw in text for kw in keywords) for text in self.text()),
+                           dtype=bool, count=len(self))
+
+    def date_window_mask(self, start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+        """Rows whose start date falls in [start, end] (either bound optional)."""
+        days = self.start_times.astype("datetime64[D]")
+        mask = ~np.isnat(days)
+        if start is not None:
+            mask &= days >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= days <= np.datetime64(end, "D")
+        return mask
+
+    def source_counts(self) -> Dict[str, int]:
+        """Number of rows per source."""
+        counts = np.bincount(self.source_codes, minlength=len(self.sources))
+        return {src: int(c) for src, c in zip(self.sources, counts) if c}
+
+    def impact_summary(self, high_threshold: int = 4) -> Dict[str, float]:
+        """Aggregates impact scores; unscored rows count towards total only."""
+        scored = self.impact_scores[self.impact_scores != NO_SCORE].astype(np.int64)
+        return {
+            "total": len(self),
+            "scored": int(scored.size),
+            "high_impact": int(np.count_nonzero(scored >= high_threshold)),
+            "score_sum": int(scored.sum()),
+            "score_mean": float(scored.mean()) if scored.size else 0.0,
+        }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, List
 from datetime import datetime
 
@@ -10,6 +10,8 @@ class BaseEvent(BaseModel):
     venue: str
     source: str
     raw_data: Optional[dict] = None
+    # (title, start_time, venue) and their EventMemory digest, so an event is hashed once per run
+    _memory_digest: Optional[tuple] = PrivateAttr(default=None)
 
 class Event(BaseEvent):
     impact_score: Optional[int] = Field(None, ge=1, le=5)
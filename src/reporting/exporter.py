@@ -0,0 +1,163 @@
+import csv
+import gzip
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from ..models.event import Event
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def _fmt_time(dt) -> Optional[str]:
+    if dt is None:
+        return None
+    return dt.isoformat() if hasattr(dt, "isoformat") else str(dt)
+
+
+# Column name -> extractor. The export schema is any ordered subset of these.
+COLUMNS: Dict[str, Callable[[Event], object]] = {
+    "source": lambda e: e.source,
+    "title": lambda e: e.title,
+    "date": lambda e: e.start_time.strftime("%Y-%m-%d") if hasattr(e.start_time, "strftime") else str(e.start_time),
+    "start_time": lambda e: _fmt_time(e.start_time),
+    "end_time": lambda e: _fmt_time(e.end_time),
+    "venue": lambda e: e.venue,
+    "impact_score": lambda e: e.impact_score,
+    "attendance_estimate": lambda e: e.attendance_estimate,
+    "is_new": lambda e: e.is_new,
+    "url": lambda e: (e.raw_data or {}).get("url"),
+    "description": lambda e: e.description,
+}
+
+# Non-string Parquet column types; everything else is stored as a string.
+_ARROW_TYPES = {"impact_score": "int8", "attendance_estimate": "int64", "is_new": "bool_"}
+
+
+def _arrow_type(column: str):
+    return getattr(pa, _ARROW_TYPES.get(column, "string"))()
+
+
+# The historical 4-column CSV, kept for stakeholders who want the short version.
+LEGACY_SCHEMA = ("source", "title", "date", "venue")
+DEFAULT_SCHEMA = ("source", "title", "start_time", "end_time", "venue", "impact_score",
+                  "attendance_estimate", "is_new", "url")
+
+FORMATS = ("csv", "csv.gz", "jsonl", "jsonl.gz", "parquet")
+
+
+class EventExporter:
+    """
+    Incremental event export to CSV (optionally gzip), JSON Lines or Parquet.
+
+    Rows are written as they arrive, so memory stays flat regardless of event
+    count; Parquet rows are buffered only up to one row group. Use as a context
+    manager, or call open()/write()/close().
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, schema: Sequence[str] = DEFAULT_SCHEMA,
+                 row_group_size: int = 10000):
+        unknown = [c for c in schema if c not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown export columns: {unknown}")
+        self.path = path
+        self.fmt = fmt or self.detect_format(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Unsupported export format: {self.fmt}")
+        if self.fmt == "parquet" and pa is None:
+            raise RuntimeError("pyarrow is required for Parquet export")
+        self.schema = tuple(schema)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._file = None
+        self._csv = None
+        self._parquet = None
+        self._arrow_schema = None
+        self._buffer: List[List[object]] = []
+
+    @staticmethod
+    def detect_format(path: str) -> str:
+        for fmt in sorted(FORMATS, key=len, reverse=True):
+            if path.endswith("." + fmt):
+                return fmt
+        return "csv"
+
+    def open(self) -> "EventExporter":
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.fmt == "parquet":
+            self._arrow_schema = pa.schema([pa.field(c, _arrow_type(c)) for c in self.schema])
+            self._parquet = pq.ParquetWriter(self.path, self._arrow_schema, compression="zstd")
+        elif self.fmt.endswith(".gz"):
+            self._file = gzip.open(self.path, "wt", newline="", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+
+        if self.fmt.startswith("csv"):
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.schema)
+        return self
+
+    def write(self, event: Event):
+        row = [COLUMNS[c](event) for c in self.schema]
+        if self._csv is not None:
+            self._csv.writerow(row)
+        elif self._parquet is not None:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush_parquet()
+        else:
+            self._file.write(json.dumps(dict(zip(self.schema, row)), default=str) + "\n")
+        self.rows_written += 1
+
+    def write_many(self, events: Iterable[Event]):
+        for event in events:
+            self.write(event)
+
+    def _flush_parquet(self):
+        if not self._buffer:
+            return
+        columns = list(zip(*self._buffer))
+        self._parquet.write_table(pa.Table.from_arrays(
+            [pa.array(list(col), field.type) for col, field in zip(columns, self._arrow_schema)],
+            schema=self._arrow_schema,
+        ))
+        self._buffer = []
+
+    def close(self):
+        if self._parquet is not None:
+            self._flush_parquet()
+            self._parquet.close()
+            self._parquet = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def export_events(events: Iterable[Event], path: str, fmt: Optional[str] = None,
+                  schema: Sequence[str] = DEFAULT_SCHEMA) -> int:
+    """Writes events to `path` and returns the number of rows written."""
+    with EventExporter(path, fmt=fmt, schema=schema) as exporter:
+        exporter.write_many(events)
+    return exporter.rows_written
+
+
+def parse_schema(value: Optional[str]) -> Sequence[str]:
+    """Parses an EXPORT_COLUMNS-style value ('legacy', 'default' or comma-separated names)."""
+    if not value or value == "default":
+        return DEFAULT_SCHEMA
+    if value == "legacy":
+        return LEGACY_SCHEMA
+    return tuple(c.strip() for c in value.split(",") if c.strip())
+
@@ -1,10 +1,93 @@
 import os
+import asyncio
+import base64
 import aiosmtplib
 from email.message import EmailMessage
+from typing import Callable, List, Optional, Sequence, Union
 from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from src.utils import cassette
 
 load_dotenv()
 
+ATTACHMENT_TYPES = {
+    ".csv": "text/csv",
+    ".gz": "application/gzip",
+    ".jsonl": "application/x-ndjson",
+    ".parquet": "application/vnd.apache.parquet",
+}
+
+# Renders the HTML body for a given recipient (for personalized fan-out).
+HtmlContent = Union[str, Callable[[str], str]]
+
+
+class DeliveryResult(BaseModel):
+    """Outcome of delivering one message to one recipient."""
+    recipient: str
+    success: bool
+    attempts: int
+    error: Optional[str] = None
+
+
+class SMTPSessionPool:
+    """
+    Bounded pool of authenticated SMTP sessions.
+
+    Sessions are opened lazily (connect + STARTTLS + login once) and reused for
+    every message sent through the pool until it is closed. A session that
+    errors, or that the server dropped while it sat idle, is closed and
+    discarded instead of being reused, so the next acquire opens a fresh one.
+    """
+
+    def __init__(self, notifier: "Notifier", size: int = 4):
+        self.notifier = notifier
+        self.size = max(1, size)
+        self._idle: List[aiosmtplib.SMTP] = []
+        self._slots = asyncio.Semaphore(self.size)
+
+    async def acquire(self) -> aiosmtplib.SMTP:
+        await self._slots.acquire()
+        while self._idle:
+            smtp = self._idle.pop()
+            if smtp.is_connected:
+                return smtp
+            # Dropped by the server while idle: close the transport before discarding it
+            smtp.close()
+        try:
+            smtp = aiosmtplib.SMTP(
+                hostname=self.notifier.smtp_server,
+                port=self.notifier.smtp_port,
+                username=self.notifier.smtp_user,
+                password=self.notifier.smtp_password,
+                start_tls=True,
+                timeout=30,
+            )
+            await smtp.connect()
+            return smtp
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, smtp: aiosmtplib.SMTP, broken: bool = False):
+        if broken or not smtp.is_connected:
+            smtp.close()
+        else:
+            self._idle.append(smtp)
+        self._slots.release()
+
+    async def close(self):
+        while self._idle:
+            smtp = self._idle.pop()
+            if not smtp.is_connected:
+                smtp.close()
+                continue
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+
 class Notifier:
     """Handles sending notifications via SMTP."""
 
@@ -14,45 +97,115 @@ class Notifier:
         self.smtp_user = os.getenv("SMTP_USER")
         self.smtp_password = os.getenv("SMTP_PASSWORD")
         self.sender_email = os.getenv("SENDER_EMAIL", self.smtp_user)
+        self.max_connections = int(os.getenv("SMTP_MAX_CONNECTIONS", "4"))
+        self.max_retries = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+        self.retry_backoff = float(os.getenv("SMTP_RETRY_BACKOFF", "2.0"))
 
-    async def send_email(self, recipient: str, subject: str, html_content: str, attachment_path: str = None):
-        """Sends an HTML email with an optional attachment."""
-        if not self.smtp_user or not self.smtp_password:
-            print("[Notifier] Error: SMTP credentials not found in environment.")
-            return False
+    @staticmethod
+    def _build_attachment(attachment_path: Optional[str]) -> Optional[EmailMessage]:
+        """
+        Base64-encodes the attachment once so every message shares the part.
+        The file is read in fixed-size chunks, but the encoded payload (about
+        4/3 of the file) is held in memory: aiosmtplib serializes each message
+        in full before sending, so the attachment is not streamed to SMTP.
+        """
+        if not attachment_path or not os.path.exists(attachment_path):
+            return None
+        lines = []
+        with open(attachment_path, "rb") as f:
+            # Multiples of 57 raw bytes encode to whole 76-character lines.
+            for chunk in iter(lambda: f.read(57 * 1024), b""):
+                lines.append(base64.encodebytes(chunk).decode("ascii"))
+        filename = os.path.basename(attachment_path)
+        content_type = ATTACHMENT_TYPES.get(os.path.splitext(filename)[1], "application/octet-stream")
+        part = EmailMessage()
+        part["Content-Type"] = content_type
+        part["Content-Transfer-Encoding"] = "base64"
+        part.add_header("Content-Disposition", "attachment", filename=filename)
+        part.set_payload("".join(lines))
+        return part
 
+    def _build_message(self, recipient: str, subject: str, html_content: str,
+                       attachment: Optional[EmailMessage]) -> EmailMessage:
         message = EmailMessage()
         message["From"] = self.sender_email
         message["To"] = recipient
         message["Subject"] = subject
         message.set_content("This is a multi-part message in MIME format.")
         message.add_alternative(html_content, subtype="html")
+        if attachment is not None:
+            message.make_mixed()
+            message.attach(attachment)
+        return message
+
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        """5xx replies, refused recipients and bad credentials are not worth retrying."""
+        if isinstance(error, (aiosmtplib.SMTPAuthenticationError, aiosmtplib.SMTPRecipientsRefused)):
+            return True
+        return isinstance(error, aiosmtplib.SMTPResponseException) and 500 <= error.code < 600
+
+    async def _deliver(self, pool: SMTPSessionPool, message: EmailMessage, recipient: str) -> DeliveryResult:
+        """Sends one message over a pooled session with per-recipient retry/backoff."""
+        error: Optional[Exception] = None
+        attempt = 0
+        for attempt in range(1, self.max_retries + 1):
+            smtp = None
+            try:
+                smtp = await pool.acquire()
+                await smtp.send_message(message)
+                pool.release(smtp)
+                return DeliveryResult(recipient=recipient, success=True, attempts=attempt)
+            except Exception as e:
+                error = e
+                if smtp is not None:
+                    pool.release(smtp, broken=True)
+                if self._is_permanent(e):
+                    break
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+        print(f"[Notifier] Failed to send email to {recipient}: {error}")
+        return DeliveryResult(recipient=recipient, success=False, attempts=attempt, error=str(error))
+
+    async def send_batch(self, recipients: Sequence[str], subject: str, html_content: HtmlContent,
+                         attachment_path: str = None) -> List[DeliveryResult]:
+        """
+        Sends one message per recipient over a bounded pool of SMTP sessions.
+        `html_content` may be a callable taking the recipient to personalize the body.
+        """
+        if not cassette.replaying() and (not self.smtp_user or not self.smtp_password):
+            print("[Notifier] Error: SMTP credentials not found in environment.")
+            return [DeliveryResult(recipient=r, success=False, attempts=0, error="missing SMTP credentials")
+                    for r in recipients]
+
+        attachment = self._build_attachment(attachment_path)
+        pool = SMTPSessionPool(self, size=min(self.max_connections, len(recipients) or 1))
 
-        if attachment_path and os.path.exists(attachment_path):
-            with open(attachment_path, "rb") as f:
-                content = f.read()
-                filename = os.path.basename(attachment_path)
-                message.add_attachment(
-                    content,
-                    maintype="application",
-                    subtype="octet-stream",
-                    filename=filename
-                )
+        async def send(recipient: str) -> DeliveryResult:
+            html = html_content(recipient) if callable(html_content) else html_content
+            message = self._build_message(recipient, subject, html, attachment)
+            recording = cassette.active()
+            if recording is None:
+                return await self._deliver(pool, message, recipient)
+            # Record/replay: the SMTP exchange is stubbed, the message content is checked
+            recording.verify(f"email {recipient} {subject}",
+                             (html + (attachment.get_payload() if attachment is not None else "")).encode())
+
+            async def deliver():
+                return (await self._deliver(pool, message, recipient)).model_dump()
+            return DeliveryResult(**await cassette.acall("smtp", f"{recipient} {subject}", deliver))
 
         try:
-            print(f"[Notifier] Sending email to {recipient}...")
-            await aiosmtplib.send(
-                message,
-                hostname=self.smtp_server,
-                port=self.smtp_port,
-                username=self.smtp_user,
-                password=self.smtp_password,
-                start_tls=True,
-                timeout=30
-            )
-            # print(f"[Notifier] SMTP Response: {response}") # aiosmtplib.send returns tuple (response_code, response_message)
-            print("[Notifier] Email sent successfully.")
-            return True
-        except Exception as e:
-            print(f"[Notifier] Failed to send email: {e}")
-            return False
+            print(f"[Notifier] Sending {len(recipients)} email(s) over up to {pool.size} SMTP session(s)...")
+            results = await asyncio.gather(*(send(r) for r in recipients))
+        finally:
+            await pool.close()
+
+        sent = sum(1 for r in results if r.success)
+        print(f"[Notifier] Delivered {sent}/{len(results)} email(s).")
+        return list(results)
+
+    async def send_email(self, recipient: str, subject: str, html_content: str, attachment_path: str = None):
+        """Sends an HTML email with an optional attachment."""
+        results = await self.send_batch([recipient], subject, html_content, attachment_path)
+        return bool(results) and results[0].success
@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from datetime import datetime
+from html import escape
+from string import Template
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.event import Event
+
+# Templates are compiled once at import; rendering only substitutes values.
+HEADER_TEMPLATE = Template("""
+        <html>
+        <body style="font-family: Arial, sans-serif; color: #333; line-height: 1.6;">
+            <div style="max-width: 600px; margin: auto; border: 1px solid #ddd; padding: 20px; border-radius: 8px;">
+                <h2 style="color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px;">
+                    $heading
+                </h2>
+                <p><strong>Date:</strong> $now</p>
+
+                <div style="display: flex; gap: 10px; margin-bottom: 20px;">
+                    <div style="flex: 1; background: #f9f9f9; padding: 10px; border-radius: 4px; text-align: center;">
+                        <span style="font-size: 24px; font-weight: bold; color: #3498db;">$total_events</span><br/>
+                        <span style="font-size: 12px; color: #777;">Total Events</span>
+                    </div>
+                    <div style="flex: 1; background: #fef9e7; padding: 10px; border-radius: 4px; text-align: center;">
+                        <span style="font-size: 24px; font-weight: bold; color: #f39c12;">$high_impact</span><br/>
+                        <span style="font-size: 12px; color: #777;">High Impact</span>
+                    </div>
+                    $traffic_card
+                </div>
+                $traffic_summary
+
+                <h3>Breakdown by Source</h3>
+                <ul>
+                    <li><strong>NYRR:</strong> $nyrr_count races</li>
+                    <li><strong>Prospect Park:</strong> $pp_count events</li>
+                    <li><strong>Weather:</strong> $w_count alerts</li>
+                </ul>
+
+                <table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
+                    <thead>
+                        <tr style="background: #f4f4f4; text-align: left;">
+                            <th style="padding: 10px;">Event</th>
+                            <th style="padding: 10px;">Date</th>
+                            <th style="padding: 10px;">Venue</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+""")
+
+TRAFFIC_CARD_TEMPLATE = Template("""
+                    <div style="flex: 1; background: #fdedec; padding: 10px; border-radius: 4px; text-align: center;">
+                        <span style="font-size: 24px; font-weight: bold; color: #e74c3c;">$score</span><br/>
+                        <span style="font-size: 12px; color: #777;">Foot Traffic Impact (Today)</span>
+                    </div>
+""")
+
+TRAFFIC_SUMMARY_TEMPLATE = Template("""<p style="font-size: 13px; color: #555;">$summary</p>""")
+
+ROW_TEMPLATE = Template("""
+            <tr style="border-bottom: 1px solid #eee;">
+                <td style="padding: 10px; font-weight: bold;">$title</td>
+                <td style="padding: 10px;">$date</td>
+                <td style="padding: 10px;">$venue</td>
+                <td style="padding: 10px; text-align: center;">
+                    $badge
+                </td>
+            </tr>
+""")
+
+NEW_BADGE = '<span style="background: #2ecc71; color: white; padding: 2px 6px; border-radius: 4px; font-size: 11px;">NEW</span>'
+
+FOOTER = """
+                    </tbody>
+                </table>
+
+                <p style="font-size: 12px; color: #999; margin-top: 30px; text-align: center;">
+                    Automated report generated by Event-Driven Alerts Ingestion Engine.
+                </p>
+            </div>
+        </body>
+        </html>
+"""
+
+RowKey = Tuple[str, str, str, bool]
+
+
+class ReportRenderer:
+    """
+    Streaming HTML report renderer.
+
+    Counts are gathered in a single pass, output is produced as a sequence of
+    chunks (so large reports can be written straight to a file or socket), all
+    interpolated values are HTML-escaped, and rendered rows are cached by event
+    fingerprint so unchanged rows are reused across reports and sectors.
+    """
+
+    def __init__(self, max_cached_rows: int = 20000):
+        self.max_cached_rows = max_cached_rows
+        self._row_cache: "OrderedDict[RowKey, str]" = OrderedDict()
+
+    @staticmethod
+    def _fingerprint(event: Event) -> RowKey:
+        date = event.start_time.strftime('%Y-%m-%d') if hasattr(event.start_time, "strftime") else str(event.start_time)
+        return (event.title, date, event.venue, event.is_new)
+
+    def _render_row(self, event: Event) -> str:
+        key = self._fingerprint(event)
+        row = self._row_cache.get(key)
+        if row is not None:
+            self._row_cache.move_to_end(key)
+            return row
+        title, date, venue, is_new = key
+        row = ROW_TEMPLATE.substitute(
+            title=escape(title),
+            date=escape(date),
+            venue=escape(venue),
+            badge=NEW_BADGE if is_new else "",
+        )
+        self._row_cache[key] = row
+        if len(self._row_cache) > self.max_cached_rows:
+            self._row_cache.popitem(last=False)
+        return row
+
+    @staticmethod
+    def aggregate(events: Iterable[Event]) -> dict:
+        """Computes every header count in one walk over the events."""
+        counts = {"total_events": 0, "high_impact": 0, "nyrr_count": 0, "pp_count": 0, "w_count": 0}
+        for e in events:
+            counts["total_events"] += 1
+            if (e.impact_score or 0) >= 4:
+                counts["high_impact"] += 1
+            if "NYRR" in e.source:
+                counts["nyrr_count"] += 1
+            if "Prospect Park" in e.source or "Prospect Park" in e.venue:
+                counts["pp_count"] += 1
+            if "Weather" in e.source:
+                counts["w_count"] += 1
+        return counts
+
+    def iter_html(self, events: List[Event], traffic_impact: Optional[dict] = None,
+                  heading: str = "Weekly Event & Traffic Alert Summary",
+                  now: Optional[datetime] = None) -> Iterator[str]:
+        """Yields the report as HTML chunks: header, one chunk per row, footer."""
+        counts = self.aggregate(events)
+        yield HEADER_TEMPLATE.substitute(
+            heading=escape(heading),
+            now=(now or datetime.now()).strftime("%B %d, %Y"),
+            traffic_card=TRAFFIC_CARD_TEMPLATE.substitute(score=traffic_impact["total_score"]) if traffic_impact else "",
+            traffic_summary=TRAFFIC_SUMMARY_TEMPLATE.substitute(summary=escape(traffic_impact["summary"])) if traffic_impact else "",
+            **counts,
+        )
+        for event in events:
+            yield self._render_row(event)
+        yield FOOTER
+
+    def render_to(self, write: Callable[[str], object], events: List[Event], **kwargs) -> None:
+        """Streams the report into a writer callable (e.g. `file.write`)."""
+        for chunk in self.iter_html(events, **kwargs):
+            write(chunk)
+
+    def render(self, events: List[Event], **kwargs) -> str:
+        """Renders the whole report into a single string."""
+        return "".join(self.iter_html(events, **kwargs))
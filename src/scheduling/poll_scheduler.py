@@ -0,0 +1,143 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from src.models.event import Event
+from src.utils.normalization import to_local_naive
+
+# Weight of the latest poll in the change-rate moving average
+CHANGE_RATE_ALPHA = 0.3
+# Polls wanted between "now" and the next high-impact event
+POLLS_BEFORE_EVENT = 4
+
+
+class PollScheduler:
+    """
+    Computes each source's next poll time.
+
+    - Proximity: the interval shrinks as the source's next high-impact event
+      approaches (about POLLS_BEFORE_EVENT polls before it starts).
+    - Volatility: an exponential moving average of "payload changed" scales the
+      interval between 0.5x (changes every poll) and 1.5x (never changes).
+    - Failures: a failed poll is retried after POLL_RETRY_HOURS, doubling per
+      consecutive failure.
+    Everything is clamped to [POLL_MIN_HOURS, POLL_MAX_HOURS].
+    """
+
+    def __init__(self, storage_file: Optional[str] = "data/poll_schedule.json"):
+        self.storage_file = storage_file
+        self.min_hours = float(os.getenv("POLL_MIN_HOURS", "6"))
+        self.max_hours = float(os.getenv("POLL_MAX_HOURS", "168"))
+        self.retry_hours = float(os.getenv("POLL_RETRY_HOURS", "1"))
+        self.lookahead_days = float(os.getenv("POLL_LOOKAHEAD_DAYS", "14"))
+        self.high_impact = int(os.getenv("POLL_HIGH_IMPACT", "4"))
+        self.sources: Dict[str, dict] = {}
+        self.load()
+
+    def state(self, name: str) -> dict:
+        if name not in self.sources:
+            self.sources[name] = {
+                "last_poll": None, "next_poll": None, "polls": 0,
+                "change_rate": 0.5, "failures": 0, "fingerprint": None, "reason": None,
+            }
+        return self.sources[name]
+
+    # ------------------------------------------------------------------
+    # Due checks
+    # ------------------------------------------------------------------
+    def next_poll(self, name: str) -> Optional[datetime]:
+        value = self.state(name)["next_poll"]
+        return datetime.fromisoformat(value) if value else None
+
+    def is_due(self, name: str, now: Optional[datetime] = None) -> bool:
+        next_poll = self.next_poll(name)
+        return next_poll is None or (now or datetime.now()) >= next_poll
+
+    def due(self, names: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.now()
+        return [name for name in names if self.is_due(name, now)]
+
+    def next_due(self, names: Iterable[str]) -> Optional[datetime]:
+        """Earliest next poll among `names` (None if any has never been polled)."""
+        times = [self.next_poll(name) for name in names]
+        if not times or any(t is None for t in times):
+            return None
+        return min(times)
+
+    # ------------------------------------------------------------------
+    # Recording and planning
+    # ------------------------------------------------------------------
+    def record_poll(self, name: str, success: bool, fingerprint: Optional[str] = None,
+                    now: Optional[datetime] = None) -> bool:
+        """Records a poll outcome; returns whether the payload changed since the last one."""
+        state = self.state(name)
+        state["last_poll"] = (now or datetime.now()).isoformat()
+        state["polls"] += 1
+        if not success:
+            state["failures"] += 1
+            return False
+        changed = fingerprint is None or fingerprint != state["fingerprint"]
+        state["change_rate"] = round((1 - CHANGE_RATE_ALPHA) * state["change_rate"] + CHANGE_RATE_ALPHA * changed, 4)
+        state["failures"] = 0
+        state["fingerprint"] = fingerprint
+        return changed
+
+    def interval(self, name: str, events: Iterable[Event], now: Optional[datetime] = None) -> timedelta:
+        """Poll interval for `name` given the upcoming events that should drive it."""
+        now = now or datetime.now()
+        state = self.state(name)
+        if state["failures"]:
+            hours = self.retry_hours * 2 ** (state["failures"] - 1)
+            state["reason"] = f"retry after {state['failures']} failure(s)"
+            return timedelta(hours=min(self.max_hours, hours))
+
+        hours = self.max_hours
+        state["reason"] = "quiet"
+        horizon = now + timedelta(days=self.lookahead_days)
+        upcoming = [
+            start for start in (to_local_naive(e.start_time) for e in events
+                                if (e.impact_score or 0) >= self.high_impact)
+            if now <= start <= horizon
+        ]
+        if upcoming:
+            until = (min(upcoming) - now).total_seconds() / 3600
+            hours = min(hours, until / POLLS_BEFORE_EVENT)
+            state["reason"] = f"high-impact event in {until:.0f}h"
+        hours *= 1.5 - state["change_rate"]
+        return timedelta(hours=max(self.min_hours, min(self.max_hours, hours)))
+
+    def plan(self, name: str, events: Iterable[Event], now: Optional[datetime] = None) -> datetime:
+        """Sets and returns the next poll time for `name`."""
+        now = now or datetime.now()
+        next_poll = now + self.interval(name, events, now)
+        self.state(name)["next_poll"] = next_poll.isoformat()
+        return next_poll
+
+    def summary(self, names: Iterable[str]) -> Dict[str, str]:
+        return {
+            name: f"{self.state(name)['next_poll'] or 'now'} ({self.state(name)['reason'] or 'never polled'})"
+            for name in names
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def load(self):
+        if not self.storage_file or not os.path.exists(self.storage_file):
+            return
+        try:
+            with open(self.storage_file, 'r') as f:
+                self.sources = json.load(f).get("sources", {})
+        except Exception as e:
+            print(f"[PollScheduler] Warning: Failed to load schedule file: {e}")
+
+    def save(self):
+        if not self.storage_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+            with open(self.storage_file, 'w') as f:
+                json.dump({"last_updated": datetime.now().isoformat(), "sources": self.sources}, f, indent=2)
+        except Exception as e:
+            print(f"[PollScheduler] Error saving schedule file: {e}")
@@ -0,0 +1,71 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from src.models.event import Event
+from src.scheduling.poll_scheduler import PollScheduler
+
+
+class LocalRunner:
+    """
+    Local stand-in for Cloud Scheduler: polls only the collectors that are due,
+    then sleeps until the next one is (at most `max_sleep` seconds at a time).
+    """
+
+    def __init__(self, names: List[str], run_due: Callable[[List[str]], object],
+                 scheduler_factory: Callable[[], PollScheduler] = PollScheduler,
+                 max_sleep: float = 3600, sleep: Callable[[float], None] = time.sleep):
+        self.names = names
+        self.run_due = run_due
+        self.scheduler_factory = scheduler_factory
+        self.max_sleep = max_sleep
+        self.sleep = sleep
+
+    def tick(self) -> List[str]:
+        """Runs the due collectors once; returns their names."""
+        # Re-read the schedule every tick: the pipeline updates it after each run
+        due = self.scheduler_factory().due(self.names)
+        if due:
+            print(f"[LocalRunner] Due: {due}")
+            self.run_due(due)
+        return due
+
+    def run(self, max_ticks: Optional[int] = None):
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            self.tick()
+            ticks += 1
+            next_due = self.scheduler_factory().next_due(self.names)
+            wait = self.max_sleep if next_due is None else (next_due - datetime.now()).total_seconds()
+            wait = max(1.0, min(self.max_sleep, wait))
+            print(f"[LocalRunner] Next poll at {next_due}; sleeping {wait:.0f}s")
+            self.sleep(wait)
+
+
+def simulate(names: List[str], events: Iterable[Event], days: float = 14,
+             start: Optional[datetime] = None, step_hours: float = 1,
+             changes: Optional[Callable[[str, datetime], bool]] = None,
+             failures: Optional[Callable[[str, datetime], bool]] = None,
+             events_for: Optional[Callable[[str, List[Event]], List[Event]]] = None) -> List[Tuple[datetime, str, str]]:
+    """
+    Offline dry run of the schedule: steps a virtual clock over `days` and
+    returns (time, source, reason) for every poll that would happen. No
+    collector runs; `changes`/`failures` decide each simulated poll's outcome.
+    """
+    events = list(events)
+    scheduler = PollScheduler(storage_file=None)
+    now = start or datetime.now()
+    end = now + timedelta(days=days)
+    polls = []
+    revision = {name: 0 for name in names}
+    while now <= end:
+        for name in scheduler.due(names, now):
+            failed = bool(failures and failures(name, now))
+            if not failed and changes and changes(name, now):
+                revision[name] += 1
+            scheduler.record_poll(name, not failed, fingerprint=str(revision[name]), now=now)
+            upcoming = events_for(name, events) if events_for else events
+            scheduler.plan(name, upcoming, now)
+            polls.append((now, name, scheduler.state(name)["reason"]))
+        now += timedelta(hours=step_hours)
+    return polls
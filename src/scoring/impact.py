@@ -0,0 +1,167 @@
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.models.batch import EventBatch, NO_ATTENDANCE, NO_SCORE
+from src.models.event import Event
+
+# ----------------------------------------------------------------------
+# Rule tables
+# ----------------------------------------------------------------------
+# Known recurring events: (title pattern, base points, typical attendance).
+# Checked before the generic distance table, first match wins.
+KNOWN_EVENT_TIERS: Tuple[Tuple[str, float, int], ...] = (
+    (r"new york city marathon|nyc marathon", 5.0, 50000),
+    (r"brooklyn half", 4.5, 27000),
+    (r"nyc half|united airlines .*half", 4.0, 25000),
+    (r"celebrate brooklyn", 3.5, 6000),
+    (r"smorgasburg", 3.0, 8000),
+    (r"prospect park 5k|parkrun", 2.0, 600),
+)
+
+# Race distances: (title pattern, base points, typical field size).
+RACE_DISTANCES: Tuple[Tuple[str, float, int], ...] = (
+    (r"(?<!half)(?<!half )(?<!half-)marathon\b", 4.5, 30000),
+    (r"half[- ]?marathon|\b13\.1\b", 3.5, 15000),
+    (r"\b(10|15|18|20)\s?m(ile)?s?\b|\b(15|25|30)\s?k\b", 3.0, 6000),
+    (r"\b10\s?k\b", 2.5, 5000),
+    (r"\b(4|5|6)\s?m(ile)?s?\b|\b(5|8)\s?k\b|\bmile\b", 2.0, 3000),
+)
+
+# Base for anything that matches neither table.
+DEFAULT_POINTS = 1.0
+DEFAULT_ATTENDANCE = 150
+
+# Venue capacity by keyword (first match wins), and capacity -> points.
+VENUE_CAPACITY: Tuple[Tuple[str, int], ...] = (
+    ("barclays", 19000),
+    ("five boroughs", 50000),
+    ("bandshell", 7000),
+    ("long meadow", 10000),
+    ("grand army", 5000),
+    ("lefrak", 1500),
+    ("lakeside", 1500),
+    ("zoo", 1200),
+    ("audubon", 200),
+    ("prospect park", 3000),
+    ("brooklyn", 2000),
+)
+CAPACITY_POINTS: Tuple[Tuple[int, float], ...] = ((10000, 1.0), (3000, 0.5), (1000, 0.25))
+
+# Calendar factors, indexed by weekday (Mon=0) and hour of day.
+WEEKDAY_POINTS = np.array([0, 0, 0, 0, 0.25, 0.5, 0.5], dtype=np.float64)
+WEEKDAY_ATTENDANCE = np.array([1.0, 1.0, 1.0, 1.0, 1.1, 1.3, 1.3], dtype=np.float64)
+HOUR_POINTS = np.zeros(24, dtype=np.float64)
+HOUR_POINTS[7:10] = 0.5     # morning commute / race starts
+HOUR_POINTS[16:19] = 0.5    # evening commute
+HOUR_POINTS[19:22] = 0.25   # evening shows
+HOUR_ATTENDANCE = np.ones(24, dtype=np.float64)
+HOUR_ATTENDANCE[0:6] = 0.5
+HOUR_ATTENDANCE[22:24] = 0.7
+
+FEATURES = ("event_tier", "venue_capacity", "weekend", "time_of_day")
+
+
+def _round_half_up(values):
+    """Rounds .5 up (np.rint rounds half to even, which would score 3.5 and 4.5 alike)."""
+    return np.floor(np.asarray(values, dtype=np.float64) + 0.5)
+
+
+class ImpactScorer:
+    """
+    Rule-based impact scoring engine.
+
+    Computes `impact_score` (1-5) and `attendance_estimate` for a whole
+    EventBatch at once. Title and venue rules are evaluated once per distinct
+    title / venue category; weekday and hour factors are lookups into
+    precomputed 7- and 24-entry tables, so the per-row cost is a few array ops.
+    """
+
+    def __init__(self):
+        self._tiers = [(re.compile(p, re.IGNORECASE), pts, att) for p, pts, att in KNOWN_EVENT_TIERS]
+        self._distances = [(re.compile(p, re.IGNORECASE), pts, att) for p, pts, att in RACE_DISTANCES]
+        self._title_cache: Dict[str, Tuple[float, int]] = {}
+        self._venue_cache: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Per-category lookups (cached)
+    # ------------------------------------------------------------------
+    def _title_rule(self, title: str) -> Tuple[float, int]:
+        """Base points and attendance for a title (known tier, then distance)."""
+        cached = self._title_cache.get(title)
+        if cached is None:
+            cached = (DEFAULT_POINTS, DEFAULT_ATTENDANCE)
+            for pattern, pts, att in (*self._tiers, *self._distances):
+                if pattern.search(title):
+                    cached = (pts, att)
+                    break
+            self._title_cache[title] = cached
+        return cached
+
+    def _venue_rule(self, venue: str) -> float:
+        """Points contributed by the venue's capacity."""
+        cached = self._venue_cache.get(venue)
+        if cached is None:
+            text = venue.lower()
+            capacity = next((cap for kw, cap in VENUE_CAPACITY if kw in text), 0)
+            cached = next((pts for min_cap, pts in CAPACITY_POINTS if capacity >= min_cap), 0.0)
+            self._venue_cache[venue] = cached
+        return cached
+
+    # ------------------------------------------------------------------
+    # Batch evaluation
+    # ------------------------------------------------------------------
+    def contributions(self, batch: EventBatch) -> Dict[str, np.ndarray]:
+        """Per-feature point contributions for every row of the batch."""
+        rules = [self._title_rule(t) for t in batch.titles]
+        venue_points = np.array([self._venue_rule(v) for v in batch.venues], dtype=np.float64)
+
+        days = batch.start_times.astype("datetime64[D]")
+        valid = ~np.isnat(days)
+        weekday = np.where(valid, (days.view(np.int64) + 3) % 7, 0)  # 1970-01-01 was a Thursday
+        hour = np.where(valid, (batch.start_times - days).astype("timedelta64[h]").view(np.int64), 12)
+
+        return {
+            "event_tier": np.array([r[0] for r in rules], dtype=np.float64),
+            "venue_capacity": venue_points[batch.venue_codes],
+            "weekend": WEEKDAY_POINTS[weekday],
+            "time_of_day": HOUR_POINTS[hour],
+            "_base_attendance": np.array([r[1] for r in rules], dtype=np.float64),
+            "_attendance_factor": WEEKDAY_ATTENDANCE[weekday] * HOUR_ATTENDANCE[hour],
+        }
+
+    def score_batch(self, batch: EventBatch, overwrite: bool = False) -> EventBatch:
+        """
+        Fills impact_scores/attendance on the batch in place and returns it.
+        Rows that already carry a value (e.g. NWS severity) keep it unless
+        `overwrite` is set.
+        """
+        if not len(batch):
+            return batch
+        parts = self.contributions(batch)
+        points = sum(parts[f] for f in FEATURES)
+        scores = np.clip(_round_half_up(points), 1, 5).astype(np.int8)
+        attendance = _round_half_up(parts["_base_attendance"] * parts["_attendance_factor"]).astype(np.int64)
+
+        fill_score = np.ones(len(batch), dtype=bool) if overwrite else batch.impact_scores == NO_SCORE
+        fill_attendance = np.ones(len(batch), dtype=bool) if overwrite else batch.attendance == NO_ATTENDANCE
+        batch.impact_scores[fill_score] = scores[fill_score]
+        batch.attendance[fill_attendance] = attendance[fill_attendance]
+        return batch
+
+    def score_events(self, events: Sequence[Event], overwrite: bool = False) -> List[Event]:
+        """Convenience wrapper for callers holding a list of Event objects."""
+        return self.score_batch(EventBatch.from_events(events), overwrite=overwrite).to_events()
+
+    def explain(self, event: Event) -> Dict[str, object]:
+        """Breaks a single event's score down into per-feature contributions."""
+        parts = self.contributions(EventBatch.from_events([event]))
+        features = {f: float(parts[f][0]) for f in FEATURES}
+        total = sum(features.values())
+        return {
+            "contributions": features,
+            "points": total,
+            "impact_score": int(np.clip(_round_half_up(total), 1, 5)),
+            "attendance_estimate": int(_round_half_up(parts["_base_attendance"][0] * parts["_attendance_factor"][0])),
+        }
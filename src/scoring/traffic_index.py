@@ -0,0 +1,173 @@
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.utils.normalization import to_local_naive
+
+_EPOCH = datetime(1970, 1, 1)
+ALERT_SEVERITY_SCORE = {"low": 1, "med": 3, "medium": 3, "high": 5}
+
+# Item durations used when no end_time is known.
+DEFAULT_EVENT_HOURS = 1     # same default as CalendarConnector
+DEFAULT_ALERT_HOURS = 12
+
+
+def _hour_key(dt: datetime) -> int:
+    """Hours since epoch on the NYC wall clock."""
+    return int((to_local_naive(dt) - _EPOCH) // timedelta(hours=1))
+
+
+def _hour_to_day(hour_key: int) -> str:
+    return (_EPOCH + timedelta(hours=hour_key)).date().isoformat()
+
+
+class FootTrafficIndex:
+    """
+    Incrementally maintained "Foot Traffic Impact Score" index.
+
+    Each tracked item (event or alert, keyed by its memory hash) contributes its
+    impact score to every hourly bucket it spans, and once to every daily bucket
+    it touches, per sector. Inserting, changing or removing an item only adjusts
+    the buckets it touches, and range queries walk buckets, not items.
+    """
+
+    def __init__(self, storage_file: str = "data/impact_index.json", retention_days: int = 30):
+        self.storage_file = storage_file
+        self.retention_days = retention_days
+        # sector -> hour_key -> score
+        self.hourly: Dict[str, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        # sector -> ISO date -> score
+        self.daily: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # sector -> ISO date -> item keys (used for the summary sentence)
+        self.day_members: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        # key -> (sector, first_hour, last_hour, score, label)
+        self.items: Dict[str, Tuple[str, int, int, float, str]] = {}
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def upsert_event(self, key: str, event, sector: str = "brooklyn") -> bool:
+        """Inserts or updates an Event. Returns True if any bucket changed."""
+        end = event.end_time or event.start_time + timedelta(hours=DEFAULT_EVENT_HOURS)
+        return self._upsert(key, sector, event.start_time, end, float(event.impact_score or 1), event.title)
+
+    def upsert_alert(self, key: str, alert, sector: str = "brooklyn") -> bool:
+        """Inserts or updates an Alert (severity Low/Med/High maps to 1/3/5)."""
+        end = alert.end_time or alert.start_time + timedelta(hours=DEFAULT_ALERT_HOURS)
+        score = float(ALERT_SEVERITY_SCORE.get(alert.severity.lower(), 3))
+        return self._upsert(key, sector, alert.start_time, end, score, alert.headline)
+
+    def remove(self, key: str) -> bool:
+        """Removes an item's contribution. Returns True if it was tracked."""
+        item = self.items.pop(key, None)
+        if item is None:
+            return False
+        self._apply(key, item, -1)
+        return True
+
+    def _upsert(self, key: str, sector: str, start: datetime, end: datetime, score: float, label: str) -> bool:
+        first = _hour_key(start)
+        last = max(first, _hour_key(end - timedelta(microseconds=1))) if end > start else first
+        item = (sector, first, last, score, label)
+        previous = self.items.get(key)
+        if previous == item:
+            return False
+        if previous is not None:
+            self._apply(key, previous, -1)
+        self.items[key] = item
+        self._apply(key, item, +1)
+        return True
+
+    def _apply(self, key: str, item: Tuple[str, int, int, float, str], sign: int):
+        sector, first, last, score, _ = item
+        hourly = self.hourly[sector]
+        days = []
+        for hour in range(first, last + 1):
+            hourly[hour] += sign * score
+            if abs(hourly[hour]) < 1e-9:
+                del hourly[hour]
+            day = _hour_to_day(hour)
+            if not days or days[-1] != day:
+                days.append(day)
+        daily = self.daily[sector]
+        members = self.day_members[sector]
+        for day in days:
+            daily[day] += sign * score
+            if sign > 0:
+                members[day].add(key)
+            else:
+                members[day].discard(key)
+                if not members[day]:
+                    del members[day]
+                    daily.pop(day, None)
+
+    def prune(self, before: Optional[date] = None):
+        """Drops items that ended before `before` (default: now - retention_days)."""
+        before = before or (datetime.now() - timedelta(days=self.retention_days)).date()
+        cutoff = _hour_key(datetime.combine(before, datetime.min.time()))
+        for key in [k for k, item in self.items.items() if item[2] < cutoff]:
+            self.remove(key)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def hourly_range(self, start: datetime, end: datetime, sector: str = "brooklyn") -> List[Tuple[datetime, float]]:
+        """Per-hour scores for [start, end); O(hours in range)."""
+        hourly = self.hourly.get(sector, {})
+        first, last = _hour_key(start), _hour_key(end)
+        return [(_EPOCH + timedelta(hours=h), hourly.get(h, 0.0)) for h in range(first, last)]
+
+    def daily_range(self, start: date, end: date, sector: str = "brooklyn") -> List[Tuple[str, float]]:
+        """Per-day scores for [start, end]; O(days in range)."""
+        daily = self.daily.get(sector, {})
+        out = []
+        day = start
+        while day <= end:
+            out.append((day.isoformat(), daily.get(day.isoformat(), 0.0)))
+            day += timedelta(days=1)
+        return out
+
+    def day_summary(self, day: Optional[date] = None, sector: str = "brooklyn") -> Dict[str, object]:
+        """`/v1/impact/today`-style payload for one day."""
+        day_iso = (day or datetime.now().date()).isoformat()
+        total = self.daily.get(sector, {}).get(day_iso, 0.0)
+        members = self.day_members.get(sector, {}).get(day_iso, set())
+        top = sorted((self.items[k] for k in members), key=lambda item: -item[3])[:2]
+
+        level = "High" if total >= 20 else "Moderate" if total >= 8 else "Low"
+        if top:
+            summary = f"{level} impact due to " + " and ".join(item[4] for item in top) + "."
+        else:
+            summary = f"{level} impact: no tracked events or alerts."
+        return {"date": day_iso, "total_score": round(total), "summary": summary}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def load(self):
+        """Loads tracked items and rebuilds buckets from them."""
+        if not os.path.exists(self.storage_file):
+            return
+        try:
+            with open(self.storage_file, 'r') as f:
+                data = json.load(f)
+            for key, item in data.get("items", {}).items():
+                self.items[key] = tuple(item)
+                self._apply(key, self.items[key], +1)
+        except Exception as e:
+            print(f"[FootTrafficIndex] Warning: Failed to load index file: {e}")
+
+    def save(self):
+        """Saves tracked items to the storage file."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+            with open(self.storage_file, 'w') as f:
+                json.dump({
+                    "last_updated": datetime.now().isoformat(),
+                    "items": self.items,
+                }, f)
+        except Exception as e:
+            print(f"[FootTrafficIndex] Error saving index file: {e}")
@@ -0,0 +1,153 @@
+import json
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+# Defaults of the original single-sector deployment (696 Flatbush, Brooklyn)
+DEFAULT_SECTOR = "brooklyn"
+BROOKLYN_KEYWORDS = ["Brooklyn", "Prospect Park", "Kings", "696 Flatbush", "Grand Army", "Lakeside", "LeFrak", "Zoo", "Breeze Hill", "Audubon", "Lookout Hill", "EcoCenter", "Parkside", "Lullwater", "The Loop"]
+BROOKLYN_SUBJECT = "Brooklyn Event Summary (696 Flatbush) - {date}"
+
+
+def _norm(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+class Sector:
+    """
+    One subscription: filter rules plus where its results go.
+
+    An event belongs to the sector when its title/venue/description contains
+    one of `keywords`, or its venue/source is listed in `venues`/`sources`.
+    Each sector has its own memory file, calendar, recipients and subject.
+    """
+
+    def __init__(self, name: str, keywords: Iterable[str] = (), venues: Iterable[str] = (),
+                 sources: Iterable[str] = (), recipients: Iterable[str] = (),
+                 subject: Optional[str] = None, calendar_id: Optional[str] = None,
+                 label: Optional[str] = None, memory_file: Optional[str] = None):
+        self.name = name
+        self.label = label or name.replace("_", " ").title()
+        self.keywords = [k for k in keywords if k.strip()]
+        self.venues = list(venues)
+        self.sources = list(sources)
+        self.recipients = [r.strip() for r in recipients if r.strip()]
+        self.subject = subject or f"{self.label} Event Summary - {{date}}"
+        self.calendar_id = calendar_id
+        if memory_file is None:
+            # The original sector keeps the pre-subscription file so its history carries over
+            memory_file = ("data/event_memory.json" if name == DEFAULT_SECTOR
+                           else os.path.join("data", "sectors", name, "event_memory.json"))
+        self.memory_file = memory_file
+
+    def index_key(self, event_hash: str) -> str:
+        """Key of an event in the shared FootTrafficIndex (namespaced for non-default sectors)."""
+        return event_hash if self.name == DEFAULT_SECTOR else f"{self.name}:{event_hash}"
+
+    def export_path(self, base_path: str) -> str:
+        """Per-sector export file: /tmp/extracted_events.csv -> /tmp/extracted_events.queens.csv."""
+        if self.name == DEFAULT_SECTOR:
+            return base_path
+        directory, filename = os.path.split(base_path)
+        stem, dot, ext = filename.partition(".")
+        return os.path.join(directory, f"{stem}.{self.name}{dot}{ext}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Sector":
+        return cls(
+            name=data["name"], keywords=data.get("keywords", ()), venues=data.get("venues", ()),
+            sources=data.get("sources", ()), recipients=data.get("recipients", ()),
+            subject=data.get("subject"), calendar_id=data.get("calendar_id"),
+            label=data.get("label"), memory_file=data.get("memory_file"),
+        )
+
+
+def default_sector() -> Sector:
+    """The Brooklyn sector as configured through the legacy environment variables."""
+    recipients = [r for r in os.getenv("STAKEHOLDER_EMAILS", "").split(",") if r.strip()]
+    if not recipients and os.getenv("STAKEHOLDER_EMAIL"):
+        recipients = [os.getenv("STAKEHOLDER_EMAIL")]
+    return Sector(DEFAULT_SECTOR, keywords=BROOKLYN_KEYWORDS, recipients=recipients,
+                  subject=BROOKLYN_SUBJECT, label="Brooklyn / Prospect Park")
+
+
+def load_sectors(path: Optional[str] = None) -> List[Sector]:
+    """Sectors from SECTORS_FILE (see sectors.example.json), or the single default sector."""
+    path = path or os.getenv("SECTORS_FILE", "")
+    if not path or not os.path.exists(path):
+        return [default_sector()]
+    with open(path, "r") as f:
+        data = json.load(f)
+    sectors = [Sector.from_dict(entry) for entry in data.get("sectors", [])]
+    names = [s.name for s in sectors]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate sector names in {path}: {names}")
+    return sectors or [default_sector()]
+
+
+class SectorIndex:
+    """
+    Assigns events to sectors in one pass, whatever the number of sectors.
+
+    All keywords of all sectors are compiled into one case-insensitive pattern
+    scanned once per event; each keyword hit is mapped to its sectors through an
+    inverted index (keyword -> sector ids), as are exact venue and source matches.
+    """
+
+    def __init__(self, sectors: List[Sector]):
+        self.sectors = sectors
+        self.keyword_index: Dict[str, Set[int]] = defaultdict(set)
+        self.venue_index: Dict[str, Set[int]] = defaultdict(set)
+        self.source_index: Dict[str, Set[int]] = defaultdict(set)
+        for sid, sector in enumerate(sectors):
+            for keyword in sector.keywords:
+                self.keyword_index[_norm(keyword)].add(sid)
+            for venue in sector.venues:
+                self.venue_index[_norm(venue)].add(sid)
+            for source in sector.sources:
+                self.source_index[_norm(source)].add(sid)
+
+        keywords = sorted(self.keyword_index, key=len, reverse=True)
+        # Zero-width lookahead reports a hit at every position, and alternation tries the
+        # longest keyword first; shorter keywords matching at the same position are
+        # exactly that keyword's prefixes, precomputed here so overlaps are not lost.
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))") if keywords else None
+        self._hit_sectors: Dict[str, Set[int]] = {
+            kw: set().union(*(self.keyword_index[other] for other in keywords if kw.startswith(other)))
+            for kw in keywords
+        }
+
+    def match(self, text: str, venue: str = "", source: str = "") -> Set[int]:
+        """Sector ids matching one event (`text` is its lower-cased title/venue/description)."""
+        hits: Set[int] = set()
+        if self._pattern is not None:
+            for keyword in set(self._pattern.findall(_norm(text))):
+                hits |= self._hit_sectors[keyword]
+        if venue and self.venue_index:
+            hits |= self.venue_index.get(_norm(venue), set())
+        if source and self.source_index:
+            hits |= self.source_index.get(_norm(source), set())
+        return hits
+
+    def assign(self, batch) -> Dict[str, np.ndarray]:
+        """Row indices of `batch` per sector name (sectors without matches map to empty arrays)."""
+        rows: List[List[int]] = [[] for _ in self.sectors]
+        venues = batch.venues[batch.venue_codes] if len(batch) else []
+        sources = batch.sources[batch.source_codes] if len(batch) else []
+        for row, (text, venue, source) in enumerate(zip(batch.text(), venues, sources)):
+            for sid in self.match(str(text), str(venue), str(source)):
+                rows[sid].append(row)
+        return {sector.name: np.array(r, dtype=np.int64) for sector, r in zip(self.sectors, rows)}
+
+
+def compact_assignment(assignment: Dict[str, np.ndarray]):
+    """
+    (rows matched by any sector, assignment re-indexed against those rows), so the
+    batch can be narrowed to matched events once and still split per sector.
+    """
+    arrays = [r for r in assignment.values() if len(r)]
+    rows = np.unique(np.concatenate(arrays)) if arrays else np.zeros(0, dtype=np.int64)
+    return rows, {name: np.searchsorted(rows, r) for name, r in assignment.items()}
@@ -0,0 +1,385 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time as _time
+import types
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+RECORD = "record"
+REPLAY = "replay"
+# 2: outputs are recorded in full (version 1 recorded their digests only)
+CASSETTE_VERSION = 2
+
+# Hop-by-hop / encoding headers that must not be replayed with an already-decoded body
+_DROP_ON_FULFILL = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """
+    Record/replay store for every network boundary of a pipeline run.
+
+    A cassette is a directory holding `cassette.json` (one entry per
+    interaction: channel, key, sequence number, metadata, body digest),
+    `bodies/<sha256>` (deduplicated payloads and run outputs) and `state/data/`
+    (the pipeline's state files as they were when recording started). Repeated
+    requests for the same key are replayed in recorded order; once exhausted the
+    last one is reused.
+    """
+
+    def __init__(self, directory: str, mode: str):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.entries: Dict[Tuple[str, str], list] = defaultdict(list)
+        self._played: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.recorded_at: Optional[datetime] = None
+        self.version = CASSETTE_VERSION
+        self.mismatches = 0
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+            self.recorded_at = datetime.now()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "bodies", digest)
+
+    def _load(self):
+        index_file = os.path.join(self.directory, "cassette.json")
+        if not os.path.exists(index_file):
+            raise FileNotFoundError(f"No cassette at {self.directory}")
+        with open(index_file, "r") as f:
+            data = json.load(f)
+        self.recorded_at = datetime.fromisoformat(data["recorded_at"])
+        self.version = data.get("version", 1)
+        for entry in data["entries"]:
+            self.entries[(entry["channel"], entry["key"])].append(entry)
+
+    def save(self):
+        if self.mode != RECORD:
+            return
+        entries = [entry for key in self.entries for entry in self.entries[key]]
+        with open(os.path.join(self.directory, "cassette.json"), "w") as f:
+            json.dump({
+                "version": CASSETTE_VERSION,
+                "recorded_at": self.recorded_at.isoformat(),
+                "entries": entries,
+            }, f, indent=1)
+        print(f"[Cassette] Recorded {len(entries)} interaction(s) to {self.directory}")
+
+    def record(self, channel: str, key: str, body: bytes = b"", meta: Optional[dict] = None):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(body)
+        entries = self.entries[(channel, key)]
+        entries.append({"channel": channel, "key": key, "seq": len(entries), "meta": meta or {}, "body": digest})
+
+    def play(self, channel: str, key: str) -> Tuple[bytes, dict]:
+        entries = self.entries.get((channel, key))
+        if not entries:
+            raise CassetteMiss(f"{channel}: {key}")
+        index = min(self._played[(channel, key)], len(entries) - 1)
+        self._played[(channel, key)] += 1
+        entry = entries[index]
+        with open(self._body_path(entry["body"]), "rb") as f:
+            return f.read(), entry["meta"]
+
+    # ------------------------------------------------------------------
+    # Generic call wrappers (calendar, SMTP, page sources)
+    # ------------------------------------------------------------------
+    def call(self, channel: str, key: str, fn: Callable[[], Any]) -> Any:
+        """Records fn()'s JSON-serializable result, or returns the recorded one."""
+        if self.replaying:
+            body, _ = self.play(channel, key)
+            return json.loads(body)
+        result = fn()
+        self.record(channel, key, json.dumps(result, default=str).encode())
+        return result
+
+    async def acall(self, channel: str, key: str, fn: Callable[[], Any]) -> Any:
+        """Async variant of `call` (fn returns an awaitable)."""
+        if self.replaying:
+            body, _ = self.play(channel, key)
+            return json.loads(body)
+        result = await fn()
+        self.record(channel, key, json.dumps(result, default=str).encode())
+        return result
+
+    def verify(self, key: str, data: bytes) -> bool:
+        """Records a run output, or checks the replayed output against it byte for byte."""
+        if not self.replaying:
+            self.record("output", key, data)
+            return True
+        try:
+            expected, _ = self.play("output", key)
+        except CassetteMiss:
+            print(f"[Cassette] No recorded output for {key}")
+            return False
+        if self.version < 2:
+            # Version 1 cassettes hold the output's digest only
+            matches = expected.decode() == hashlib.sha256(data).hexdigest()
+        else:
+            matches = expected == data
+        if not matches:
+            self.mismatches += 1
+            print(f"[Cassette] MISMATCH: {key} differs from the recorded run{self._first_difference(expected, data)}")
+            return False
+        print(f"[Cassette] {key} matches the recorded run")
+        return True
+
+    def _first_difference(self, expected: bytes, data: bytes) -> str:
+        """Where a replayed output first departs from the recording (empty for version 1 digests)."""
+        if self.version < 2:
+            return ""
+        recorded, replayed = expected.splitlines(), data.splitlines()
+        for line, (old, new) in enumerate(zip(recorded, replayed), 1):
+            if old != new:
+                return f" at line {line}:\n  recorded: {old[:200]!r}\n  replayed: {new[:200]!r}"
+        return f" ({len(recorded)} recorded line(s), {len(replayed)} replayed)"
+
+    # ------------------------------------------------------------------
+    # Pipeline state
+    # ------------------------------------------------------------------
+    def snapshot_state(self, data_dir: str = "data", env_names=(), files: Optional[Dict[str, str]] = None):
+        """
+        Copies what the run starts from into the cassette: the state files under
+        `data_dir`, the listed environment variables and extra config `files`
+        (name -> path, e.g. the sectors file).
+        """
+        state = os.path.join(self.directory, "state")
+        if os.path.exists(state):
+            shutil.rmtree(state)
+        if os.path.isdir(data_dir):
+            shutil.copytree(data_dir, os.path.join(state, "data"))
+        os.makedirs(state, exist_ok=True)
+        copied = {}
+        for name, path in (files or {}).items():
+            if path and os.path.exists(path):
+                shutil.copy(path, os.path.join(state, name))
+                copied[name] = name
+        env = {name: os.environ[name] for name in env_names if name in os.environ}
+        with open(os.path.join(state, "config.json"), "w") as f:
+            json.dump({"env": env, "files": copied}, f, indent=2)
+
+    def restore_state(self, workdir: str, env_names=()) -> Dict[str, str]:
+        """
+        Lays the recorded state out under `workdir` (the replay working directory),
+        resets the listed environment variables to their recorded values and
+        returns the recorded config files (name -> path inside `workdir`).
+        """
+        state = os.path.join(self.directory, "state")
+        source = os.path.join(state, "data")
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(workdir, "data"), dirs_exist_ok=True)
+        else:
+            os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+        config = {"env": {}, "files": {}}
+        if os.path.exists(os.path.join(state, "config.json")):
+            with open(os.path.join(state, "config.json"), "r") as f:
+                config = json.load(f)
+        for name in env_names:
+            os.environ.pop(name, None)
+        os.environ.update(config["env"])
+        files = {}
+        for name, stored in config["files"].items():
+            files[name] = shutil.copy(os.path.join(state, stored), os.path.join(workdir, stored))
+        return files
+
+
+# ----------------------------------------------------------------------
+# Active cassette (one per process; record/replay runs force in-process collectors)
+# ----------------------------------------------------------------------
+_active: Optional[Cassette] = None
+
+
+def activate(cassette: Optional[Cassette]):
+    global _active
+    _active = cassette
+
+
+def active() -> Optional[Cassette]:
+    return _active
+
+
+def replaying() -> bool:
+    return _active is not None and _active.replaying
+
+
+def call(channel: str, key: str, fn: Callable[[], Any]) -> Any:
+    """`fn()` passed through the active cassette (or called directly when none is active)."""
+    return _active.call(channel, key, fn) if _active is not None else fn()
+
+
+async def acall(channel: str, key: str, fn: Callable[[], Any]) -> Any:
+    return await _active.acall(channel, key, fn) if _active is not None else await fn()
+
+
+# ----------------------------------------------------------------------
+# httpx
+# ----------------------------------------------------------------------
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records responses (raw bytes + headers) or replays them."""
+
+    def __init__(self, cassette: Cassette, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassette = cassette
+        # No real transport at all when replaying: nothing can reach the network
+        self.inner = inner or (None if cassette.replaying else httpx.AsyncHTTPTransport())
+
+    @staticmethod
+    def _key(request: httpx.Request) -> str:
+        body = request.content
+        suffix = f" #{hashlib.sha256(body).hexdigest()[:16]}" if body else ""
+        return f"{request.method} {request.url}{suffix}"
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._key(request)
+        if self.cassette.replaying:
+            body, meta = self.cassette.play("http", key)
+            return httpx.Response(meta["status"], headers=meta["headers"], content=body, request=request)
+        response = await self.inner.handle_async_request(request)
+        body = b"".join([chunk async for chunk in response.stream])
+        await response.aclose()
+        headers = list(response.headers.multi_items())
+        self.cassette.record("http", key, body, {"status": response.status_code, "headers": headers})
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+def http_client(**kwargs) -> httpx.AsyncClient:
+    """httpx.AsyncClient routed through the active cassette, if any."""
+    if _active is not None:
+        kwargs["transport"] = CassetteTransport(_active)
+    return httpx.AsyncClient(**kwargs)
+
+
+# ----------------------------------------------------------------------
+# Playwright
+# ----------------------------------------------------------------------
+async def attach_playwright(context):
+    """
+    Routes every request of a Playwright browser context through the active
+    cassette: recorded with route.fetch() or fulfilled from the recording
+    (unrecorded requests are aborted, so replay never touches the network).
+    """
+    cassette = _active
+    if cassette is None:
+        return
+
+    async def _handle(route):
+        request = route.request
+        post = request.post_data_buffer
+        key = f"{request.method} {request.url}" + (f" #{hashlib.sha256(post).hexdigest()[:16]}" if post else "")
+        if cassette.replaying:
+            try:
+                body, meta = cassette.play("browser", key)
+            except CassetteMiss:
+                await route.abort()
+                return
+            await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.abort()
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROP_ON_FULFILL}
+        cassette.record("browser", key, body, {"status": response.status, "headers": headers})
+        await route.fulfill(status=response.status, headers=headers, body=body)
+
+    await context.route("**/*", _handle)
+
+
+# ----------------------------------------------------------------------
+# Page sources (SeleniumBase)
+# ----------------------------------------------------------------------
+def page_source(url: str, fetch: Callable[[], str]) -> str:
+    """A browser-rendered page source, recorded or replayed by URL."""
+    cassette = _active
+    if cassette is None:
+        return fetch()
+    if cassette.replaying:
+        body, _ = cassette.play("page", url)
+        return body.decode("utf-8")
+    content = fetch()
+    cassette.record("page", url, content.encode("utf-8"))
+    return content
+
+
+# ----------------------------------------------------------------------
+# Frozen clock
+# ----------------------------------------------------------------------
+class _FrozenDatetime(datetime):
+    frozen_at: datetime = None
+
+    @classmethod
+    def now(cls, tz=None):
+        moment = cls.frozen_at
+        return moment.astimezone(tz) if tz is not None else moment
+
+    @classmethod
+    def today(cls):
+        return cls.frozen_at
+
+
+class _FrozenTime(types.ModuleType):
+    """The time module with time() pinned to the frozen moment; sleep(), monotonic() and perf_counter() stay real."""
+
+    def __init__(self):
+        super().__init__("time")
+
+    def __getattr__(self, name):
+        return getattr(_time, name)
+
+    @staticmethod
+    def time() -> float:
+        return _FrozenDatetime.frozen_at.timestamp()
+
+
+_frozen_time = _FrozenTime()
+
+
+def freeze_clock(moment: datetime):
+    """
+    Makes datetime.now() return `moment` and time.time() its timestamp in the
+    pipeline's modules (src.* and main), including ones imported later through
+    the start-up profiler. Snapshot ages, circuit breakers and the job queue
+    read time.time().
+    """
+    _FrozenDatetime.frozen_at = moment
+
+    def _patch(*_):
+        for name, module in list(sys.modules.items()):
+            if module is None or not (name.startswith("src.") or name in ("main", "__main__")):
+                continue
+            if getattr(module, "datetime", None) is datetime:
+                module.datetime = _FrozenDatetime
+            if getattr(module, "time", None) is _time:
+                module.time = _frozen_time
+
+    _patch()
+    from src.utils.startup import profiler
+    profiler.import_hooks.append(_patch)
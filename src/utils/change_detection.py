@@ -0,0 +1,98 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def digest_json(payloads) -> str:
+    """Stable digest of JSON-compatible data (key order and formatting do not matter)."""
+    canonical = json.dumps(payloads, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def digest_html(fragments: Iterable[str]) -> str:
+    """Digest of HTML fragments with whitespace collapsed."""
+    h = hashlib.sha256()
+    for fragment in fragments:
+        h.update(_WHITESPACE.sub(" ", fragment).strip().encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def parser_fingerprint(cls: type, extra_modules: Tuple[str, ...] = ()) -> str:
+    """
+    Digest of the source code that turns a payload into events: the modules of
+    `cls` and its bases, plus `extra_modules`. Payload digests are scoped by it,
+    so a parser fix re-parses payloads that are otherwise unchanged.
+    """
+    modules = {klass.__module__ for klass in cls.__mro__ if klass.__module__ not in ("builtins", "abc")}
+    h = hashlib.sha256()
+    for name in sorted(modules | set(extra_modules)):
+        try:
+            source = inspect.getsource(importlib.import_module(name))
+        except (ImportError, OSError, TypeError):
+            source = name
+        h.update(source.encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def scoped_digest(payload_digest: str, parser: str) -> str:
+    """Payload digest bound to the parser that produced the stored events."""
+    return hashlib.sha256(f"{parser}:{payload_digest}".encode()).hexdigest()
+
+
+class SourceDigestStore:
+    """
+    Remembers a digest of each source's relevant payload from the last run
+    that was parsed successfully. A collector whose freshly fetched payload
+    hashes to the stored value can skip parsing entirely. Collectors store
+    digests scoped by their parser_fingerprint, so a changed parser never
+    matches a digest recorded by the old one.
+    """
+
+    def __init__(self, storage_file: Optional[str] = "data/source_digests.json"):
+        self.storage_file = storage_file
+        self.digests: Dict[str, dict] = {}
+        self.load()
+
+    def matches(self, source: str, digest: str) -> bool:
+        entry = self.digests.get(source)
+        return bool(entry) and entry.get("digest") == digest
+
+    def update(self, source: str, digest: str):
+        self.digests[source] = {"digest": digest, "updated_at": datetime.now().isoformat()}
+
+    def forget(self, source: str):
+        self.digests.pop(source, None)
+
+    def get(self, source: str) -> Optional[str]:
+        entry = self.digests.get(source)
+        return entry.get("digest") if entry else None
+
+    def load(self):
+        if not self.storage_file or not os.path.exists(self.storage_file):
+            return
+        try:
+            with open(self.storage_file, 'r') as f:
+                self.digests = json.load(f).get("digests", {})
+        except Exception as e:
+            print(f"[SourceDigestStore] Warning: Failed to load digest file: {e}")
+
+    def save(self):
+        if not self.storage_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+            with open(self.storage_file, 'w') as f:
+                json.dump({"digests": self.digests}, f, indent=2)
+        except Exception as e:
+            print(f"[SourceDigestStore] Error saving digest file: {e}")
@@ -0,0 +1,94 @@
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Learned endpoints are forgotten after this many consecutive runs without the feed
+MAX_MISSES = 3
+
+# Hosts that only ever serve tracking/config JSON; never worth reading while probing
+NOISE_HOSTS = (
+    "google-analytics", "googletagmanager", "doubleclick", "googlesyndication", "facebook",
+    "hotjar", "segment.", "newrelic", "nr-data", "sentry", "optimizely", "clarity.ms",
+    "demdex", "omtrdc", "adobedtm", "onetrust", "cookielaw", "intercom", "launchdarkly",
+)
+
+_NUMERIC = re.compile(r"^\d+$")
+_OPAQUE_ID = re.compile(r"^[0-9a-fA-F-]{16,}$")
+
+
+class FeedEndpoints:
+    """
+    Remembers which URL patterns served a source's JSON feed, and under which
+    key the event array sat.
+
+    A pattern is the host and path with numeric and opaque-id segments
+    generalized and the query dropped (`api.example.com/v1/events/{id}`).
+    Once a source has a learned pattern, its collector reads only responses
+    that match it. A pattern that goes MAX_MISSES runs without serving the
+    feed is forgotten, and the collector probes candidate responses again.
+    """
+
+    def __init__(self, storage_file: Optional[str] = "data/feed_endpoints.json"):
+        self.storage_file = storage_file
+        self.endpoints: Dict[str, Dict[str, dict]] = {}
+        self.load()
+
+    @staticmethod
+    def pattern_of(url: str) -> str:
+        parts = urlsplit(url)
+        segments = [
+            "{n}" if _NUMERIC.match(s) else "{id}" if _OPAQUE_ID.match(s) else s
+            for s in parts.path.split("/")
+        ]
+        return parts.netloc.lower() + "/".join(segments)
+
+    @staticmethod
+    def is_noise(url: str) -> bool:
+        host = urlsplit(url).netloc.lower()
+        return any(marker in host for marker in NOISE_HOSTS)
+
+    def known(self, source: str) -> Dict[str, dict]:
+        """Learned pattern -> {"key", "hits", "misses", "last_seen"} for a source."""
+        return self.endpoints.get(source, {})
+
+    def lookup(self, source: str, url: str) -> Optional[dict]:
+        return self.known(source).get(self.pattern_of(url))
+
+    def learn(self, source: str, url: str, key: Optional[str]):
+        """Records that `url` served the feed, with the event array under `key` (None: the root array)."""
+        entry = self.endpoints.setdefault(source, {}).setdefault(self.pattern_of(url), {"hits": 0})
+        entry.update(key=key, hits=entry["hits"] + 1, misses=0, last_seen=datetime.now().isoformat())
+
+    def end_run(self, source: str, served: set):
+        """Counts a miss for every learned pattern not in `served`; forgets the stale ones."""
+        for pattern, entry in list(self.known(source).items()):
+            if pattern in served:
+                continue
+            entry["misses"] = entry.get("misses", 0) + 1
+            if entry["misses"] >= MAX_MISSES:
+                print(f"[FeedEndpoints] {source}: forgetting {pattern} after {entry['misses']} runs without the feed.")
+                del self.endpoints[source][pattern]
+
+    def load(self):
+        if not self.storage_file or not os.path.exists(self.storage_file):
+            return
+        try:
+            with open(self.storage_file, 'r') as f:
+                self.endpoints = json.load(f).get("endpoints", {})
+        except Exception as e:
+            print(f"[FeedEndpoints] Warning: Failed to load endpoint file: {e}")
+
+    def save(self):
+        if not self.storage_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+            tmp_file = f"{self.storage_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({"endpoints": self.endpoints}, f, indent=2)
+            os.replace(tmp_file, self.storage_file)
+        except Exception as e:
+            print(f"[FeedEndpoints] Error saving endpoint file: {e}")
@@ -0,0 +1,98 @@
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+# Partition for entries whose start time was never recorded (memory migrated from older formats)
+UNDATED = "undated"
+
+
+class HistoryArchive:
+    """
+    Append-only cold tier for events that left the hot EventMemory.
+
+    Records are gzip JSON lines partitioned by the month of the event's start
+    time (`2026-05.jsonl.gz`). Each append adds one gzip member per partition,
+    so existing data is never rewritten. A range scan opens only the
+    partitions that overlap the range.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def _partition(start_time: Optional[str]) -> str:
+        return start_time[:7] if start_time else UNDATED
+
+    def _path(self, partition: str) -> str:
+        return os.path.join(self.directory, f"{partition}.jsonl.gz")
+
+    def append(self, records: List[dict]) -> int:
+        """Appends records (with an ISO `start_time`, or None) to their month partitions."""
+        if not records:
+            return 0
+        by_partition: Dict[str, List[dict]] = defaultdict(list)
+        for record in records:
+            by_partition[self._partition(record.get("start_time"))].append(record)
+        os.makedirs(self.directory, exist_ok=True)
+        for partition, rows in by_partition.items():
+            with gzip.open(self._path(partition), "at", encoding="utf-8") as f:
+                f.write("".join(json.dumps(row) + "\n" for row in rows))
+        return len(records)
+
+    def partitions(self) -> List[str]:
+        """Partition names in time order (the undated one last)."""
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name[:-len(".jsonl.gz")] for name in os.listdir(self.directory) if name.endswith(".jsonl.gz")]
+        return sorted(names, key=lambda name: (name == UNDATED, name))
+
+    def scan(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             source: Optional[str] = None) -> Iterator[dict]:
+        """
+        Archived records whose start time is in [start, end) (naive NYC wall
+        time), optionally of one source. Undated records are included only when
+        no range is given.
+        """
+        low = start.isoformat() if start else None
+        high = end.isoformat() if end else None
+        for partition in self.partitions():
+            if partition == UNDATED:
+                if low or high:
+                    continue
+            elif (low and partition < low[:7]) or (high and partition > high[:7]):
+                continue
+            with gzip.open(self._path(partition), "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    moment = record.get("start_time")
+                    if moment and ((low and moment < low) or (high and moment >= high)):
+                        continue
+                    if source and record.get("source") != source:
+                        continue
+                    yield record
+
+    def clear(self):
+        """Deletes the whole archive."""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print archived events as JSON lines")
+    parser.add_argument("directory", nargs="?", default="data/event_memory.archive")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="first start time (NYC), e.g. 2026-05-01")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="end of the range (exclusive)")
+    parser.add_argument("--source", help="only this source (e.g. NYRR)")
+    args = parser.parse_args()
+    for record in HistoryArchive(args.directory).scan(args.start, args.end, args.source):
+        sys.stdout.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
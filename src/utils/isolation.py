@@ -0,0 +1,168 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import signal
+import time
+from typing import List, Optional
+
+from src.models.event import Event
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: workers run without rlimits
+    resource = None
+
+
+class CollectorRun:
+    """Outcome of one collector run, in-process or in a worker process."""
+
+    def __init__(self, events: Optional[List[Event]] = None, unchanged: bool = False,
+                 pending_digest: Optional[str] = None, error: Optional[str] = None,
+                 bytes_fetched: int = 0):
+        self.events = events
+        self.unchanged = unchanged
+        self.pending_digest = pending_digest
+        self.error = error
+        self.bytes_fetched = bytes_fetched
+
+
+class ProcessLimits:
+    """
+    Per-worker limits (env COLLECTOR_TIMEOUT_SECONDS / COLLECTOR_MEMORY_MB / COLLECTOR_CPU_SECONDS).
+
+    The memory and CPU rlimits are per process: the browser processes a
+    worker spawns inherit them, but each gets its own allowance, so they
+    bound every process of the group, not the group's total.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, memory_mb: Optional[int] = None,
+                 cpu_seconds: Optional[int] = None):
+        self.timeout = timeout if timeout is not None else float(os.getenv("COLLECTOR_TIMEOUT_SECONDS", "600"))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv("COLLECTOR_MEMORY_MB", "2048"))
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else int(os.getenv("COLLECTOR_CPU_SECONDS", "900"))
+
+
+def _apply_limits(limits: ProcessLimits):
+    if resource is None:
+        return
+    if limits.memory_mb:
+        # RLIMIT_DATA rather than RLIMIT_AS: Chrome reserves large PROT_NONE address
+        # ranges up front, which RLIMIT_AS counts but RLIMIT_DATA does not. It caps
+        # each process separately (inherited by every browser child), not their sum.
+        cap = limits.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (cap, cap))
+    if limits.cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5))
+
+
+async def run_collector(module: str, cls: str, method: str, source: str,
+                        known_digest: Optional[str] = None, loader=None) -> CollectorRun:
+    """
+    Runs `module.cls().method()` in this process. `known_digest` enables the
+    unchanged-payload short-circuit; `loader(module, attr)` resolves the class.
+    """
+    try:
+        if loader is None:
+            collector = getattr(importlib.import_module(module), cls)()
+        else:
+            collector = loader(module, cls)()
+        if known_digest is not None:
+            from src.utils.change_detection import SourceDigestStore
+            store = SourceDigestStore(storage_file=None)
+            store.update(source, known_digest)
+            collector.digest_store = store
+        events = await getattr(collector, method)()
+        return CollectorRun(events, getattr(collector, "unchanged", False),
+                            getattr(collector, "pending_digest", None),
+                            bytes_fetched=getattr(collector, "bytes_fetched", 0))
+    except Exception as e:
+        return CollectorRun(error=f"{type(e).__name__}: {e}")
+
+
+def _worker(conn, module: str, cls: str, method: str, source: str,
+            known_digest: Optional[str], limits: ProcessLimits):
+    """Worker process entry point: runs one collector and sends back a CollectorRun."""
+    # Own process group, so a timeout kill also takes down the browser processes it spawned
+    if hasattr(os, "setsid"):
+        os.setsid()
+    _apply_limits(limits)
+    try:
+        from src.models.batch import EventBatch
+        run = asyncio.run(run_collector(module, cls, method, source, known_digest))
+        if run.error:
+            conn.send({"error": run.error})
+            return
+        # Events travel back as a columnar EventBatch (a few arrays instead of one pickle per model)
+        conn.send({
+            "batch": EventBatch.from_events(run.events) if run.events is not None else None,
+            "unchanged": run.unchanged,
+            "pending_digest": run.pending_digest,
+            "bytes_fetched": run.bytes_fetched,
+        })
+    except BaseException as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def _kill(process):
+    """SIGKILL the worker's whole process group (falls back to the worker alone); does not wait."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_in_process(module: str, cls: str, method: str, source: str,
+                         known_digest: Optional[str] = None,
+                         limits: Optional[ProcessLimits] = None) -> CollectorRun:
+    """
+    Runs `module.cls().method()` in a fresh worker process with memory/CPU
+    rlimits and a hard wall-clock timeout. Several of these can be awaited
+    together to scrape sources in parallel across cores. However the worker
+    ends (result, crash, rlimit signal, timeout), its process group is killed
+    afterwards, so no browser process outlives it.
+    """
+    limits = limits or ProcessLimits()
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_worker, name=f"collector-{cls}",
+        args=(child_conn, module, cls, method, source, known_digest, limits), daemon=True,
+    )
+    started = time.perf_counter()
+    process.start()
+    child_conn.close()
+    loop = asyncio.get_running_loop()
+    try:
+        ready = await loop.run_in_executor(None, parent_conn.poll, limits.timeout)
+        if not ready:
+            return CollectorRun(error=f"timed out after {limits.timeout:.0f}s (worker killed)")
+        try:
+            message = parent_conn.recv()
+        except EOFError:
+            await loop.run_in_executor(None, process.join, 5)
+            return CollectorRun(error=f"worker exited without a result (exit code {process.exitcode})")
+        # Let the worker exit on its own before its group is killed
+        await loop.run_in_executor(None, process.join, 5)
+    finally:
+        parent_conn.close()
+        # On every exit path: browser children left in the group would otherwise be orphaned
+        _kill(process)
+        # Reaped off the loop: a worker slow to die must not stall the other collectors
+        await loop.run_in_executor(None, process.join, 5)
+
+    print(f"[Isolation] {cls} worker finished in {time.perf_counter() - started:.1f}s (exit code {process.exitcode})")
+    if "error" in message:
+        return CollectorRun(error=message["error"])
+    batch = message["batch"]
+    return CollectorRun(
+        events=batch.to_events() if batch is not None else None,
+        unchanged=message["unchanged"],
+        pending_digest=message["pending_digest"],
+        bytes_fetched=message["bytes_fetched"],
+    )
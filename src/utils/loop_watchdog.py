@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from src.utils.tracing import Tracer, task_stage
+
+# Frames kept from the blocked loop thread's stack (innermost last)
+STACK_DEPTH = 15
+
+
+class LoopWatchdog:
+    """
+    Measures event-loop lag and reports callbacks that block the loop.
+
+    A heartbeat task sleeps `interval` seconds at a time and records how late
+    it wakes up (the loop lag). A watcher thread notices when the heartbeat
+    has not run for longer than `threshold`, i.e. something is holding the
+    loop, and captures the loop thread's stack, the running task and the
+    trace stage it is in. When the loop is released the stall's full
+    duration is logged and, with a Tracer, added to the run's trace records.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, interval: Optional[float] = None,
+                 tracer: Optional[Tracer] = None):
+        self.threshold = threshold if threshold is not None else float(os.getenv("LOOP_LAG_THRESHOLD_MS", "200")) / 1000
+        self.interval = interval if interval is not None else float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "50")) / 1000
+        self.tracer = tracer
+        self.stalls: List[dict] = []
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = 0.0
+        self._open_stall: Optional[dict] = None
+        self._beat_task = None
+        self._watcher = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls, tracer: Optional[Tracer] = None) -> Optional["LoopWatchdog"]:
+        """A watchdog unless LOOP_WATCHDOG=false."""
+        if os.getenv("LOOP_WATCHDOG", "true").lower() != "true":
+            return None
+        return cls(tracer=tracer)
+
+    def start(self):
+        """Starts watching the running loop (call from inside it)."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._beat_task = self._loop.create_task(self._beat(), name="loop-watchdog")
+        self._watcher = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watcher.start()
+
+    async def stop(self) -> dict:
+        """Stops watching; logs and returns the lag summary."""
+        self._stopped.set()
+        with self._lock:
+            stall, self._open_stall = self._open_stall, None
+        if stall is not None:
+            # The run ended before the heartbeat woke up again: only the lower bound is known
+            stall["ongoing_at_stop"] = True
+            self._close_stall(stall, stall.pop("detected_after_s"))
+        if self._beat_task is not None:
+            self._beat_task.cancel()
+            await asyncio.gather(self._beat_task, return_exceptions=True)
+        if self._watcher is not None:
+            self._watcher.join(1)
+        summary = self.summary()
+        print(f"[LoopWatchdog] Loop lag: max {summary['lag_max_ms']} ms, mean {summary['lag_mean_ms']} ms, "
+              f"{summary['stalls']} stall(s) over {self.threshold * 1000:.0f} ms")
+        if self.tracer is not None:
+            self.tracer.gauge("pipeline_loop_lag_max_seconds", self.lag_max, "Largest event-loop lag seen during the run.")
+            self.tracer.gauge("pipeline_loop_stalls", len(self.stalls), "Callbacks that blocked the event loop past the threshold.")
+            self.tracer.gauge("pipeline_loop_blocked_seconds", sum(s["blocked_s"] for s in self.stalls),
+                              "Total time the event loop was blocked by stalls.")
+        return summary
+
+    def summary(self) -> dict:
+        return {
+            "lag_max_ms": round(self.lag_max * 1000, 1),
+            "lag_mean_ms": round(self.lag_total / self.samples * 1000, 1) if self.samples else 0.0,
+            "samples": self.samples,
+            "stalls": len(self.stalls),
+            "stall_stages": sorted({s["stage"] or "?" for s in self.stalls}),
+        }
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - self._last_beat - self.interval)
+            self.samples += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            # Under the lock, so a capture still in flight cannot attach to the next beat
+            with self._lock:
+                stall, self._open_stall = self._open_stall, None
+                self._last_beat = now
+            if stall is not None:
+                self._close_stall(stall, lag)
+
+    def _watch(self):
+        """Watcher thread: captures where the loop is stuck while it is still stuck."""
+        reported_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._last_beat
+            if beat == reported_beat or time.monotonic() - beat - self.interval < self.threshold:
+                continue
+            reported_beat = beat
+            stall = self._capture()
+            stall["detected_after_s"] = time.monotonic() - beat - self.interval
+            with self._lock:
+                if self._last_beat == beat:
+                    self._open_stall = stall
+
+    def _capture(self) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame)[-STACK_DEPTH:] if frame is not None else []
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        return {
+            "stage": task_stage(task),
+            "task": task.get_name() if task is not None else None,
+            "stack": [line for entry in stack for line in entry.rstrip().splitlines()],
+        }
+
+    def _close_stall(self, stall: dict, blocked: float):
+        stall.pop("detected_after_s", None)
+        stall["blocked_s"] = round(blocked, 4)
+        self.stalls.append(stall)
+        print(f"[LoopWatchdog] Event loop blocked for {blocked * 1000:.0f} ms in stage "
+              f"'{stall['stage'] or '?'}' (task {stall['task']}):\n" + "\n".join(stall["stack"][-8:]))
+        if self.tracer is not None:
+            self.tracer.log("loop_stall", **stall)
+
+
+# Dedicated pool for known-blocking calls, separate from the loop's default executor
+# (which run_in_executor(None, ...) users such as the browser collectors share)
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _offload_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=int(os.getenv("LOOP_OFFLOAD_WORKERS", "4")),
+                                       thread_name_prefix="blocking-io")
+        return _pool
+
+
+def offload_enabled() -> bool:
+    return os.getenv("LOOP_OFFLOAD", "true").lower() == "true"
+
+
+async def offload(fn: Callable, *args, **kwargs):
+    """
+    Awaits a known-blocking call (calendar API, memory file writes, rendering)
+    on the dedicated thread pool, so it does not stall the loop. The calling
+    context (trace span) is carried over. With LOOP_OFFLOAD=false the call runs
+    inline, which makes the stalls visible to the watchdog again.
+    """
+    if not offload_enabled():
+        return fn(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_offload_pool(), functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def install_loop_policy() -> str:
+    """Installs uvloop's event loop policy when LOOP_POLICY=uvloop and it is installed."""
+    if os.getenv("LOOP_POLICY", "asyncio").lower() != "uvloop":
+        return "asyncio"
+    try:
+        import uvloop
+    except ImportError:
+        print("[LoopWatchdog] LOOP_POLICY=uvloop but uvloop is not installed; using asyncio.")
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
@@ -1,78 +1,651 @@
 import json
+import mmap
 import os
 import hashlib
-from datetime import datetime
-from typing import List, Set, Dict, Optional
+import struct
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.utils.history_archive import HistoryArchive
+from src.utils.normalization import NEW_YORK, to_local_naive
+
+FORMAT_VERSION = 2
+MAGIC = b"EVTMEM\x00\x00"
+_PREAMBLE = struct.Struct("<8sH")
+# magic, version, google-ID width, source count, bloom hash count, record count, bloom size in
+# bytes, offset of the first record, of the start-time index and of the details heap, last update
+_HEADER = struct.Struct("<8sHHHHQQQQQd")
+# Version 1 (no start times or details): ..., bloom size, offset of the first record, last update
+_HEADER_V1 = struct.Struct("<8sHHHHQQQd")
+# Journal entry: op ('U' upsert / 'D' delete), digest, start, source/google-ID/details lengths
+_JOURNAL = struct.Struct("<c16sqHHI")
+# Version 1 journal entry ('+' / '-'): op, digest, source length, google-ID length
+_JOURNAL_V1 = struct.Struct("<c16sHH")
+_NO_SOURCE = 0xFFFF
+# Start of entries migrated from formats without start times: sorts last, never expires
+UNDATED = int(np.iinfo(np.int64).max)
+
+DIGEST_SIZE = 16
+# Version of the event key: 2 hashes the NYC wall-clock start, 1 hashed str() of the start as parsed
+KEY_VERSION = 2
+BLOOM_BITS_PER_ENTRY = 10  # ~1% false positives with 7 hashes
+BLOOM_HASHES = 7
+# The journal is folded into the sorted file once it holds this many entries or 10% of the records
+JOURNAL_COMPACT_MIN = 1000
+JOURNAL_COMPACT_RATIO = 0.1
+
+# (google_id, source, start seconds, "title\x1fvenue" bytes)
+Entry = Tuple[Optional[str], Optional[str], int, bytes]
+
+
+def _record_dtype(gid_width: int) -> np.dtype:
+    return np.dtype([("digest", "V16"), ("source", "<u2"), ("start", "<i8"),
+                     ("detail_off", "<u8"), ("detail_len", "<u4"), ("gid", f"S{gid_width}")])
+
+
+def wall_seconds(dt: datetime) -> int:
+    """NYC wall-clock time as seconds since 1970-01-01 00:00 (the hot tier's time key)."""
+    return int(to_local_naive(dt).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _wall_iso(seconds: int) -> Optional[str]:
+    if seconds == UNDATED:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def event_digest(event) -> bytes:
+    """
+    The 16-byte MD5 identifying an event (title, NYC wall-clock start, venue).
+    Cached on the event, so each event is hashed once per run however many
+    sectors and lookups it goes through.
+    """
+    key = (event.title, event.start_time, event.venue)
+    cached = event._memory_digest
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    # Normalize data to ensure consistent hashing (NYC wall time, whatever the tz)
+    raw_str = f"{event.title}|{to_local_naive(event.start_time)}|{event.venue}".lower().strip()
+    digest = hashlib.md5(raw_str.encode()).digest()
+    event._memory_digest = (key, digest)
+    return digest
+
+
+def legacy_digests(event) -> List[bytes]:
+    """
+    Version 1 keys an event with an offset-aware start may have had: its start
+    was hashed with the offset the source gave (NWS sends NYC offsets, "Z"
+    became UTC). Naive starts hashed the same under both versions.
+    """
+    start = event.start_time
+    if start.tzinfo is None:
+        return []
+    candidates = {str(start), str(start.astimezone(NEW_YORK)), str(start.astimezone(timezone.utc))}
+    return [hashlib.md5(f"{event.title}|{candidate}|{event.venue}".lower().strip().encode()).digest()
+            for candidate in sorted(candidates)]
+
+
+def _bloom_hashes(digest: bytes) -> Tuple[int, int]:
+    # Double hashing over the two halves of the MD5 (probe i is h1 + i*h2): no further hashing
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+
+def _bloom_build(digests: np.ndarray, nbytes: int) -> bytes:
+    """Bloom filter bit array over an (n, 2) array of big-endian digest halves."""
+    bits = nbytes * 8
+    if len(digests) == 0:
+        return bytes(nbytes)
+    h1 = digests[:, 0] % bits
+    h2 = (digests[:, 1] | 1) % bits
+    filled = np.zeros(bits, dtype=bool)
+    for i in range(BLOOM_HASHES):
+        filled[(h1 + np.uint64(i) * h2) % bits] = True
+    return np.packbits(filled, bitorder="little").tobytes()
+
 
 class EventMemory:
     """
     Manages a persistent record of processed events to avoid duplicates,
     identify new events, and track Google Calendar IDs for sync.
+
+    This is the hot tier: only events still relevant for calendar sync. It is a
+    binary file of fixed-width records (16-byte MD5 digest, source index, start
+    time, title/venue location, Google Calendar ID) sorted by digest, behind a
+    Bloom filter, followed by a start-time index and a title/venue heap. The
+    file is memory-mapped: opening it reads only the header and source table, a
+    lookup is a Bloom probe and, for possible hits, a binary search. Changes are
+    appended to a journal and folded into the sorted file by `compact()`.
+
+    Entries leave the hot tier when their event has started (`evict_before`)
+    or disappears from the sources (`remove_event`); either way they are
+    appended to the cold HistoryArchive next to the memory file. JSON and
+    version 1 memory files are migrated on first load. Entries keyed by the
+    version 1 event key are re-keyed once by `migrate_keys`.
     """
     def __init__(self, storage_file: str = "data/event_memory.json"):
         self.storage_file = storage_file
-        # Map: hash_id -> google_event_id (or None if not on calendar)
-        self.event_map: Dict[str, Optional[str]] = {} 
+        base, ext = os.path.splitext(storage_file)
+        self.binary_file = base + ".bin" if ext == ".json" else storage_file
+        self.journal_file = self.binary_file + ".log"
+        # Holds the event key version the entries use (absent: version 1)
+        self.keys_file = self.binary_file + ".keys"
+        self.key_version = KEY_VERSION
+        self.archive = HistoryArchive(os.path.splitext(self.binary_file)[0] + ".archive")
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._gid_width = 0
+        self._sources: List[str] = []
+        self._bloom_offset = 0
+        self._bloom_bits = 0
+        self._records_offset = 0
+        self._order_offset = 0
+        self._heap_offset = 0
+        self._record = struct.Struct("<16sHqQI0s")
+        # digest -> entry for upserts, None for removals, since the last compaction
+        self._changes: Dict[bytes, Optional[Entry]] = {}
+        # Removals whose archive records and journal entries are written by flush()
+        self._pending: List[Tuple[bytes, dict]] = []
+        self._journal_entries = 0
+        self._size = 0
         self.load()
 
     def _generate_id(self, event) -> str:
         """Generates a consistent hash ID for an event."""
-        # Normalize data to ensure consistent hashing
-        raw_str = f"{event.title}|{event.start_time}|{event.venue}".lower().strip()
-        return hashlib.md5(raw_str.encode()).hexdigest()
+        return event_digest(event).hex()
+
+    # --- Loading ---
 
     def load(self):
-        """Loads data from the storage file."""
-        if os.path.exists(self.storage_file):
+        """Maps the binary file, migrating older formats, and replays the journal."""
+        self.close()
+        self._changes = {}
+        self._pending = []
+        self._journal_entries = 0
+        if not os.path.exists(self.binary_file) and os.path.exists(self.storage_file) \
+                and self.storage_file != self.binary_file:
+            self._migrate_json()
+        if os.path.exists(self.binary_file):
             try:
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    
-                    # Migration Logic: Handle old format (list of IDs)
-                    if "processed_ids" in data and isinstance(data["processed_ids"], list):
-                        # Convert list to dict with None values
-                        self.event_map = {uid: None for uid in data["processed_ids"]}
-                    else:
-                        # New format
-                        self.event_map = data.get("event_map", {})
+                self._map()
             except Exception as e:
                 print(f"[EventMemory] Warning: Failed to load memory file: {e}")
-                self.event_map = {}
+                self.close()
         else:
-            os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+            os.makedirs(os.path.dirname(os.path.abspath(self.binary_file)), exist_ok=True)
+        self._size = self._count
+        self._replay_journal()
+        self._load_key_version()
 
-    def save(self):
-        """Saves current state to the storage file."""
+    def _load_key_version(self):
+        if os.path.exists(self.keys_file):
+            with open(self.keys_file, "r") as f:
+                self.key_version = int(f.read().strip() or 1)
+        elif self._size:
+            self.key_version = 1
+        else:
+            # Nothing stored under an older key
+            self._save_key_version()
+
+    def _save_key_version(self):
+        self.key_version = KEY_VERSION
+        with open(self.keys_file, "w") as f:
+            f.write(str(KEY_VERSION))
+
+    def _map(self):
+        with open(self.binary_file, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _PREAMBLE.unpack_from(mm, 0)
+        if magic == MAGIC and version == 1:
+            self._upgrade_v1(mm)
+            return self._map()
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mm.close()
+            raise ValueError(f"unsupported memory file (magic {magic!r}, version {version})")
+        (_, _, gid_width, n_sources, bloom_k, count, bloom_bytes,
+         records_offset, order_offset, heap_offset, _) = _HEADER.unpack_from(mm, 0)
+        if bloom_k != BLOOM_HASHES:
+            mm.close()
+            raise ValueError(f"unsupported Bloom filter ({bloom_k} hashes)")
+        self._sources, self._bloom_offset = self._read_sources(mm, _HEADER.size, n_sources)
+        self._mm = mm
+        self._count = count
+        self._gid_width = gid_width
+        self._bloom_bits = bloom_bytes * 8
+        self._records_offset = records_offset
+        self._order_offset = order_offset
+        self._heap_offset = heap_offset
+        self._record = struct.Struct(f"<16sHqQI{gid_width}s")
+
+    @staticmethod
+    def _read_sources(mm, offset: int, n_sources: int) -> Tuple[List[str], int]:
+        sources = []
+        for _ in range(n_sources):
+            (length,) = struct.unpack_from("<H", mm, offset)
+            sources.append(mm[offset + 2:offset + 2 + length].decode())
+            offset += 2 + length
+        return sources, offset
+
+    def _upgrade_v1(self, mm):
+        """Rewrites a version 1 file (digest, source, Google ID) with undated, detail-less entries."""
+        _, _, gid_width, n_sources, _, count, _, records_offset, _ = _HEADER_V1.unpack_from(mm, 0)
+        sources, _ = self._read_sources(mm, _HEADER_V1.size, n_sources)
+        stored = np.frombuffer(mm, count=count, offset=records_offset,
+                               dtype=np.dtype([("digest", "V16"), ("source", "<u2"), ("gid", f"S{gid_width}")]))
+        records = np.zeros(count, dtype=_record_dtype(gid_width))
+        for field in ("digest", "source", "gid"):
+            records[field] = stored[field]
+        records["start"] = UNDATED
+        del stored
+        mm.close()
+        self._write_array(records, [b""] * count, sources, gid_width)
+        print(f"[EventMemory] Upgraded {self.binary_file} to format version {FORMAT_VERSION} ({count} entries)")
+
+    def _migrate_json(self):
         try:
-            with open(self.storage_file, 'w') as f:
-                json.dump({
-                    "last_updated": datetime.now().isoformat(),
-                    "event_map": self.event_map
-                }, f, indent=2)
+            with open(self.storage_file, "r") as f:
+                data = json.load(f)
         except Exception as e:
-            print(f"[EventMemory] Error saving memory file: {e}")
+            print(f"[EventMemory] Warning: Failed to load memory file: {e}")
+            return
+        # Oldest format: a bare list of IDs
+        if "processed_ids" in data and isinstance(data["processed_ids"], list):
+            event_map = {uid: None for uid in data["processed_ids"]}
+        else:
+            event_map = data.get("event_map", {})
+        source_map = data.get("source_map", {})
+        entries = {bytes.fromhex(uid): (gid, source_map.get(uid), UNDATED, b"") for uid, gid in event_map.items()}
+        self._write(list(entries.items()))
+        os.replace(self.storage_file, self.storage_file + ".migrated")
+        print(f"[EventMemory] Migrated {len(entries)} entries from {self.storage_file} to {self.binary_file}")
 
-    def is_new(self, event) -> bool:
-        """Checks if an event is new (hash not in map)."""
-        event_id = self._generate_id(event)
-        return event_id not in self.event_map
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset < len(data):
+            if data[offset:offset + 1] in (b"+", b"-"):
+                if offset + _JOURNAL_V1.size > len(data):
+                    break
+                op, digest, source_len, gid_len = _JOURNAL_V1.unpack_from(data, offset)
+                start, details_len, header = UNDATED, 0, _JOURNAL_V1.size
+            else:
+                if offset + _JOURNAL.size > len(data):
+                    break
+                op, digest, start, source_len, gid_len, details_len = _JOURNAL.unpack_from(data, offset)
+                header = _JOURNAL.size
+            end = offset + header + source_len + gid_len + details_len
+            if end > len(data):
+                break  # Entry cut short by a crash mid-write
+            if op in (b"-", b"D"):
+                self._apply(digest, None)
+            else:
+                at = offset + header
+                source = data[at:at + source_len].decode()
+                gid = data[at + source_len:at + source_len + gid_len].decode()
+                self._apply(digest, (gid or None, source or None, start, data[end - details_len:end]))
+            self._journal_entries += 1
+            offset = end
 
-    def mark_processed(self, event, google_event_id: Optional[str] = None):
-        """Marks an event as processed and stores its Google Calendar ID."""
-        event_id = self._generate_id(event)
-        self.event_map[event_id] = google_event_id
-        self.save()
+    # --- Lookups ---
+
+    def _find(self, digest: bytes) -> int:
+        """Index of `digest` in the sorted records, or -1."""
+        if self._mm is None or self._count == 0:
+            return -1
+        mm, bloom, bits = self._mm, self._bloom_offset, self._bloom_bits
+        h1, h2 = _bloom_hashes(digest)
+        for i in range(BLOOM_HASHES):
+            pos = (h1 + i * h2) % bits
+            if not mm[bloom + (pos >> 3)] & (1 << (pos & 7)):
+                return -1  # Definitely not stored
+        size, start = self._record.size, self._records_offset
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = start + mid * size
+            probe = mm[at:at + DIGEST_SIZE]
+            if probe < digest:
+                lo = mid + 1
+            elif probe > digest:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def _stored(self, index: int) -> Tuple[bytes, Entry]:
+        """(digest, entry) of the record at `index`."""
+        digest, source, start, detail_off, detail_len, gid = self._record.unpack_from(
+            self._mm, self._records_offset + index * self._record.size)
+        at = self._heap_offset + detail_off
+        return digest, (gid.rstrip(b"\x00").decode() or None,
+                        self._sources[source] if source != _NO_SOURCE else None,
+                        start, self._mm[at:at + detail_len])
+
+    def _entry(self, digest: bytes) -> Optional[Entry]:
+        """Entry stored for `digest`, or None when it is unknown."""
+        if digest in self._changes:
+            return self._changes[digest]
+        index = self._find(digest)
+        return self._stored(index)[1] if index >= 0 else None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, event_hash: str) -> bool:
+        return self._entry(bytes.fromhex(event_hash)) is not None
+
+    def is_new(self, event) -> bool:
+        """Checks if an event is new (hash not in memory)."""
+        return self._entry(event_digest(event)) is None
 
     def get_google_id(self, event_hash: str) -> Optional[str]:
         """Returns the Google Calendar ID for a given hash."""
-        return self.event_map.get(event_hash)
+        entry = self._entry(bytes.fromhex(event_hash))
+        return entry[0] if entry else None
 
-    def remove_event(self, event_hash: str):
-        """Removes an event from memory."""
-        if event_hash in self.event_map:
-            del self.event_map[event_hash]
-            self.save()
+    def get_source(self, event_hash: str) -> Optional[str]:
+        """Returns the source recorded for a given hash (None for entries saved before sources were tracked)."""
+        entry = self._entry(bytes.fromhex(event_hash))
+        return entry[1] if entry else None
 
     def get_all_ids(self) -> List[str]:
         """Returns a list of all currently tracked event hashes."""
-        return list(self.event_map.keys())
+        ids = []
+        if self._mm is not None:
+            size, start, changes = self._record.size, self._records_offset, self._changes
+            mm = self._mm
+            for at in range(start, start + self._count * size, size):
+                digest = mm[at:at + DIGEST_SIZE]
+                if digest not in changes:
+                    ids.append(digest.hex())
+        ids.extend(digest.hex() for digest, entry in self._changes.items() if entry is not None)
+        return ids
+
+    # --- Changes ---
+
+    def _apply(self, digest: bytes, entry: Optional[Entry]):
+        known = self._entry(digest) is not None
+        self._changes[digest] = entry
+        self._size += (entry is not None) - known
+
+    def _log(self, entries: List[Tuple[bytes, Optional[Entry]]]):
+        chunks = []
+        for digest, entry in entries:
+            if entry is None:
+                chunks.append(_JOURNAL.pack(b"D", digest, UNDATED, 0, 0, 0))
+                continue
+            gid, source, start, details = entry
+            source_bytes, gid_bytes = (source or "").encode(), (gid or "").encode()
+            chunks.append(_JOURNAL.pack(b"U", digest, start, len(source_bytes), len(gid_bytes), len(details))
+                          + source_bytes + gid_bytes + details)
+        with open(self.journal_file, "ab") as f:
+            f.write(b"".join(chunks))
+        self._journal_entries += len(entries)
+
+    @staticmethod
+    def _event_entry(event, google_event_id: Optional[str]) -> Entry:
+        return (google_event_id, event.source, wall_seconds(event.start_time),
+                f"{event.title}\x1f{event.venue}".encode())
+
+    def mark_processed(self, event, google_event_id: Optional[str] = None):
+        """Marks an event as processed and stores its Google Calendar ID."""
+        digest = event_digest(event)
+        entry = self._event_entry(event, google_event_id)
+        self._apply(digest, entry)
+        self._log([(digest, entry)])
+
+    def migrate_keys(self, events) -> int:
+        """
+        One-time re-key of entries stored under version 1 keys, which cannot be
+        recomputed from the memory alone (migrated entries hold only the
+        digest): each event of the run whose version 1 key is stored moves to
+        its current key, keeping its Google Calendar ID. Returns the count.
+        """
+        if self.key_version >= KEY_VERSION:
+            return 0
+        changes = []
+        for event in events:
+            digest = event_digest(event)
+            if self._entry(digest) is not None:
+                continue
+            for legacy in legacy_digests(event):
+                entry = self._entry(legacy)
+                if entry is not None and legacy != digest:
+                    changes.append((legacy, None))
+                    changes.append((digest, self._event_entry(event, entry[0])))
+                    self._apply(legacy, None)
+                    self._apply(digest, changes[-1][1])
+                    break
+        if changes:
+            self._log(changes)
+        self._save_key_version()
+        print(f"[EventMemory] Re-keyed {len(changes) // 2} entries to event key version {KEY_VERSION}")
+        return len(changes) // 2
+
+    def fill_details(self, event) -> bool:
+        """Records start time, title and venue of a known event migrated without them."""
+        digest = event_digest(event)
+        entry = self._entry(digest)
+        if entry is None or entry[2] != UNDATED:
+            return False
+        entry = self._event_entry(event, entry[0])
+        self._apply(digest, entry)
+        self._log([(digest, entry)])
+        return True
+
+    def _archive_record(self, digest: bytes, entry: Entry, reason: str) -> dict:
+        gid, source, start, details = entry
+        title, _, venue = details.decode().partition("\x1f")
+        return {"hash": digest.hex(), "title": title or None, "venue": venue or None, "source": source,
+                "start_time": _wall_iso(start), "google_id": gid, "reason": reason,
+                "archived_at": datetime.now().isoformat()}
+
+    def _retire(self, digest: bytes, entry: Entry, reason: str):
+        self._apply(digest, None)
+        self._pending.append((digest, self._archive_record(digest, entry, reason)))
+
+    def remove_event(self, event_hash: str):
+        """Removes an event from memory (it is archived as 'removed' on the next flush)."""
+        digest = bytes.fromhex(event_hash)
+        entry = self._entry(digest)
+        if entry is not None:
+            self._retire(digest, entry, "removed")
+
+    def evict_before(self, cutoff: datetime) -> int:
+        """
+        Moves every entry whose event starts before `cutoff` to the archive as
+        'expired'. Walks the start-time index only as far as the cutoff, so the
+        cost follows the number of evicted entries, not the size of the memory.
+        """
+        limit = wall_seconds(cutoff)
+        evicted = 0
+        if self._mm is not None:
+            mm, order = self._mm, self._order_offset
+            start_at = self._records_offset + DIGEST_SIZE + 2
+            size = self._record.size
+            for pos in range(self._count):
+                (index,) = struct.unpack_from("<I", mm, order + 4 * pos)
+                (start,) = struct.unpack_from("<q", mm, start_at + index * size)
+                if start >= limit:
+                    break
+                digest, entry = self._stored(index)
+                if digest not in self._changes:
+                    self._retire(digest, entry, "expired")
+                    evicted += 1
+        for digest, entry in list(self._changes.items()):
+            if entry is not None and entry[2] < limit:
+                self._retire(digest, entry, "expired")
+                evicted += 1
+        self.flush()
+        return evicted
+
+    def flush(self) -> int:
+        """Writes pending removals: archive records first, then the journal entries."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        self.archive.append([record for _, record in pending])
+        self._log([(digest, None) for digest, _ in pending])
+        return len(pending)
+
+    def clear(self):
+        """Forgets every event and deletes the memory files and the archive."""
+        self.close()
+        for path in (self.binary_file, self.journal_file, self.keys_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self.archive.clear()
+        self.load()
+
+    # --- Compaction ---
+
+    def compact_if_needed(self) -> bool:
+        """Flushes, then compacts when the journal has grown past JOURNAL_COMPACT_MIN / JOURNAL_COMPACT_RATIO."""
+        self.flush()
+        if self._journal_entries >= max(JOURNAL_COMPACT_MIN, self._count * JOURNAL_COMPACT_RATIO):
+            self.compact()
+            return True
+        return False
+
+    def save(self):
+        """Saves current state to the storage file."""
+        self.compact()
+
+    def compact(self):
+        """Folds the journal into a new sorted file (written to a temp file, then renamed)."""
+        self.flush()
+        try:
+            self._write_merged()
+        except Exception as e:
+            print(f"[EventMemory] Error saving memory file: {e}")
+            return
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self.load()
+
+    def _base_records(self, gid_width: int) -> Tuple[np.ndarray, List[bytes]]:
+        records = np.zeros(self._count, dtype=_record_dtype(gid_width))
+        if self._mm is None or self._count == 0:
+            return records, []
+        stored = np.frombuffer(self._mm, count=self._count, offset=self._records_offset,
+                               dtype=_record_dtype(self._gid_width))
+        for field in records.dtype.names:
+            records[field] = stored[field]
+        heap = self._mm[self._heap_offset:]
+        details = [heap[off:off + length] for off, length in
+                   zip(stored["detail_off"].tolist(), stored["detail_len"].tolist())]
+        return records, details
+
+    def _write_merged(self):
+        """Applies the pending changes to the mapped records with numpy and writes the result."""
+        sources = list(self._sources)
+        source_index = {name: i for i, name in enumerate(sources)}
+        gid_width = max([self._gid_width] + [len((e[0] or "").encode()) for e in self._changes.values() if e])
+        records, details = self._base_records(gid_width)
+
+        updates, inserts, removals = [], [], []
+        for digest, entry in sorted(self._changes.items()):
+            index = self._find(digest)
+            if entry is None:
+                if index >= 0:
+                    removals.append(index)
+                continue
+            gid, source, start, detail = entry
+            if source is not None and source not in source_index:
+                source_index[source] = len(sources)
+                sources.append(source)
+            row = (digest, source_index[source] if source is not None else _NO_SOURCE, start, 0, 0,
+                   (gid or "").encode())
+            if index >= 0:
+                updates.append((index, row, detail))
+            else:
+                inserts.append((row, detail))
+        for index, row, detail in updates:
+            records[index] = row
+            details[index] = detail
+        if removals:
+            records = np.delete(records, removals)
+            removed = set(removals)
+            details = [d for i, d in enumerate(details) if i not in removed]
+        if inserts:
+            keys = records["digest"].tobytes()
+            # Insertion points by binary search over the (already sorted) digests
+            positions = [self._bisect(keys, len(records), row[0]) for row, _ in inserts]
+            records = np.insert(records, positions, np.array([row for row, _ in inserts], dtype=records.dtype))
+            merged, previous = [], 0
+            for position, (_, detail) in zip(positions, inserts):
+                merged.extend(details[previous:position])
+                merged.append(detail)
+                previous = position
+            details = merged + details[previous:]
+        self._write_array(records, details, sources, gid_width)
+
+    @staticmethod
+    def _bisect(keys: bytes, count: int, digest: bytes) -> int:
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[mid * DIGEST_SIZE:(mid + 1) * DIGEST_SIZE] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _write(self, entries: List[Tuple[bytes, Entry]]):
+        """Writes (digest, entry) pairs as a new file."""
+        sources = sorted({entry[1] for _, entry in entries if entry[1] is not None})
+        source_index = {name: i for i, name in enumerate(sources)}
+        gid_width = max([0] + [len((entry[0] or "").encode()) for _, entry in entries])
+        records = np.zeros(len(entries), dtype=_record_dtype(gid_width))
+        details = []
+        if entries:
+            records["digest"] = np.frombuffer(b"".join(digest for digest, _ in entries), dtype="V16")
+            records["source"] = [source_index[e[1]] if e[1] is not None else _NO_SOURCE for _, e in entries]
+            records["start"] = [e[2] for _, e in entries]
+            records["gid"] = [(e[0] or "").encode() for _, e in entries]
+            halves = np.frombuffer(records["digest"].tobytes(), dtype=">u8").reshape(-1, 2)
+            order = np.lexsort((halves[:, 1], halves[:, 0]))
+            records = records[order]
+            details = [entries[i][1][3] for i in order.tolist()]
+        self._write_array(records, details, sources, gid_width)
+
+    def _write_array(self, records: np.ndarray, details: List[bytes], sources: List[str], gid_width: int):
+        count = len(records)
+        lengths = np.array([len(d) for d in details], dtype=np.uint64)
+        records["detail_len"] = lengths
+        records["detail_off"] = np.cumsum(lengths) - lengths
+        # Start-time index: record positions in start order (ties keep digest order)
+        order = np.argsort(records["start"], kind="stable").astype("<u4")
+        bloom_bytes = max(8, (count * BLOOM_BITS_PER_ENTRY + 7) // 8)
+        halves = np.frombuffer(records["digest"].tobytes(), dtype=">u8").reshape(-1, 2).astype(np.uint64)
+        table = b"".join(struct.pack("<H", len(s.encode())) + s.encode() for s in sources)
+        records_offset = _HEADER.size + len(table) + bloom_bytes
+        order_offset = records_offset + records.nbytes
+        heap_offset = order_offset + order.nbytes
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, gid_width, len(sources), BLOOM_HASHES, count,
+                              bloom_bytes, records_offset, order_offset, heap_offset, datetime.now().timestamp())
+        tmp_file = f"{self.binary_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(header)
+            f.write(table)
+            f.write(_bloom_build(halves, bloom_bytes))
+            f.write(records.tobytes())
+            f.write(order.tobytes())
+            f.write(b"".join(details))
+        # Unmap first: the old file is replaced underneath the mapping
+        self.close()
+        os.replace(tmp_file, self.binary_file)
+
+    def close(self):
+        """Releases the memory map."""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._count = 0
+        self._gid_width = 0
+        self._sources = []
+        self._record = struct.Struct("<16sHqQI0s")
@@ -1,19 +1,201 @@
-from datetime import datetime
 import re
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
-def normalize_iso_format(date_str: str) -> datetime:
+NEW_YORK = ZoneInfo("America/New_York")
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate((
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+        ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+        ("september", "sep", "sept"), ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ), start=1)
+    for name in names
+}
+_CLOCK = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*([ap])\.?\s*m\.?$", re.IGNORECASE)
+
+
+class DateParseError(ValueError):
+    """A date value that none of the known formats could parse."""
+
+    def __init__(self, value, source: str):
+        super().__init__(f"{source}: unrecognised date {value!r}")
+        self.value = value
+        self.source = source
+
+
+def _iso_datetime(m, value: str, reference: Optional[datetime]):
+    # fromisoformat only accepts a trailing 'Z' from Python 3.11 on
+    return datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith(("Z", "z")) else value)
+
+
+def _ymd(m, value: str, reference: Optional[datetime]):
+    return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+
+
+def _mdy(m, value: str, reference: Optional[datetime]):
+    return datetime(int(m.group(3)), int(m.group(1)), int(m.group(2)))
+
+
+def _month_day_year(m, value: str, reference: Optional[datetime]):
+    month = _MONTHS.get(m.group(1).lower())
+    if month is None:
+        raise ValueError(f"unknown month {m.group(1)!r}")
+    return datetime(int(m.group(3)), month, int(m.group(2)))
+
+
+def _month_day(m, value: str, reference: Optional[datetime]):
+    """'June 6', 'July 4 @ 7:00 pm': the next such date on or after the reference day."""
+    month = _MONTHS.get(m.group(1).lower())
+    if month is None:
+        raise ValueError(f"unknown month {m.group(1)!r}")
+    today = (reference or datetime.now(NEW_YORK)).date()
+    day = date(today.year, month, int(m.group(2)))
+    if day < today:
+        day = day.replace(year=today.year + 1)
+    clock = parse_clock(value[m.end():].lstrip(" @,").split("-")[0])
+    return datetime.combine(day, clock or time())
+
+
+def _epoch(m, value: str, reference: Optional[datetime]):
+    return datetime.fromtimestamp(int(value), tz=NEW_YORK)
+
+
+# (name, detector, parser). Detectors are precompiled and cheap; a parser only runs
+# on a value its detector matched. Order matters only for values no source has seen yet.
+FORMATS: List[Tuple[str, "re.Pattern", Callable]] = [
+    ("iso_datetime", re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}"), _iso_datetime),
+    ("iso_date", re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$"), _ymd),
+    ("slash_ymd", re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})$"), _ymd),
+    ("slash_mdy", re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$"), _mdy),
+    ("month_day_year", re.compile(r"^([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})$"), _month_day_year),
+    ("month_day", re.compile(r"^([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?\b"), _month_day),
+    ("epoch_seconds", re.compile(r"^\d{9,10}$"), _epoch),
+]
+
+
+class DateNormalizer:
     """
-    Attempts to parse various date strings into a datetime object.
-    Simplified for Phase 1.
+    Turns the date strings collectors scrape into tz-aware America/New_York
+    datetimes.
+
+    Each source's last successful format is tried first, so a feed that always
+    uses one format costs a single detector match and parse per value. Naive
+    values are taken as New York wall time; values with an offset are converted.
+    Unparseable values raise DateParseError (`parse`) or are recorded per
+    source and returned as None (`try_parse`, `parse_many`), never replaced
+    by "now", which would create phantom events dated today.
+    """
+
+    def __init__(self, tz: ZoneInfo = NEW_YORK):
+        self.tz = tz
+        self.last_format: Dict[str, int] = {}
+        self.failures: Dict[str, List[str]] = defaultdict(list)
+        self.parsed = 0
+        self.first_try_hits = 0
+
+    def _localize(self, dt: datetime) -> datetime:
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=self.tz)
+        return dt.astimezone(self.tz)
+
+    def parse(self, value, source: str = "default", reference: Optional[datetime] = None) -> datetime:
+        """One value (string, epoch number or datetime) as an aware datetime; raises DateParseError."""
+        if isinstance(value, date):
+            if not hasattr(value, "hour"):
+                value = datetime(value.year, value.month, value.day)
+            return self._localize(value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return datetime.fromtimestamp(value, tz=self.tz)
+        text = value.strip() if isinstance(value, str) else ""
+        if not text:
+            raise DateParseError(value, source)
+
+        remembered = self.last_format.get(source)
+        order = range(len(FORMATS)) if remembered is None else \
+            [remembered] + [i for i in range(len(FORMATS)) if i != remembered]
+        for attempt, index in enumerate(order):
+            _, detector, parser = FORMATS[index]
+            m = detector.match(text)
+            if m is None:
+                continue
+            try:
+                dt = parser(m, text, reference)
+            except (ValueError, OverflowError, OSError):
+                continue
+            self.last_format[source] = index
+            self.parsed += 1
+            self.first_try_hits += attempt == 0
+            return self._localize(dt)
+        raise DateParseError(value, source)
+
+    def try_parse(self, value, source: str = "default", reference: Optional[datetime] = None) -> Optional[datetime]:
+        """Like parse(), but records the failure and returns None."""
+        try:
+            return self.parse(value, source, reference)
+        except DateParseError:
+            self.failures[source].append(str(value))
+            print(f"[DateNormalizer] {source}: could not parse date {value!r}; item skipped.")
+            return None
+
+    def parse_many(self, values: Iterable, source: str = "default",
+                   reference: Optional[datetime] = None) -> List[Optional[datetime]]:
+        """Batch form of try_parse(); repeated values are parsed once."""
+        reference = reference or datetime.now(self.tz)
+        seen: Dict[object, Optional[datetime]] = {}
+        results = []
+        for value in values:
+            key = value if isinstance(value, (str, int, float)) else id(value)
+            if key not in seen:
+                seen[key] = self.try_parse(value, source, reference)
+            results.append(seen[key])
+        return results
+
+    def format_of(self, source: str) -> Optional[str]:
+        """Name of the format `source` last parsed with."""
+        index = self.last_format.get(source)
+        return FORMATS[index][0] if index is not None else None
+
+    def report(self) -> Dict[str, dict]:
+        """Per-source failure counts with a few sample values."""
+        return {source: {"failed": len(values), "samples": values[:5]}
+                for source, values in self.failures.items() if values}
+
+
+def parse_clock(text: Optional[str]) -> Optional[time]:
+    """'7:00 AM', '8 pm' -> time; None for anything else ('TBD', empty)."""
+    m = _CLOCK.match(text.strip()) if text else None
+    if m is None:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    if not (1 <= hour <= 12 and minute < 60):
+        return None
+    hour = hour % 12 + (12 if m.group(3).lower() == "p" else 0)
+    return time(hour, minute)
+
+
+# Shared by the collectors, so per-source format memory lasts across runs in a warm process
+dates = DateNormalizer()
+
+
+def normalize_iso_format(date_str: str, source: str = "default") -> datetime:
+    """
+    Parses a date string into an America/New_York aware datetime.
+    Raises DateParseError instead of guessing.
     """
-    try:
-        return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-    except ValueError:
-        pass
-    
-    # Add more complex regex or dateparser-like logic here as needed
-    return datetime.now() # Fallback
+    return dates.parse(date_str, source)
+
 
 def strip_html(text: str) -> str:
     """Removes HTML tags from a string."""
     return re.sub('<[^<]+?>', '', text)
+
+
+def to_local_naive(dt: datetime, tz_name: str = "America/New_York") -> datetime:
+    """Converts a tz-aware datetime to naive NYC wall-clock time (naive input is returned as-is)."""
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(ZoneInfo(tz_name)).replace(tzinfo=None)
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # Optional: payloads are gzip-compressed without it
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows: the index is then only locked within one process
+    fcntl = None
+
+CODECS = ("zstd", "gzip")
+
+
+class PayloadStore:
+    """
+    Content-addressed store of the raw payloads collectors fetch.
+
+    Each payload is stored once under the SHA-256 of its bytes
+    (`objects/ab/cdef….zst` or `.gz`), however many runs fetched it. Every
+    capture (source, kind, URL, time, digest) is appended to `index.jsonl`, so
+    `--reparse` can feed past payloads back through the current parsers
+    without touching the network. `prune()` drops captures older than the
+    retention period and the blobs no capture refers to any more.
+
+    Collectors in worker processes write to the same store, so index appends
+    and the prune rewrite hold an exclusive lock on `index.jsonl.lock`.
+    """
+
+    def __init__(self, directory: str = "data/payloads", codec: str = "zstd", retention_days: float = 90):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown payload codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            print("[PayloadStore] zstandard is not installed; compressing payloads with gzip.")
+            codec = "gzip"
+        self.directory = directory
+        self.codec = codec
+        self.retention_days = retention_days
+        self.index_file = os.path.join(directory, "index.jsonl")
+        self.lock_file = self.index_file + ".lock"
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["PayloadStore"]:
+        """A store configured by PAYLOAD_STORE_DIR / PAYLOAD_CODEC / PAYLOAD_RETENTION_DAYS, or None if PAYLOAD_STORE=false."""
+        if os.getenv("PAYLOAD_STORE", "true").lower() != "true":
+            return None
+        return cls(
+            directory=os.getenv("PAYLOAD_STORE_DIR", "data/payloads"),
+            codec=os.getenv("PAYLOAD_CODEC", "zstd").lower(),
+            retention_days=float(os.getenv("PAYLOAD_RETENTION_DAYS", "90")),
+        )
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the index and blobs, across threads and processes."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_file, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    # --- Blobs ---
+
+    def _blob_path(self, digest: str, codec: str) -> str:
+        suffix = ".zst" if codec == "zstd" else ".gz"
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:] + suffix)
+
+    def _find_blob(self, digest: str) -> Optional[str]:
+        for codec in CODECS:
+            path = self._blob_path(digest, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, source: str, kind: str, url: str, body: Union[str, bytes],
+            fetched_at: Optional[datetime] = None) -> str:
+        """
+        Stores `body` (deduplicated) and records the capture; returns its digest.
+        Blocking (hashing, compression, file I/O): async callers go through offload().
+        """
+        data = body.encode() if isinstance(body, str) else body
+        digest = hashlib.sha256(data).hexdigest()
+        with self._locked():
+            stored = self._find_blob(digest)
+            if stored is None:
+                stored = self._blob_path(digest, self.codec)
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                packed = (zstandard.ZstdCompressor(level=10).compress(data) if self.codec == "zstd"
+                          else gzip.compress(data, compresslevel=6))
+                tmp_file = f"{stored}.tmp"
+                with open(tmp_file, "wb") as f:
+                    f.write(packed)
+                os.replace(tmp_file, stored)
+            capture = {
+                "source": source, "kind": kind, "url": url, "digest": digest,
+                "fetched_at": (fetched_at or datetime.now()).isoformat(),
+                "size": len(data), "stored_size": os.path.getsize(stored),
+            }
+            with open(self.index_file, "a") as f:
+                f.write(json.dumps(capture) + "\n")
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """The original bytes of a stored payload."""
+        path = self._find_blob(digest)
+        if path is None:
+            raise KeyError(f"payload {digest} is not stored")
+        with open(path, "rb") as f:
+            packed = f.read()
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError(f"zstandard is required to read {path}")
+            return zstandard.ZstdDecompressor().decompress(packed)
+        return gzip.decompress(packed)
+
+    # --- Captures ---
+
+    def captures(self, source: Optional[str] = None, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> Iterator[dict]:
+        """Recorded captures in fetch order, optionally for one source and a [since, until) window."""
+        if not os.path.exists(self.index_file):
+            return
+        low = since.isoformat() if since else None
+        high = until.isoformat() if until else None
+        with open(self.index_file, "r") as f:
+            for line in f:
+                try:
+                    capture = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Line cut short by a crash mid-write
+                if source and capture["source"] != source:
+                    continue
+                if (low and capture["fetched_at"] < low) or (high and capture["fetched_at"] >= high):
+                    continue
+                yield capture
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Applies the retention period; returns the number of blobs deleted."""
+        if not os.path.exists(self.index_file) or self.retention_days <= 0:
+            return 0
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).isoformat()
+        with self._locked():
+            kept: List[str] = []
+            expired = set()
+            with open(self.index_file, "r") as f:
+                for line in f:
+                    try:
+                        capture = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if capture["fetched_at"] < cutoff:
+                        expired.add(capture["digest"])
+                    else:
+                        kept.append(line)
+            if not expired:
+                return 0
+            live = {json.loads(line)["digest"] for line in kept}
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, "w") as f:
+                f.writelines(kept)
+            os.replace(tmp_file, self.index_file)
+            deleted = 0
+            for digest in expired - live:
+                path = self._find_blob(digest)
+                if path is not None:
+                    os.remove(path)
+                    deleted += 1
+        print(f"[PayloadStore] Retention: dropped captures older than {self.retention_days:g} days, "
+              f"deleted {deleted} payload(s).")
+        return deleted
+
+
+_store: Optional[PayloadStore] = None
+_store_loaded = False
+
+
+def payload_store() -> Optional[PayloadStore]:
+    """The process-wide store from the environment (None when PAYLOAD_STORE=false)."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store = PayloadStore.from_env()
+        _store_loaded = True
+    return _store
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.models.event import Event
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-collector circuit breaker.
+
+    closed    -> requests pass; `failure_threshold` consecutive failures open it.
+    open      -> requests are refused until `reset_timeout` seconds have passed.
+    half_open -> one trial request; success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 72 * 3600,
+                 state: Optional[dict] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        state = state or {}
+        self.state = state.get("state", CLOSED)
+        self.failures = state.get("failures", 0)
+        self.opened_at = state.get("opened_at")
+
+    def allow_request(self) -> bool:
+        if self.state == OPEN:
+            if time.time() - (self.opened_at or 0) >= self.reset_timeout:
+                self.state = HALF_OPEN
+                print(f"[CircuitBreaker] {self.name}: half-open, allowing a trial run.")
+                return True
+            return False
+        return True
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"[CircuitBreaker] {self.name}: closed after successful run.")
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.time()
+            print(f"[CircuitBreaker] {self.name}: OPEN after {self.failures} failure(s).")
+
+    def to_dict(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "opened_at": self.opened_at}
+
+
+class CollectorHealth:
+    """
+    Persists per-collector circuit breakers and each source's last-known-good events.
+
+    When a collector is skipped (open breaker) or fails, the pipeline serves
+    the cached events instead of an empty list; those events are flagged with
+    raw_data["stale"] so downstream stages can tell them apart.
+    """
+
+    def __init__(self, storage_file: str = "data/collector_state.json"):
+        self.storage_file = storage_file
+        self.failure_threshold = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+        self.reset_timeout = float(os.getenv("BREAKER_RESET_HOURS", "72")) * 3600
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.last_good: Dict[str, dict] = {}
+        self.load()
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+        return self.breakers[name]
+
+    def store_good(self, name: str, events: List[Event]):
+        """Remembers a successful result for `name`."""
+        self.last_good[name] = {
+            "saved_at": datetime.now().isoformat(),
+            "events": [e.model_dump(mode="json") for e in events],
+        }
+
+    def has_cache(self, name: str) -> bool:
+        return name in self.last_good
+
+    def cached_events(self, name: str, stale: bool = True) -> List[Event]:
+        """
+        Last-known-good events for `name` (empty if none cached). Flagged as stale
+        unless the caller knows upstream has not changed since they were cached.
+        """
+        entry = self.last_good.get(name)
+        if not entry:
+            return []
+        events = []
+        for data in entry["events"]:
+            event = Event.model_validate(data)
+            if stale:
+                event.raw_data = {**(event.raw_data or {}), "stale": True, "cached_at": entry["saved_at"]}
+            events.append(event)
+        return events
+
+    def load(self):
+        if not os.path.exists(self.storage_file):
+            return
+        try:
+            with open(self.storage_file, 'r') as f:
+                data = json.load(f)
+            for name, state in data.get("breakers", {}).items():
+                self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout, state)
+            self.last_good = data.get("last_good", {})
+        except Exception as e:
+            print(f"[CollectorHealth] Warning: Failed to load state file: {e}")
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+            with open(self.storage_file, 'w') as f:
+                json.dump({
+                    "last_updated": datetime.now().isoformat(),
+                    "breakers": {name: b.to_dict() for name, b in self.breakers.items()},
+                    "last_good": self.last_good,
+                }, f)
+        except Exception as e:
+            print(f"[CollectorHealth] Error saving state file: {e}")
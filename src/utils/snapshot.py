@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from src.models.event import Event
+
+
+class Snapshot:
+    """The last successful pipeline run: its events plus run metadata."""
+
+    def __init__(self, events: List[Event], created_at: float, metadata: dict):
+        self.events = events
+        self.created_at = created_at
+        self.metadata = metadata
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+
+class SnapshotStore:
+    """
+    Persists the last good pipeline result as gzip-compressed JSON.
+
+    Writes go through a temp file + rename so readers never see a partial
+    snapshot. Loaded snapshots are cached in-process and only re-read when the
+    file's mtime changes, so serving from it costs no disk I/O on warm hits.
+
+    Past `ttl_seconds` a snapshot is stale (served while a background refresh
+    runs); past `max_stale_seconds` it is too old to serve at all and the
+    caller refreshes inline first.
+    """
+
+    def __init__(self, storage_file: str = "data/pipeline_snapshot.json.gz", ttl_seconds: Optional[float] = None,
+                 max_stale_seconds: Optional[float] = None):
+        self.storage_file = storage_file
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("SNAPSHOT_TTL_SECONDS", "3600"))
+        self.max_stale_seconds = max_stale_seconds if max_stale_seconds is not None else \
+            float(os.getenv("SNAPSHOT_MAX_STALE_SECONDS", "86400"))
+        self._cached: Optional[Snapshot] = None
+        self._cached_mtime: Optional[float] = None
+
+    def save(self, events: List[Event], metadata: Optional[dict] = None) -> Snapshot:
+        """Writes a new snapshot atomically and returns it."""
+        snapshot = Snapshot(list(events), time.time(), metadata or {})
+        payload = {
+            "created_at": snapshot.created_at,
+            "metadata": snapshot.metadata,
+            "events": [e.model_dump(mode="json") for e in snapshot.events],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.storage_file)), exist_ok=True)
+        tmp_file = f"{self.storage_file}.tmp"
+        with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"), default=str)
+        os.replace(tmp_file, self.storage_file)
+        self._cached, self._cached_mtime = snapshot, os.path.getmtime(self.storage_file)
+        return snapshot
+
+    def load(self) -> Optional[Snapshot]:
+        """Returns the current snapshot, or None if there is none (or it is unreadable)."""
+        try:
+            mtime = os.path.getmtime(self.storage_file)
+        except OSError:
+            return None
+        if self._cached is not None and mtime == self._cached_mtime:
+            return self._cached
+        try:
+            with gzip.open(self.storage_file, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+            self._cached = Snapshot(
+                [Event.model_validate(e) for e in payload.get("events", [])],
+                payload.get("created_at", mtime),
+                payload.get("metadata", {}),
+            )
+            self._cached_mtime = mtime
+        except Exception as e:
+            print(f"[SnapshotStore] Warning: Failed to load snapshot: {e}")
+            return None
+        return self._cached
+
+    def is_stale(self, snapshot: Snapshot) -> bool:
+        return snapshot.age() > self.ttl_seconds
+
+    def is_expired(self, snapshot: Snapshot) -> bool:
+        """Too old to serve even while refreshing (0 disables the limit)."""
+        return self.max_stale_seconds > 0 and snapshot.age() > self.max_stale_seconds
+
+
+class SingleFlight:
+    """
+    Guarantees at most one refresh runs at a time in this process.
+
+    `trigger` starts a background refresh unless one is already in flight;
+    `run` waits for any in-flight refresh and then runs the function inline.
+
+    The background thread only gets CPU while the process does: on Cloud
+    Functions / Cloud Run (without always-allocated CPU) the instance is
+    throttled once the response is sent, so a triggered refresh may stall
+    until the next request arrives. Callers must not rely on it finishing;
+    SnapshotStore.is_expired() marks when to refresh inline instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> bool:
+        return self._lock.locked()
+
+    def trigger(self, fn: Callable[[], object]) -> bool:
+        """
+        Starts `fn` on a daemon thread; returns False if a refresh is already running.
+        `fn` runs on a fresh thread, so it must create and close any event loop it
+        needs (e.g. with asyncio.run).
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        def _run():
+            try:
+                fn()
+            except Exception as e:
+                print(f"[SingleFlight] Background refresh failed: {e}")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=_run, name="snapshot-refresh", daemon=True).start()
+        return True
+
+    def run(self, fn: Callable[[], object]):
+        with self._lock:
+            return fn()
@@ -0,0 +1,82 @@
+import importlib
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+# Captured when this module is first imported, i.e. at container start.
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """
+    Tracks what a serverless instance pays for at start-up.
+
+    Records the wall time of every lazily imported module (only the first,
+    uncached import costs anything) and counts invocations, so each request can
+    report whether it was a cold start and how that start was spent.
+    """
+
+    def __init__(self):
+        self.import_times: Dict[str, float] = {}
+        self.invocations = 0
+        self.first_invocation_at = None
+        # Called with the module name after every fresh import (e.g. the replay clock)
+        self.import_hooks: List[Callable[[str], None]] = []
+
+    def timed_import(self, module_name: str):
+        """Imports a module, recording its cost if it was not already loaded."""
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.import_times[module_name] = time.perf_counter() - start
+        for hook in self.import_hooks:
+            hook(module_name)
+        return module
+
+    def load(self, module_name: str, attr: str):
+        """Lazily resolves `module.attr` (e.g. a collector class)."""
+        return getattr(self.timed_import(module_name), attr)
+
+    def begin_invocation(self) -> bool:
+        """Marks the start of a request; returns True for the cold (first) one."""
+        self.invocations += 1
+        if self.first_invocation_at is None:
+            self.first_invocation_at = time.perf_counter()
+            return True
+        return False
+
+    def report(self) -> Dict[str, Any]:
+        """Import-time and cold-start breakdown (seconds)."""
+        return {
+            "cold_start": self.invocations <= 1,
+            "invocation": self.invocations,
+            "process_to_first_invocation": (
+                round(self.first_invocation_at - PROCESS_START, 4) if self.first_invocation_at else None
+            ),
+            "import_total": round(sum(self.import_times.values()), 4),
+            "imports": {k: round(v, 4) for k, v in sorted(self.import_times.items(), key=lambda kv: -kv[1])},
+        }
+
+    def log_report(self):
+        print(f"[Startup] {json.dumps(self.report())}")
+
+
+class WarmCache:
+    """Module-level cache for objects worth keeping across warm invocations (clients, credentials, compiled rules)."""
+
+    def __init__(self):
+        self._items: Dict[str, Any] = {}
+
+    def get(self, key: str, factory: Callable[[], Any]):
+        if key not in self._items:
+            self._items[key] = factory()
+        return self._items[key]
+
+    def invalidate(self, key: str):
+        self._items.pop(key, None)
+
+
+profiler = StartupProfiler()
+warm_cache = WarmCache()
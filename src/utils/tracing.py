@@ -0,0 +1,245 @@
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: spans carry no memory figures
+    resource = None
+
+# Innermost open span of the current task/thread; asyncio tasks inherit it when created
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+# Same, keyed by task, so another thread (the loop watchdog) can name the stage a task is in
+_task_spans: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+# Span field -> (Prometheus metric, help text)
+METRICS = OrderedDict([
+    ("wall_s", ("pipeline_stage_wall_seconds", "Wall-clock time spent in the stage.")),
+    ("cpu_s", ("pipeline_stage_cpu_seconds", "Process CPU time spent during the stage.")),
+    ("items_in", ("pipeline_stage_items_in", "Items the stage received.")),
+    ("items_out", ("pipeline_stage_items_out", "Items the stage produced.")),
+    ("bytes", ("pipeline_stage_bytes", "Bytes fetched or written by the stage.")),
+    ("peak_rss_delta_bytes", ("pipeline_stage_peak_rss_delta_bytes", "Growth of the process peak RSS during the stage.")),
+    ("errors", ("pipeline_stage_errors", "Stage executions that raised.")),
+])
+
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _running_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:  # No running loop in this thread
+        return None
+
+
+def task_stage(task) -> Optional[str]:
+    """Name of the innermost span open in `task` (None if it is outside any span)."""
+    try:
+        span = _task_spans.get(task) if task is not None else None
+    except TypeError:
+        return None
+    return span.name if span is not None else None
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Span:
+    """One timed pipeline stage. Counters can be set while the span is open."""
+
+    def __init__(self, name: str, run_id: str, parent_id: Optional[str], attrs: Dict[str, object],
+                 items_in: Optional[int] = None):
+        self.name = name
+        self.run_id = run_id
+        self.span_id = uuid.uuid4().hex[:12]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.started_at = datetime.now().isoformat()
+        self.wall_s: Optional[float] = None
+        self.cpu_s: Optional[float] = None
+        self.items_in = items_in
+        self.items_out: Optional[int] = None
+        self.bytes: Optional[int] = None
+        self.peak_rss_delta_bytes: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, items_in: Optional[int] = None, items_out: Optional[int] = None,
+            bytes: Optional[int] = None, **attrs):
+        if items_in is not None:
+            self.items_in = items_in
+        if items_out is not None:
+            self.items_out = items_out
+        if bytes is not None:
+            self.bytes = bytes
+        self.attrs.update(attrs)
+        return self
+
+    @property
+    def errors(self) -> int:
+        return int(self.status == "error")
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "started_at": self.started_at,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "bytes": self.bytes,
+            "peak_rss_delta_bytes": self.peak_rss_delta_bytes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """
+    Collects one span per pipeline stage for a single run.
+
+    Every span carries the run's `run_id` and its parent span, and records wall
+    time, process CPU time, items in/out, bytes and the growth of peak RSS.
+    CPU and memory are process-wide, so spans that overlap (parallel collectors)
+    share them. At the end of the run the spans are appended to TRACE_FILE as
+    JSON lines and, with TRACE_PROMETHEUS_FILE, written as a Prometheus textfile.
+    """
+
+    # Most recently exported run in this process (served by `?format=metrics`)
+    last: Optional["Tracer"] = None
+
+    def __init__(self, run_id: Optional[str] = None, trace_file: Optional[str] = None,
+                 prometheus_file: Optional[str] = None):
+        self.run_id = run_id or new_run_id()
+        self.trace_file = trace_file if trace_file is not None else os.getenv("TRACE_FILE", "data/pipeline_traces.jsonl")
+        self.prometheus_file = (prometheus_file if prometheus_file is not None
+                                else os.getenv("TRACE_PROMETHEUS_FILE", ""))
+        self.spans: List[Span] = []
+        # Non-span records (e.g. loop stalls) for the JSON lines file, and extra run-level gauges
+        self.records: List[dict] = []
+        self.gauges: Dict[str, tuple] = OrderedDict()
+
+    @contextmanager
+    def span(self, name: str, items_in: Optional[int] = None, **attrs):
+        parent = _current_span.get()
+        span = Span(name, self.run_id, parent.span_id if parent else None, attrs, items_in)
+        token = _current_span.set(span)
+        task = _running_task()
+        outer = _task_spans.get(task) if task is not None else None
+        if task is not None:
+            _task_spans[task] = span
+        rss_start = _peak_rss_bytes()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.wall_s = round(time.perf_counter() - wall_start, 6)
+            span.cpu_s = round(time.process_time() - cpu_start, 6)
+            if rss_start is not None:
+                span.peak_rss_delta_bytes = _peak_rss_bytes() - rss_start
+            _current_span.reset(token)
+            if task is not None:
+                if outer is not None:
+                    _task_spans[task] = outer
+                else:
+                    _task_spans.pop(task, None)
+            self.spans.append(span)
+
+    def log(self, kind: str, **fields):
+        """Adds a run-tagged record of type `kind` to the JSON lines output."""
+        self.records.append({"run_id": self.run_id, "kind": kind, "at": datetime.now().isoformat(), **fields})
+
+    def gauge(self, metric: str, value: float, help_text: str):
+        """Run-level Prometheus gauge (labelled with the run ID only)."""
+        self.gauges[metric] = (value, help_text)
+
+    def summary(self) -> Dict[str, float]:
+        """Total wall time per stage name, in span order."""
+        totals: Dict[str, float] = OrderedDict()
+        for span in sorted(self.spans, key=lambda s: s.started_at):
+            totals[span.name] = round(totals.get(span.name, 0.0) + (span.wall_s or 0.0), 3)
+        return totals
+
+    def prometheus_text(self) -> str:
+        """Spans in Prometheus text exposition format (summed per stage and label set)."""
+        series: Dict[tuple, Dict[str, float]] = OrderedDict()
+        for span in self.spans:
+            labels = (("run_id", self.run_id), ("stage", span.name)) + tuple(
+                sorted((k, v) for k, v in span.attrs.items() if v is not None)
+            )
+            values = series.setdefault(labels, {})
+            for field in METRICS:
+                value = getattr(span, field)
+                if value is not None:
+                    values[field] = values.get(field, 0) + value
+        lines = []
+        for field, (metric, help_text) in METRICS.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, values in series.items():
+                if field in values:
+                    rendered = ",".join(f'{k}="{_label_value(v)}"' for k, v in labels)
+                    lines.append(f"{metric}{{{rendered}}} {values[field]:g}")
+        for metric, (value, help_text) in self.gauges.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f'{metric}{{run_id="{_label_value(self.run_id)}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a") as f:
+            for span in self.spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+            for record in self.records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def write_prometheus(self, path: str):
+        # Temp file + rename, so a textfile collector never reads a partial file
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_file, path)
+
+    def export(self):
+        """Writes the configured outputs and logs the per-stage breakdown."""
+        Tracer.last = self
+        print(f"[Tracer] Run {self.run_id}: {json.dumps(self.summary())}")
+        try:
+            if self.trace_file:
+                self.write_jsonl(self.trace_file)
+            if self.prometheus_file:
+                self.write_prometheus(self.prometheus_file)
+        except Exception as e:
+            print(f"[Tracer] Error writing traces: {e}")
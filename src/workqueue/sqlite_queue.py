@@ -0,0 +1,288 @@
+import functools
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.models.event import Event
+from src.utils.isolation import CollectorRun
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    collector TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    collector TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    committed_at REAL NOT NULL
+);
+"""
+
+
+class Job:
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.run_id = row["run_id"]
+        self.collector = row["collector"]
+        self.params = json.loads(row["params"])
+        self.attempts = row["attempts"]
+        self.max_attempts = row["max_attempts"]
+
+
+def _encode_run(run: CollectorRun) -> bytes:
+    return gzip.compress(json.dumps({
+        "events": [e.model_dump(mode="json") for e in run.events] if run.events is not None else None,
+        "unchanged": run.unchanged,
+        "pending_digest": run.pending_digest,
+        "bytes_fetched": run.bytes_fetched,
+    }, separators=(",", ":")).encode())
+
+
+def _decode_run(payload: bytes) -> CollectorRun:
+    data = json.loads(gzip.decompress(payload))
+    events = data["events"]
+    return CollectorRun(
+        events=[Event.model_validate(e) for e in events] if events is not None else None,
+        unchanged=data["unchanged"],
+        pending_digest=data["pending_digest"],
+        bytes_fetched=data.get("bytes_fetched", 0),
+    )
+
+
+def _locked(fn):
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
+class SQLiteJobQueue:
+    """
+    Scrape job queue backed by a single SQLite file (WORK_QUEUE_DB).
+
+    - Jobs are keyed by "<run_id>:<collector>", so enqueueing twice is a no-op.
+    - `lease` hands a job to one worker until its lease expires; expired leases
+      become available again (a crashed worker's job is retried).
+    - Failures are retried with exponential backoff up to `max_attempts`.
+    - Results land in the `results` table; the first commit for a job wins.
+    - `complete`, `fail` and `heartbeat` only act for the worker that holds
+      the lease: a worker whose lease expired and was re-leased to another
+      cannot commit, requeue or fail the other worker's live job.
+
+    One connection is shared by all threads using the queue (the pipeline
+    offloads these calls to a thread pool), so every call holds a lock.
+    """
+
+    def __init__(self, path: Optional[str] = None, retry_backoff: Optional[float] = None):
+        self.path = path or os.getenv("WORK_QUEUE_DB", "data/work_queue.db")
+        self.retry_backoff = retry_backoff if retry_backoff is not None else float(os.getenv("QUEUE_RETRY_BACKOFF", "30"))
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers cannot lease the same job
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    @_locked
+    def enqueue(self, run_id: str, collector: str, params: Optional[dict] = None, max_attempts: int = 3) -> str:
+        job_id = f"{run_id}:{collector}"
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (id, run_id, collector, params, status, max_attempts, available_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, run_id, collector, json.dumps(params or {}), QUEUED, max_attempts, now, now, now),
+        )
+        return job_id
+
+    @_locked
+    def pending(self, run_id: str) -> int:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND status IN (?, ?)", (run_id, QUEUED, LEASED)
+        ).fetchone()
+        return row[0]
+
+    def wait(self, run_id: str, timeout: float, poll_interval: float = 1.0) -> bool:
+        """Blocks until every job of `run_id` is done or failed; False on timeout."""
+        deadline = time.time() + timeout
+        while self.pending(run_id):
+            if time.time() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    @_locked
+    def results(self, run_id: str) -> Dict[str, CollectorRun]:
+        """Committed results plus failures for `run_id`, keyed by collector."""
+        runs = {
+            row["collector"]: _decode_run(row["payload"])
+            for row in self.conn.execute("SELECT collector, payload FROM results WHERE run_id = ?", (run_id,))
+        }
+        for row in self.conn.execute(
+            "SELECT collector, status, error FROM jobs WHERE run_id = ? AND status != ?", (run_id, DONE)
+        ):
+            if row["collector"] not in runs:
+                reason = row["error"] if row["status"] == FAILED else f"job still {row['status']}"
+                runs[row["collector"]] = CollectorRun(error=reason)
+        return runs
+
+    @_locked
+    def purge(self, older_than_seconds: float = 7 * 86400) -> int:
+        cutoff = time.time() - older_than_seconds
+        self._transaction()
+        try:
+            old = [r[0] for r in self.conn.execute("SELECT id FROM jobs WHERE created_at < ?", (cutoff,))]
+            self.conn.executemany("DELETE FROM results WHERE job_id = ?", [(i,) for i in old])
+            self.conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in old])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(old)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+    @_locked
+    def lease(self, worker_id: str, lease_seconds: float = 900, collectors: Optional[List[str]] = None,
+              run_id: Optional[str] = None) -> Optional[Job]:
+        """Claims the next available job (or one whose lease expired), optionally for one run only."""
+        now = time.time()
+        self._transaction()
+        try:
+            # Expired leases that used up their attempts are failed instead of re-leased
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, 'lease expired'), updated_at = ?"
+                " WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, LEASED, now),
+            )
+            query = ("SELECT * FROM jobs WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?))")
+            args = [QUEUED, now, LEASED, now]
+            if collectors:
+                query += f" AND collector IN ({','.join('?' * len(collectors))})"
+                args += collectors
+            if run_id:
+                query += " AND run_id = ?"
+                args.append(run_id)
+            row = self.conn.execute(query + " ORDER BY available_at LIMIT 1", args).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE id = ?",
+                (LEASED, worker_id, now + lease_seconds, now, row["id"]),
+            )
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return Job(row)
+
+    @_locked
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = 900) -> bool:
+        """Extends the lease; False if the job is no longer leased to this worker."""
+        cur = self.conn.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (time.time() + lease_seconds, time.time(), job_id, LEASED, worker_id),
+        )
+        return cur.rowcount == 1
+
+    @_locked
+    def complete(self, job: Job, worker_id: str, run: CollectorRun) -> bool:
+        """
+        Commits a job's result; returns False if a result was already committed
+        or the job is no longer leased to `worker_id`.
+        """
+        payload = _encode_run(run)
+        now = time.time()
+        self._transaction()
+        try:
+            row = self.conn.execute("SELECT status, lease_owner FROM jobs WHERE id = ?", (job.id,)).fetchone()
+            committed = False
+            if row is not None and row["status"] == LEASED and row["lease_owner"] == worker_id:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO results (job_id, run_id, collector, worker, payload, committed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (job.id, job.run_id, job.collector, worker_id, payload, now),
+                )
+                committed = cur.rowcount == 1
+            if committed:
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, error = NULL, updated_at = ?"
+                    " WHERE id = ?",
+                    (DONE, now, job.id),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return committed
+
+    @_locked
+    def fail(self, job: Job, worker_id: str, error: str) -> str:
+        """
+        Records a failed attempt; requeues with backoff or marks the job failed.
+        Returns the job's status afterwards (unchanged if `worker_id` no longer holds the lease).
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            row = self.conn.execute(
+                "SELECT status, attempts, max_attempts, lease_owner FROM jobs WHERE id = ?", (job.id,)
+            ).fetchone()
+            if row is None or row["status"] != LEASED or row["lease_owner"] != worker_id:
+                # Committed, purged or re-leased to another worker: not ours to retry
+                self.conn.execute("COMMIT")
+                return row["status"] if row else FAILED
+            if row["attempts"] < row["max_attempts"]:
+                status, available_at = QUEUED, now + self.retry_backoff * 2 ** (row["attempts"] - 1)
+            else:
+                status, available_at = FAILED, now
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,"
+                " error = ?, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (status, available_at, error, now, job.id, worker_id),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return status
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from src.utils.isolation import CollectorRun, run_collector, run_in_process
+from src.utils.loop_watchdog import offload
+from src.workqueue.sqlite_queue import Job, SQLiteJobQueue
+
+
+class QueueWorker:
+    """
+    Consumes scrape jobs from the queue: leases a job, runs its collector
+    (in a worker process for browser collectors when COLLECTOR_ISOLATION=process),
+    keeps the lease alive while it runs, then commits the result or records
+    the failure for retry. Any number of these can share one queue. Queue
+    calls are blocking SQLite transactions and run through offload().
+    """
+
+    def __init__(self, collectors: Dict[str, dict], queue: Optional[SQLiteJobQueue] = None,
+                 worker_id: Optional[str] = None, lease_seconds: Optional[float] = None):
+        self.collectors = collectors
+        self.queue = queue or SQLiteJobQueue()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or float(os.getenv("QUEUE_LEASE_SECONDS", "900"))
+        self.isolated = os.getenv("COLLECTOR_ISOLATION", "thread").lower() == "process"
+
+    async def _keep_leased(self, job: Job):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await offload(self.queue.heartbeat, job.id, self.worker_id, self.lease_seconds):
+                print(f"[QueueWorker] Lost lease on {job.id}.")
+                return
+
+    async def process(self, job: Job) -> bool:
+        """Runs one leased job; returns True if its result was committed."""
+        spec = self.collectors.get(job.collector)
+        if spec is None:
+            await offload(self.queue.fail, job, self.worker_id, f"unknown collector {job.collector!r}")
+            return False
+        print(f"[QueueWorker] {self.worker_id} running {job.id} (attempt {job.attempts}/{job.max_attempts})")
+        known_digest = job.params.get("known_digest")
+        heartbeat = asyncio.create_task(self._keep_leased(job))
+        try:
+            if self.isolated and spec["browser"]:
+                run = await run_in_process(spec["module"], spec["cls"], spec["method"], spec["source"], known_digest)
+            else:
+                run = await run_collector(spec["module"], spec["cls"], spec["method"], spec["source"], known_digest)
+        finally:
+            heartbeat.cancel()
+
+        if run.error is None and spec["browser"] and not run.events and not run.unchanged:
+            run.error = "no events returned"
+        if run.error is not None:
+            status = await offload(self.queue.fail, job, self.worker_id, run.error)
+            print(f"[QueueWorker] {job.id} failed ({run.error}); now {status}.")
+            return False
+        committed = await offload(self.queue.complete, job, self.worker_id, run)
+        print(f"[QueueWorker] {job.id} {'committed' if committed else 'not committed (already committed or lease lost)'}.")
+        return committed
+
+    async def run(self, stop_when_idle: bool = False, poll_interval: float = 5.0,
+                  run_id: Optional[str] = None):
+        """
+        Processes jobs until stopped. With `run_id`, only that run's jobs are taken;
+        with `stop_when_idle`, returns once none of them are queued or leased.
+        """
+        while True:
+            job = await offload(self.queue.lease, self.worker_id, self.lease_seconds, run_id=run_id)
+            if job is not None:
+                await self.process(job)
+                continue
+            if stop_when_idle and (run_id is None or not await offload(self.queue.pending, run_id)):
+                return
+            await asyncio.sleep(poll_interval)
+
+
+async def dispatch(collectors: Dict[str, dict], names: List[str], params: Optional[Dict[str, dict]] = None,
+                   queue: Optional[SQLiteJobQueue] = None, timeout: Optional[float] = None,
+                   local_workers: Optional[int] = None, run_id: Optional[str] = None) -> Dict[str, CollectorRun]:
+    """
+    Enqueues one job per collector for a new run and waits for the results.
+
+    QUEUE_LOCAL_WORKERS workers are started in this process as well (0 = rely
+    on external `main.py --worker` processes). Collectors without a result
+    after QUEUE_WAIT_SECONDS come back as failed runs. `run_id` defaults to a
+    fresh one (the pipeline passes its trace run ID).
+    """
+    queue = queue or await offload(SQLiteJobQueue)
+    timeout = timeout if timeout is not None else float(os.getenv("QUEUE_WAIT_SECONDS", "1800"))
+    local_workers = local_workers if local_workers is not None else int(os.getenv("QUEUE_LOCAL_WORKERS", "0"))
+    await offload(queue.purge)
+    run_id = run_id or uuid.uuid4().hex
+    for name in names:
+        await offload(queue.enqueue, run_id, name, (params or {}).get(name))
+    print(f"[Queue] Run {run_id}: enqueued {len(names)} job(s); {local_workers} local worker(s).")
+
+    workers = [
+        asyncio.create_task(QueueWorker(collectors, queue).run(stop_when_idle=True, poll_interval=1.0, run_id=run_id))
+        for _ in range(local_workers)
+    ]
+    deadline = time.time() + timeout
+    while await offload(queue.pending, run_id) and time.time() < deadline:
+        await asyncio.sleep(1.0)
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    runs = await offload(queue.results, run_id)
+    return {name: runs.get(name, CollectorRun(error="no result")) for name in names}
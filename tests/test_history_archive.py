@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.event import Event
+from src.utils.history_archive import UNDATED, HistoryArchive
+from src.utils.memory import EventMemory, event_digest
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return HistoryArchive(str(tmp_path / "archive"))
+
+
+def _record(title: str, start_time, source: str = "NYRR") -> dict:
+    return {"title": title, "start_time": start_time, "source": source}
+
+
+def test_records_are_partitioned_by_month(archive):
+    archive.append([_record("a", "2026-05-02T08:00:00"), _record("b", "2026-06-10T08:00:00"),
+                    _record("legacy", None)])
+    archive.append([_record("c", "2026-05-30T18:00:00", source="Prospect Park")])
+    assert archive.partitions() == ["2026-05", "2026-06", UNDATED]
+    assert [r["title"] for r in archive.scan()] == ["a", "c", "b", "legacy"]
+
+
+def test_range_scan(archive):
+    archive.append([_record("a", "2026-05-02T08:00:00"), _record("b", "2026-06-10T08:00:00"),
+                    _record("c", "2026-05-30T18:00:00", source="Prospect Park"), _record("legacy", None)])
+    may = list(archive.scan(datetime(2026, 5, 1), datetime(2026, 6, 1)))
+    assert [r["title"] for r in may] == ["a", "c"]
+    assert [r["title"] for r in archive.scan(datetime(2026, 5, 2, 8), datetime(2026, 6, 10, 8))] == ["a", "c"]
+    assert [r["title"] for r in archive.scan(source="Prospect Park")] == ["c"]
+
+
+def test_clear(archive):
+    archive.append([_record("a", "2026-05-02T08:00:00")])
+    archive.clear()
+    assert archive.partitions() == [] and list(archive.scan()) == []
+
+
+def test_memory_archives_expired_and_removed_events(tmp_path):
+    memory = EventMemory(str(tmp_path / "event_memory.json"))
+    past = Event(title="Past 5K", start_time=datetime(2026, 5, 2, 8), venue="Prospect Park", source="NYRR")
+    gone = Event(title="Cancelled Fair", start_time=datetime(2026, 12, 5, 10), venue="Grand Army Plaza",
+                 source="Prospect Park")
+    upcoming = Event(title="Turkey Trot", start_time=datetime(2026, 11, 26, 9), venue="Prospect Park", source="NYRR")
+    for event in (past, gone, upcoming):
+        memory.mark_processed(event, google_event_id=f"gcal-{event.title}")
+
+    assert memory.evict_before(datetime(2026, 11, 1)) == 1
+    memory.remove_event(event_digest(gone).hex())
+    memory.flush()
+
+    assert len(memory) == 1 and not memory.is_new(upcoming)
+    records = {r["title"]: r for r in memory.archive.scan()}
+    assert records["Past 5K"]["reason"] == "expired"
+    assert records["Past 5K"]["start_time"] == "2026-05-02T08:00:00"
+    assert records["Past 5K"]["google_id"] == "gcal-Past 5K"
+    assert records["Cancelled Fair"]["reason"] == "removed"
+    assert records["Cancelled Fair"]["venue"] == "Grand Army Plaza"
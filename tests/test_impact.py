@@ -0,0 +1,30 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.event import Event
+from src.scoring.impact import ImpactScorer
+
+# Wednesday noon: no weekday or hour points, so the tier decides the score
+MIDWEEK_NOON = datetime(2026, 5, 13, 12)
+
+
+def _explain(title: str) -> dict:
+    event = Event(title=title, start_time=MIDWEEK_NOON, venue="Central Park", source="NYRR")
+    return ImpactScorer().explain(event)
+
+
+@pytest.mark.parametrize("title", ["Queens Half-Marathon", "Queens Half Marathon", "Staten Island 13.1"])
+def test_half_marathons_are_not_scored_as_marathons(title):
+    result = _explain(title)
+    assert result["contributions"]["event_tier"] == 3.5
+    assert result["attendance_estimate"] == 15000
+
+
+def test_half_without_race_context_is_not_a_race():
+    assert _explain("Half Price Yoga Class")["contributions"]["event_tier"] == 1.0
+
+
+def test_half_points_round_up():
+    assert _explain("TCS Marathon")["impact_score"] == 5
+    assert _explain("Queens Half-Marathon")["impact_score"] == 4
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from src.models.event import Event
+from src.utils.memory import KEY_VERSION, EventMemory, event_digest
+from src.utils.normalization import NEW_YORK
+
+
+@pytest.fixture
+def memory_file(tmp_path):
+    return str(tmp_path / "event_memory.json")
+
+
+def _alert(hour: int = 8) -> Event:
+    return Event(title="Heat Advisory", start_time=datetime(2026, 7, 4, hour, tzinfo=NEW_YORK),
+                 venue="Kings", source="NWS Weather")
+
+
+def test_version_1_keys_are_migrated_once_keeping_the_calendar_id(memory_file):
+    event = _alert()
+    # Version 1 hashed str() of the offset-aware start, in a JSON memory
+    legacy = hashlib.md5(f"{event.title}|{event.start_time}|{event.venue}".lower().strip().encode()).hexdigest()
+    with open(memory_file, "w") as f:
+        json.dump({"event_map": {legacy: "gcal-1"}, "source_map": {legacy: "NWS Weather"}}, f)
+
+    memory = EventMemory(memory_file)
+    assert memory.key_version == 1 and legacy in memory
+    assert memory.migrate_keys([event, _alert(hour=9)]) == 1
+    assert not memory.is_new(event)
+    assert legacy not in memory
+    assert memory.get_google_id(event_digest(event).hex()) == "gcal-1"
+    assert memory.get_source(event_digest(event).hex()) == "NWS Weather"
+
+    memory = EventMemory(memory_file)
+    assert memory.key_version == KEY_VERSION
+    assert memory.migrate_keys([event]) == 0
+    assert len(memory) == 1
+
+
+def test_new_memory_starts_on_the_current_key_version(memory_file):
+    assert EventMemory(memory_file).key_version == KEY_VERSION
+
+
+def _race(i: int, day: int = 10) -> Event:
+    return Event(title=f"Race {i}", start_time=datetime(2026, 11, day, 8), venue="Prospect Park", source="NYRR")
+
+
+def test_round_trip_through_journal_and_compaction(memory_file):
+    memory = EventMemory(memory_file)
+    for i in range(50):
+        memory.mark_processed(_race(i), google_event_id=f"gcal-{i}" if i % 2 else None)
+    removed = event_digest(_race(7)).hex()
+    memory.remove_event(removed)
+    memory.flush()
+
+    # Reopened from the journal alone, then from the compacted file
+    for _ in range(2):
+        memory = EventMemory(memory_file)
+        assert len(memory) == 49
+        assert removed not in memory
+        assert not memory.is_new(_race(3)) and memory.is_new(_race(99))
+        assert memory.get_google_id(event_digest(_race(3)).hex()) == "gcal-3"
+        assert memory.get_google_id(event_digest(_race(4)).hex()) is None
+        assert memory.get_source(event_digest(_race(4)).hex()) == "NYRR"
+        assert sorted(memory.get_all_ids()) == sorted(event_digest(_race(i)).hex() for i in range(50) if i != 7)
+        memory.compact()
+
+
+def test_json_memory_is_migrated(memory_file):
+    known, bare = event_digest(_race(1)).hex(), event_digest(_race(2)).hex()
+    with open(memory_file, "w") as f:
+        json.dump({"event_map": {known: "gcal-1", bare: None}, "source_map": {known: "NYRR"}}, f)
+
+    memory = EventMemory(memory_file)
+    assert len(memory) == 2
+    assert memory.get_google_id(known) == "gcal-1" and memory.get_source(known) == "NYRR"
+    assert memory.get_source(bare) is None
+    assert os.path.exists(memory_file + ".migrated") and not os.path.exists(memory_file)
+
+    # Migrated entries have no start time until the event is seen again
+    assert memory.evict_before(datetime(2030, 1, 1)) == 0
+    assert memory.fill_details(_race(1))
+    assert memory.evict_before(datetime(2030, 1, 1)) == 1
+    assert len(EventMemory(memory_file)) == 1
+
+
+def test_oldest_json_format_is_migrated(memory_file):
+    with open(memory_file, "w") as f:
+        json.dump({"processed_ids": [event_digest(_race(1)).hex()]}, f)
+    assert not EventMemory(memory_file).is_new(_race(1))
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from src.utils.normalization import NEW_YORK, DateNormalizer, DateParseError
+
+REFERENCE = datetime(2026, 11, 20, 9, tzinfo=NEW_YORK)
+
+
+def test_learns_each_sources_format():
+    normalizer = DateNormalizer()
+    normalizer.parse("11/22/2026", "A")
+    normalizer.parse("2026-11-22T07:00:00", "B")
+    assert normalizer.format_of("A") == "slash_mdy"
+    assert normalizer.format_of("B") == "iso_datetime"
+
+    normalizer.parse("12/01/2026", "A")
+    normalizer.parse("2026-12-01T07:00:00", "B")
+    # Only A's first value had to search past the first format
+    assert normalizer.parsed == 4
+    assert normalizer.first_try_hits == 3
+
+
+def test_learned_format_falls_back_when_the_source_changes():
+    normalizer = DateNormalizer()
+    normalizer.parse("11/22/2026", "A")
+    assert normalizer.parse("Nov 23, 2026", "A") == datetime(2026, 11, 23, tzinfo=NEW_YORK)
+    assert normalizer.format_of("A") == "month_day_year"
+
+
+def test_month_day_rolls_over_to_next_year():
+    normalizer = DateNormalizer()
+    assert normalizer.parse("January 3 @ 7:00 pm", "PP", REFERENCE) == datetime(2027, 1, 3, 19, tzinfo=NEW_YORK)
+    assert normalizer.parse("November 20", "PP", REFERENCE) == datetime(2026, 11, 20, tzinfo=NEW_YORK)
+    assert normalizer.parse("December 31", "PP", REFERENCE).year == 2026
+
+
+def test_offsets_are_converted_to_new_york():
+    parsed = DateNormalizer().parse("2026-07-04T16:00:00Z")
+    assert parsed.tzinfo is NEW_YORK
+    assert parsed.replace(tzinfo=None) == datetime(2026, 7, 4, 12)
+
+
+def test_unparseable_dates_are_never_now():
+    normalizer = DateNormalizer()
+    with pytest.raises(DateParseError):
+        normalizer.parse("TBD", "A")
+    assert normalizer.parse_many(["TBD", "11/22/2026", "TBD"], "A", REFERENCE)[::2] == [None, None]
+    assert normalizer.report()["A"]["failed"] == 1
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+import pytest
+
+from src.ingestion.nyrr import NYRRCollector
+from src.utils.normalization import NEW_YORK
+
+
+@pytest.mark.parametrize("start_date", ["2026-11-22T00:00:00Z", "2026-11-22T00:00:00+00:00",
+                                        "2026-11-22T23:30:00-05:00", "2026-11-22", "2026-11-22 07:00:00"])
+def test_feed_dates_keep_their_calendar_date(start_date):
+    feed = {"events": [{"event_name": "Turkey Trot", "start_date": start_date, "location": "Prospect Park"}]}
+    [event] = NYRRCollector()._parse_json_feed([feed])
+    assert event.start_time == datetime(2026, 11, 22, tzinfo=NEW_YORK)
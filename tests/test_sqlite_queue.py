@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from src.utils.isolation import CollectorRun
+from src.workqueue.sqlite_queue import DONE, FAILED, LEASED, QUEUED, SQLiteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteJobQueue(str(tmp_path / "queue.db"), retry_backoff=0)
+    yield q
+    q.close()
+
+
+def _status(queue, job_id):
+    return queue.conn.execute("SELECT status, lease_owner FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def _expire(queue, job_id):
+    queue.conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_enqueue_is_idempotent(queue):
+    assert queue.enqueue("run", "NYRR") == queue.enqueue("run", "NYRR")
+    assert queue.pending("run") == 1
+
+
+def test_lease_is_exclusive_until_expiry(queue):
+    queue.enqueue("run", "NYRR")
+    job = queue.lease("A")
+    assert job is not None and job.attempts == 1
+    assert queue.lease("B") is None
+
+    _expire(queue, job.id)
+    again = queue.lease("B")
+    assert again.id == job.id and again.attempts == 2
+    assert _status(queue, job.id)["lease_owner"] == "B"
+
+
+def test_stale_worker_cannot_fail_or_heartbeat_released_job(queue):
+    queue.enqueue("run", "NYRR")
+    stale = queue.lease("A")
+    _expire(queue, stale.id)
+    live = queue.lease("B")
+
+    assert queue.fail(stale, "A", "timeout") == LEASED
+    assert not queue.heartbeat(stale.id, "A")
+    row = _status(queue, live.id)
+    assert row["status"] == LEASED and row["lease_owner"] == "B"
+    assert queue.heartbeat(live.id, "B")
+
+
+def test_stale_worker_cannot_complete_released_job(queue):
+    queue.enqueue("run", "NYRR")
+    stale = queue.lease("A")
+    _expire(queue, stale.id)
+    live = queue.lease("B")
+
+    assert not queue.complete(stale, "A", CollectorRun(events=[]))
+    assert _status(queue, live.id)["status"] == LEASED
+    assert queue.complete(live, "B", CollectorRun(events=[], pending_digest="d"))
+    assert _status(queue, live.id)["status"] == DONE
+    assert queue.results("run")["NYRR"].pending_digest == "d"
+
+
+def test_fail_requeues_then_fails_after_max_attempts(queue):
+    queue.enqueue("run", "NYRR", max_attempts=2)
+    job = queue.lease("A")
+    assert queue.fail(job, "A", "boom") == QUEUED
+    job = queue.lease("A")
+    assert queue.fail(job, "A", "boom") == FAILED
+    assert queue.pending("run") == 0
+    assert queue.results("run")["NYRR"].error == "boom"
+
+
+def test_expired_lease_without_attempts_left_is_failed(queue):
+    queue.enqueue("run", "NYRR", max_attempts=1)
+    job = queue.lease("A")
+    _expire(queue, job.id)
+    assert queue.lease("B") is None
+    assert _status(queue, job.id)["status"] == FAILED